@@ -10,6 +10,17 @@ import os
 
 from src.app.services.dbConnect import DBConnection as db
 from src.app.services.nosqlConnection import NoSQLConnectionManager as ncm
+from src.app.services.llmResponseCache import LLMResponseCache as rc
+from src.app.services.embeddingCache import EmbeddingCache as ec
+from src.app.services.llmBackends import LLMBackendFactory as lbf
+from src.app.services.vertixAIActivities import VertexAIService as vai
+from src.app.services.vectorIndex import VectorIndex as vix
+from src.app.metadata.oracleVectorIndexes import OracleVectorIndexManager as ovi
+from src.app.metadata.promptConfigRegistry import PromptConfigRegistry as pcr
+from src.app.chatbot.aiAgents import SupportAgent as supa
+from src.app.services.chatWriteBehind import ChatWriteBehind as cwb
+from src.app.services.executionPools import ExecutionPools as ep
+from src.app.utils.loggerConfig import LoggerManager as lg
 from src.main.routers.salesAgentRouters import router as sales_routers
 from src.main.routers.supportAgentRouters import router as support_routers
 from src.main.routers.configRouters import router as config_routers
@@ -36,12 +47,48 @@ async def lifespan(ab_app: FastAPI):
     ai_db_details = db_details.get('WAI_NONPROD')
     nosql_db_details = db_details.get('WAI_NoSQL')
 
+    ep.load_config(ab_app.state.execution_pools_config_path) # type: ignore[attr-defined]
     db.initialize_pool(None, ai_db_pool_name, db_details=ai_db_details) # type: ignore[attr-defined]
     ab_app.state.nosql_conn = ncm.get_nosql_conn(nosql_db_details=nosql_db_details, private_key_file='../certs/oci_private.pem') # type: ignore[attr-defined]
+    rc.configure(db_path=ab_app.state.llm_cache_path) # type: ignore[attr-defined]
+    ec.configure(db_path=ab_app.state.embedding_cache_path) # type: ignore[attr-defined]
+    vai.use_backend(lbf.load_backend(ab_app.state.llm_backend_config_path)) # type: ignore[attr-defined]
+    ovi.load_config(ab_app.state.oracle_vector_index_config_path) # type: ignore[attr-defined]
+    supa.GetContents.load_config(ab_app.state.support_agent_config_path) # type: ignore[attr-defined]
+    pcr.configure(signal_path=ab_app.state.prompt_config_signal_path) # type: ignore[attr-defined]
+    prompt_config_logger = lg.configure_logger(f"{ab_app.state.log_dir}/promptConfigRegistry") # type: ignore[attr-defined]
+    try:
+        await ep.run_db(pcr.load, ab_app.state.nosql_conn, prompt_config_logger) # type: ignore[attr-defined]
+    except Exception as e:
+        prompt_config_logger.error(f"Prompt configs not loaded at startup, they are loaded on first use. Error: {e}")
+    finally:
+        lg.shutdown_logger(prompt_config_logger)
+
+    vector_index_logger = lg.configure_logger(f"{ab_app.state.log_dir}/vectorIndex") # type: ignore[attr-defined]
+    vector_index_refresh = None
+    vix.load_config(ab_app.state.vector_index_config_path) # type: ignore[attr-defined]
+    if vix.is_enabled():
+        await ep.run_db(vix.refresh_from_pool, ai_db_pool_name, vector_index_logger, True)
+        vector_index_refresh = asyncio.create_task(vix.run_refresh_loop(ai_db_pool_name, vector_index_logger))
+
+    chat_write_logger = lg.configure_logger(f"{ab_app.state.log_dir}/chatWriteBehind") # type: ignore[attr-defined]
+    cwb.start(ab_app.state.nosql_conn, chat_write_logger) # type: ignore[attr-defined]
+
+    llm_cache_logger = lg.configure_logger(f"{ab_app.state.log_dir}/llmResponseCache") # type: ignore[attr-defined]
+    llm_cache_purge = asyncio.create_task(rc.run_purge_loop(llm_cache_logger))
 
     yield
+    llm_cache_purge.cancel()
+    lg.shutdown_logger(llm_cache_logger)
+    if vector_index_refresh:
+        vector_index_refresh.cancel()
+    lg.shutdown_logger(vector_index_logger)
+    # Store the queued chat turns before the NoSQL handle is closed.
+    await ep.run_db(cwb.stop)
+    lg.shutdown_logger(chat_write_logger)
     db.close_pool(ai_db_pool_name)
     ncm.close_nosql_conn(ab_app.state.nosql_conn) # type: ignore[attr-defined]
+    ep.shutdown()
 
 
 app = FastAPI(
@@ -77,6 +124,14 @@ app.state.ai_db_pool_name = 'ai_db_conn_service' # type: ignore[attr-defined]
 app.state.nosql_oci_private_key = '../certs/oci_private.pem' # type: ignore[attr-defined]
 app.state.agent_files_upload_dir = "DownloadedFiles/AgentFiles" # type: ignore[attr-defined]
 app.state.jira_config_path = "configuration/jira_config.json" # type: ignore[attr-defined]
+app.state.llm_cache_path = "cache/llm_response_cache.sqlite3" # type: ignore[attr-defined]
+app.state.embedding_cache_path = "cache/query_embedding_cache.sqlite3" # type: ignore[attr-defined]
+app.state.llm_backend_config_path = "configuration/llm_backend_config.json" # type: ignore[attr-defined]
+app.state.vector_index_config_path = "configuration/vector_index_config.json" # type: ignore[attr-defined]
+app.state.oracle_vector_index_config_path = "configuration/oracle_vector_index_config.json" # type: ignore[attr-defined]
+app.state.support_agent_config_path = "configuration/support_agent_config.json" # type: ignore[attr-defined]
+app.state.prompt_config_signal_path = "cache/prompt_config.signal" # type: ignore[attr-defined]
+app.state.execution_pools_config_path = "configuration/execution_pools_config.json" # type: ignore[attr-defined]
 
 
 app.include_router(health_routers, prefix="/Check", tags=["Health"])
@@ -0,0 +1,115 @@
+import json
+import time
+import statistics
+
+from src.app.chatbot.chatBot import ChatOperations as co
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+
+
+class RoundTripCounter:
+    """
+    Counts the NoSQL requests sent through a handle by wrapping its get and query methods. A query whose results
+    span several batches counts once per batch, as each batch is a separate request.
+    """
+
+    def __init__(self, nosql_conn):
+        self.nosql_conn = nosql_conn
+        self.round_trips = 0
+        self._methods = {}
+
+    def _counted(self, method):
+        def wrapper(*args, **kwargs):
+            self.round_trips += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        for name in ('get', 'query'):
+            self._methods[name] = getattr(self.nosql_conn, name)
+            setattr(self.nosql_conn, name, self._counted(self._methods[name]))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for name in self._methods:
+            delattr(self.nosql_conn, name)
+
+
+class ChatHistoryBenchmark:
+    """Compares the round trips and latency of the per-message feedback loader with get_chat_history."""
+
+    @classmethod
+    def legacy_get_chat_history(cls, chat_id, nosql_conn, issue_id=None):
+        """The loader before the rewrite: count, chat_id, messages and session queries plus one query per message."""
+        if issue_id:
+            tm.execute_select_query(nosql_conn, f"SELECT count(1) as count FROM ChatSessions WHERE issue_id = '{issue_id}'")
+            chat_id = tm.execute_select_query(
+                nosql_conn, f"SELECT chat_id FROM ChatSessions WHERE issue_id = '{issue_id}'")[0].get('chat_id')
+        else:
+            tm.execute_select_query(nosql_conn, f"SELECT count(1) as count FROM ChatSessions WHERE chat_id = '{chat_id}'")
+
+        prv_chats = tm.execute_select_query(
+            nosql_conn,
+            f"select message_id, user_message, response, message_time, response_time, nearest_neighbours, error_msg "
+            f"from ChatMessages WHERE chat_id = '{chat_id}' order by message_id"
+        )
+        if prv_chats:
+            tm.execute_select_query(
+                nosql_conn,
+                f"SELECT session_id, chat_id, user_name, start_time, end_time, meta_data FROM ChatSessions "
+                f"WHERE chat_id = '{chat_id}'"
+            )
+            for chat in prv_chats:
+                tm.execute_select_query(
+                    nosql_conn,
+                    f"SELECT feedback FROM ChatFeedback where chat_id = '{chat_id}' "
+                    f"and message_id = {int(chat.get('message_id'))}"
+                )
+        return len(prv_chats or [])
+
+    @classmethod
+    def _measure(cls, loader, nosql_conn, runs):
+        latencies = []
+        with RoundTripCounter(nosql_conn) as counter:
+            for _ in range(runs):
+                started = time.perf_counter()
+                loader()
+                latencies.append((time.perf_counter() - started) * 1000)
+        return {
+            "round_trips_per_call": counter.round_trips / runs,
+            "median_ms": round(statistics.median(latencies), 1),
+            "max_ms": round(max(latencies), 1)
+        }
+
+    @classmethod
+    def run(cls, chat_id, nosql_conn, logger, issue_id=None, runs=5):
+        """
+        Loads the same chat with both loaders.
+
+        Returns:
+        dict: Messages in the chat and, per loader, the round trips per call and the median and max latency.
+        """
+        chat_hist, _ = co.get_chat_history(chat_id, nosql_conn, logger, issue_id=issue_id)
+        return {
+            "messages": len(chat_hist.get('messages', [])),
+            "legacy": cls._measure(
+                lambda: cls.legacy_get_chat_history(chat_id, nosql_conn, issue_id=issue_id), nosql_conn, runs),
+            "get_chat_history": cls._measure(
+                lambda: co.get_chat_history(chat_id, nosql_conn, logger, issue_id=issue_id), nosql_conn, runs)
+        }
+
+
+if __name__ == '__main__':
+    import sys
+    from src.app.utils.loggerConfig import LoggerManager as lg
+    from src.app.services.nosqlConnection import NoSQLConnectionManager as ncm
+
+    with open('configuration/db_config.json', 'r') as db_details:
+        nosql_db_details = json.load(db_details).get('WAI_NoSQL')
+
+    l_nosql_conn = ncm.get_nosql_conn(nosql_db_details=nosql_db_details, private_key_file='../certs/oci_private.pem')
+    l_logger = lg.configure_logger('logs/benchmarkChatHistory')
+    try:
+        print(json.dumps(ChatHistoryBenchmark.run(sys.argv[1], l_nosql_conn, l_logger), indent=2))
+    finally:
+        ncm.close_nosql_conn(l_nosql_conn)
+        lg.shutdown_logger(l_logger)
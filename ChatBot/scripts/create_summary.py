@@ -95,11 +95,11 @@ class CreateSummary:
         print(f"chat_summary_query: {chat_summary_query}")
 
         try:
-            data = tm.execute_select_query(nosql_conn, chat_summary_query)
             now = datetime.now(timezone.utc)
             time_threshold = now - timedelta(hours=3)
             chat_summary_details = []
-            for row in data:
+            # Only the recently accessed summaries are kept, the table is read a batch at a time.
+            for row in tm.iter_query(nosql_conn, chat_summary_query):
                 last_accessed = row.get('last_accessed_time')
                 if last_accessed is not None:
                     if last_accessed.tzinfo is None:
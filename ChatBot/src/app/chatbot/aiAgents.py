@@ -2,11 +2,22 @@ import json
 from collections import defaultdict
 from datetime import datetime, timezone
 import concurrent.futures
+import asyncio
+import time
+import threading
+import oracledb
 
 from src.app.services.vertixAIActivities import VertexAIService as vai
 from src.app.utils.dataValidation import Utils as ut
 from src.app.services.embeddingActivites import EmbeddingManager as em
 from src.app.services.nosqlConnection import NoSQLTableManager as tm
+from src.app.utils.contextPacker import ContextPacker as cp
+from src.app.services.vectorIndex import VectorIndex as vix
+from src.app.metadata.oracleVectorIndexes import OracleVectorIndexManager as ovi
+from src.app.services.contentCache import ContentCache as cc
+from src.app.metadata.promptConfigRegistry import PromptConfigRegistry as pcr
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+from src.app.services.executionPools import ExecutionPools as ep
 
 
 class SalesAgent:
@@ -22,98 +33,98 @@ class SalesAgent:
             pass
 
         @classmethod
-        def _query_vectors(cls, product, query_embedding, num_neighbours, db_cursor, logger):
-            """
-            Queries the database to find the nearest content IDs
-            based on vector similarity to the query_embedding.
-            """
-            vectors_query = f"""
-            select distinct content_id
-              from (
-               select sc.content_id,
-                      sce.embedding
-                 from sales_content_embedding_new sce,
-                      sales_content sc
-                where sce.content_id = sc.content_id
-                  and (sc.product = :product or sc.product = 'General')
-                order by vector_distance(
-                  sce.embedding,
-                  :query_embedding
-               ) asc
-                fetch first
-                  {num_neighbours}
-               rows only
-            )"""
-            try:
-                # query_embedding = str(query_embedding)
-                logger.info(f"vector search query: {vectors_query} with product {product}")
-                db_cursor.execute(
-                    vectors_query,
-                    {
-                        'product': product,
-                        'query_embedding': str(query_embedding)
-                    }
-                )
-                vectors_data = db_cursor.fetchall()
-                # vectors_data = vectors_data[0][0]
-                # content_ids = str(vectors_data).split(',')
-                content_ids = [v_id[0] for v_id in vectors_data]
-            except Exception as e:
-                logger.error(f'Error fetching Content IDs from Database: {e}')
-                logger.error(
-                    f'vectors_query: {vectors_query}\nquery_embedding: {query_embedding}\n embedding_type: {type(query_embedding)}\n product: {product}')
-                content_ids = []
-            return content_ids
+        def _clob_as_string(cls, cursor, metadata):
+            """Output type handler that fetches CLOB columns as str with the row, avoiding a LOB read per row."""
+            if metadata.type_code is oracledb.DB_TYPE_CLOB:
+                return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
 
         @classmethod
-        def _get_content(cls, product, content_ids, db_cursor, logger):
+        def _retrieve_contents_many(cls, queries, num_neighbours, db_cursor, logger):
             """
-            Retrieves content text for the specified content IDs
-            from the database table 'sales_content'.
-            """
-            logger.info('Get Content Function Called')
-            if not content_ids:
-                return []
-
-            final_texts = ''
-            content_query = ("SELECT content FROM sales_content WHERE content_id IN (" +
-                             ",".join(map(str, content_ids)) + ") and product like '" + product + "'")
-            try:
-                db_cursor.execute(content_query)
-                sales_content = db_cursor.fetchall()
-                logger.info("Contents fetched from the DB.")
-            except Exception as e:
-                logger.error(f'Error fetching Content from Database: {e}')
-                logger.error(f'content query: {content_query}')
-                sales_content = []
+            Finds the nearest sales contents of several queries and fetches their text in one statement.
 
-            # final_texts = '\n'.join(
-            #     (
-            #         str(content[0].read()) if hasattr(content[0], 'read') else str(content[0]))
-            #     for content in sales_content
-            # )
+            Each query gets a UNION ALL branch with a vector search over the product's and the 'General' contents,
+            keeping the contents of the product. A content found by several queries is sent once: only its first row
+            carries the text. Only bind variables change between calls with the same number of
+            queries, so the statement is parsed once and its cursor is shared.
 
-            def process_content(content):
-                return content[0].read() if hasattr(content[0], 'read') else str(content[0])
+            Parameters:
+            queries (list): (product, query_embedding) pairs.
 
+            Returns:
+            list: One list of (content_id, content text, cosine distance) tuples per query, nearest first.
+            """
+            contents = [[] for _ in queries]
+            searched = [(query_no, query) for query_no, query in enumerate(queries) if query[1]]
+            if not searched:
+                return contents
+
+            branches = []
+            bind_values = {}
+            for query_no, (product, query_embedding) in searched:
+                branches.append(f"""
+              select {query_no} query_no,
+                     nn.content_id,
+                     nn.distance
+                from (
+                 select content_id,
+                        min(distance) distance
+                   from (
+                    select sce.content_id,
+                           vector_distance(sce.embedding, :query_embedding_{query_no}) distance
+                      from sales_content_embedding_new sce,
+                           sales_content sc
+                     where sce.content_id = sc.content_id
+                       and (sc.product = :product_{query_no} or sc.product = 'General')
+                     order by distance asc
+                     {ovi.fetch_clause(num_neighbours)}
+                   )
+                  group by content_id
+                ) nn,
+                     sales_content sc
+               where sc.content_id = nn.content_id
+                 and sc.product like :product_{query_no}""")
+                bind_values[f'product_{query_no}'] = product
+                bind_values[f'query_embedding_{query_no}'] = em.to_vector(query_embedding)
+
+            nearest_query = "\n              union all".join(branches)
+            contents_query = f"""
+            with nearest as ({nearest_query}
+            )
+            select n.query_no,
+                   n.content_id,
+                   n.distance,
+                   case
+                     when row_number() over (partition by n.content_id order by n.query_no) = 1 then sc.content
+                   end content
+              from nearest n,
+                   sales_content sc
+             where sc.content_id = n.content_id
+             order by n.query_no, n.distance asc"""
+            previous_handler = db_cursor.outputtypehandler
             try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=25) as executor:
-                    final_texts = '\n'.join(executor.map(process_content, sales_content))
-                    logger.info("Content convertion to readable is completed.")
+                db_cursor.outputtypehandler = cls._clob_as_string
+                db_cursor.execute(contents_query, bind_values)
+                rows = db_cursor.fetchall()
+                texts = {content_id: content for _, content_id, _, content in rows if content is not None}
+                for query_no, content_id, distance, _ in rows:
+                    contents[query_no].append((content_id, str(texts.get(content_id, '')), distance))
+                logger.info(f"{len(texts)} distinct contents retrieved for {len(searched)} queries.")
             except Exception as e:
-                logger.error(f"Failed to convert DB data into readable. Error details: {e}")
-
-            return final_texts
+                logger.error(f'Error retrieving contents from Database: {e}')
+                logger.error(f'contents query: {contents_query}\n queries: {[product for product, _ in queries]}')
+            finally:
+                db_cursor.outputtypehandler = previous_handler
+            return contents
 
     class Agents(ContentRetriever):
         """"""
 
         @classmethod
-        def agent1(cls, user_question, logger, model_name='gemini-2.0-flash-001',
-                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
-                   previous_conversation=''):
-            logger.info(f"Agent1 started with user question: {user_question}")
-
+        def _agent1_request(cls, user_question, model_name='gemini-2.0-flash-001',
+                            google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                            previous_conversation=''):
+            """Builds the agent1 prompt and model settings shared by agent1 and agent1_async."""
             ag1_sys_instructions = """
   Objective: To effectively understand and answer complex user queries, especially those related to Winfo Solutions, WinfoBots, WinfoTest, WinfoData, WinfoCloudX, Winfo Oracle Practice, and Winfo Organisation, by identifying the sequence of elaborate and clear questions that need to be answered to achieve the user's intended outcome. WinfoBots automates Oracle EBS and Fusion processes. WinfoTest automates Oracle Fusion testing. Output in JSON format.\n\nInstructions for Gemini:\n\n1. Receive User Query and Previous Conversations:\n    * Get the user's complete question (`main_question`).\n    * If available, receive the last 3 conversations between the user and the agent in the `previous_conversation` field. This field will be empty or null for fresh chats.\n\n2. Contextual Understanding and Intent Analysis:\n    * If `previous_conversation` is present, analyze it to understand the ongoing conversation and the user's evolving needs.\n    * Use the context from the previous conversations to better understand the `main_question`.\n    * **Crucially, understand the user's underlying intent: what do they want to achieve?** Focus on the desired outcome, not just the literal question.\n\n3. Identify Elaborate and Clear Questions to Achieve User's Intent:\n    * Determine the *sequence of questions* that need to be answered to fully address the user's query and, more importantly, to help them achieve their intended outcome. These questions should be specific and logically lead to the desired result.\n    * Consider the context from `previous_conversation` to avoid redundant questions and to build upon existing information.\n    * **Create questions that guide the user towards their goal, ensuring each question is self-contained and fully understandable.** Avoid ambiguity and assumptions. Each question will be processed individually by the next agent.\n    * **Make each question elaborate and clear, providing sufficient context for the next agent to understand what information is being sought.**\n    * List these questions clearly and concisely. *Focus on the questions needed to answer the user's query and achieve their intent.*\n\n4. Structured JSON Output: Present your analysis in JSON format. The JSON object should have these fields:\n\n    * `user_query` (string, required): The original user query.\n    * `previous_conversation` (array, optional): The last 3 conversations between the user and the agent. Will be empty or null for fresh chats. Each conversation should be an object with `user` and `agent` fields.\n    * `questions_to_answer` (array, required): A list of the elaborate and clear questions that need to be answered to achieve the solution and the user's intent.\n\n5. Optional: Providing the Solution: If possible, answer the `questions_to_answer` and provide the final solution. Cite your information sources. For questions requiring more information, ask the user for clarification. **Remember, the primary goal is to create elaborate and clear questions that guide the user towards their desired outcome, not to provide instructions on how to use external tools.**
   """
@@ -145,15 +156,17 @@ previous_conversation - {previous_conversation}
 main_question - "{user_question}"
             '''
 
-            ag1_res = vai.get_prompt_response(
-                ag1_prompt,
-                logger,
-                model_name=model_name,
-                location='us-central1',
-                google_key_config_path=google_key_config_path,
-                system_instruction=ag1_sys_instructions,
-                response_schema=ag1_resp_schema
-            )
+            return {
+                "prompt": ag1_prompt,
+                "model_name": model_name,
+                "location": 'us-central1',
+                "google_key_config_path": google_key_config_path,
+                "system_instruction": ag1_sys_instructions,
+                "response_schema": ag1_resp_schema
+            }
+
+        @classmethod
+        def _agent1_parse(cls, ag1_res, user_question, logger):
             logger.info(f"Agent1 processed user question: {user_question}")
             logger.info(f"Agent1 response: {ag1_res}")
 
@@ -168,10 +181,38 @@ main_question - "{user_question}"
             return ag1_res
 
         @classmethod
-        def agent2(cls, user_question, questions_list, logger, model_name='gemini-2.0-flash-001',
-                   google_key_config_path='../configuration/Google_Key(WinfoBots).json', previous_conversation=''):
-            logger.info(f"Sales chart bot stated with agent2. user question: {questions_list}")
+        def agent1(cls, user_question, logger, model_name='gemini-2.0-flash-001',
+                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                   previous_conversation=''):
+            logger.info(f"Agent1 started with user question: {user_question}")
+
+            ag1_request = cls._agent1_request(
+                user_question, model_name=model_name, google_key_config_path=google_key_config_path,
+                previous_conversation=previous_conversation
+            )
+            ag1_res = vai.get_prompt_response(logger=logger, **ag1_request)
 
+            return cls._agent1_parse(ag1_res, user_question, logger)
+
+        @classmethod
+        async def agent1_async(cls, user_question, logger, model_name='gemini-2.0-flash-001',
+                               google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                               previous_conversation=''):
+            logger.info(f"Agent1 async started with user question: {user_question}")
+
+            ag1_request = cls._agent1_request(
+                user_question, model_name=model_name, google_key_config_path=google_key_config_path,
+                previous_conversation=previous_conversation
+            )
+            ag1_res = await vai.get_prompt_response_async(logger=logger, **ag1_request)
+
+            return cls._agent1_parse(ag1_res, user_question, logger)
+
+        @classmethod
+        def _agent2_request(cls, user_question, each_question, model_name='gemini-2.0-flash-001',
+                            google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                            previous_conversation=''):
+            """Builds the agent2 prompt for one agent1 sub-question, shared by agent2 and agent2_async."""
             ag2_sys_instruction = """
   Objective: To refine and generate further sub-questions based on a given sub-question, classifying them for information retrieval with a focus on accurate categorization. Minimize 'more-info' questions by making valid assumptions based on the main user query and previous conversation history. Output in JSON format.\n\nInstructions for Gemini (Secondary Agent):\n\n1. Receive Input:\n    * `main_question` (string): The original user query.\n    * `sub_question` (string): The sub-question from the primary agent.\n    * `previous_conversation` (array, optional): The last 3 conversations between the user and the agent. Will be empty or null for fresh chats. Each conversation should be an object with `user` and `agent` fields.\n\n2. Contextual Understanding:\n    * If `previous_conversation` is present, analyze it to understand the ongoing conversation and the user's evolving needs.\n    * Use the context from the previous conversations to better understand the `main_question` and `sub_question`.\n\n3. Further Deconstruction: If the `sub_question` can be further divided, do so. Create detailed, granular questions that can be directly answered.\n\n4. Information Categorization (Critical Distinction):\n    * Classify each generated sub-question as: generic, specific, generic-realtime, or more-info.\n    * **'Specific' Classification:**\n        * **Only classify a sub-question as 'specific' if it pertains directly to a product or service offered by Winfo Solutions.**\n        * Winfo Solutions' internal resources contain information about its products and services exclusively. Therefore, 'specific' questions are those that can be answered using internal documentation.\n    * **'Generic-Realtime' Classification:**\n        * **Classify sub-questions that require information from the external world (e.g., market trends, industry news, general knowledge, customer strategies, investment information) as 'generic-realtime'.**\n        * These questions will be answered by the next agent using external search engines and internet research.\n        * If the sub_question is related to strategy or investment, always classify it as 'generic-realtime'.\n    * **'Generic' Classification:** General knowledge questions that do not require up-to-date web information.\n    * **'More-Info' Classification:** Questions requiring user clarification.\n    * If 'specific', identify the related Winfo product/service (WinfoBots, WinfoTest, WinfoData, WinfoCloudX, Winfo Oracle Practice, Winfo Organisation).\n    * If 'generic-realtime', ensure the question targets up-to-date web information.\n\n5. Assumption-Based Minimization of 'more-info':\n    * Analyze the `main_question` and `previous_conversation` to make reasonable assumptions that could help answer the `sub_question` without requiring further user input.\n    * Document these assumptions in the `assumptions` field.\n\n6. Structured JSON Output: Present your analysis in JSON format. Each generated sub-question should have these fields:\n    * `original_sub_question` (string, required): The original sub-question received.\n    * `sub_question` (string, required): The sub-question itself.\n    * `information_type` (string, optional): The type of information needed (see above). Omit if `question_type` is `more-info`.\n    * `question_type` (string, required): The question type (see above).\n    * `specific_details` (string, optional): If `question_type` is `specific`, specify the Winfo specific details.\n    * `assumptions` (array of strings, optional): List any assumptions made while generating the sub-question.\n\n7. Focus on Question Generation: Your primary task is to generate and classify sub-questions, not to provide answers. Minimize 'more-info' questions through valid assumptions, taking into account previous conversations. **Prioritize accurate classification, especially between 'specific' and 'generic-realtime', as this will significantly impact the quality of the final response.**
   """
@@ -244,57 +285,83 @@ main_question - "{user_question}"
                 ]
             }
 
-            final_res = []
-
-            for each_question in questions_list:
-                ag2_prompt = f'''
+            ag2_prompt = f'''
 main_question - "{user_question}"
 sub_question - "{each_question}"
 
 previous_conversation - {previous_conversation}
                 '''
-                ag2_res = vai.get_prompt_response(
-                    ag2_prompt,
-                    logger,
-                    model_name=model_name,
-                    location='us-central1',
-                    google_key_config_path=google_key_config_path,
-                    system_instruction=ag2_sys_instruction,
-                    response_schema=ag2_resp_schema
+
+            return {
+                "prompt": ag2_prompt,
+                "model_name": model_name,
+                "location": 'us-central1',
+                "google_key_config_path": google_key_config_path,
+                "system_instruction": ag2_sys_instruction,
+                "response_schema": ag2_resp_schema
+            }
+
+        @classmethod
+        def _agent2_parse(cls, ag2_res, each_question, logger):
+            logger.info(f"Agent2 processed for agent1's sub-question: {each_question}")
+            logger.info(f"Agent2 response: {ag2_res}")
+
+            try:
+                start_index = ag2_res.find('{')
+                end_index = ag2_res.rfind('}')
+                ag2_res = ag2_res[start_index:end_index + 1]
+            except Exception as e:
+                logger.error(f"Error occurred while parsing agent2 response: {e}")
+                ag2_res = f'''{{"deconstructed_query": [], "user_query": "{each_question}"}}'''
+
+            ag2_res = json.loads(ag2_res)
+            # ag2_res['user_query'] = each_question
+            return ag2_res
+
+        @classmethod
+        def agent2(cls, user_question, questions_list, logger, model_name='gemini-2.0-flash-001',
+                   google_key_config_path='../configuration/Google_Key(WinfoBots).json', previous_conversation=''):
+            logger.info(f"Sales chart bot stated with agent2. user question: {questions_list}")
+
+            final_res = []
+
+            for each_question in questions_list:
+                ag2_request = cls._agent2_request(
+                    user_question, each_question, model_name=model_name,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
                 )
+                ag2_res = vai.get_prompt_response(logger=logger, **ag2_request)
+                final_res.append(cls._agent2_parse(ag2_res, each_question, logger))
+
+            return final_res
 
-                logger.info(f"Agent2 processed for agent1's sub-question: {each_question}")
-                logger.info(f"Agent2 response: {ag2_res}")
+        @classmethod
+        async def agent2_async(cls, user_question, questions_list, logger, model_name='gemini-2.0-flash-001',
+                               google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                               previous_conversation=''):
+            logger.info(f"Sales chart bot stated with agent2 async. user question: {questions_list}")
 
-                try:
-                    start_index = ag2_res.find('{')
-                    end_index = ag2_res.rfind('}')
-                    ag2_res = ag2_res[start_index:end_index + 1]
-                except Exception as e:
-                    logger.error(f"Error occurred while parsing agent2 response: {e}")
-                    ag2_res = f'''{{"deconstructed_query": [], "user_query": "{each_question}"}}'''
+            final_res = []
 
-                ag2_res = json.loads(ag2_res)
-                # ag2_res['user_query'] = each_question
-                final_res.append(ag2_res)
+            for each_question in questions_list:
+                ag2_request = cls._agent2_request(
+                    user_question, each_question, model_name=model_name,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+                )
+                ag2_res = await vai.get_prompt_response_async(logger=logger, **ag2_request)
+                final_res.append(cls._agent2_parse(ag2_res, each_question, logger))
 
             return final_res
 
         @classmethod
-        def agent3(cls, query, reference_data, logger, model_name='gemini-2.0-flash-001',
-                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
-                   response_schema=None, previous_conversation=''
-                   ):
+        def _agent3_request(cls, query, reference_data, model_name='gemini-2.0-flash-001',
+                            google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                            response_schema=None, previous_conversation=''):
             """
-            Generates a chatbot prompt to get a response from the model.
-
             Constructs a detailed prompt outlining the required behavior of the chatbot
-            and passes it along with the reference data for model processing.
+            along with the reference data, shared by agent3 and agent3_async.
             """
-            try:
-                logger.info('Agent3 sales Chat Bot Prompt Function called')
-
-                system_instruction = """
+            system_instruction = """
 Objective: To synthesize a concise and continuous answer to the user's main question using the provided context and previous conversation history, building upon previous responses if necessary, and formatting the response in Markdown. Limit to a maximum of two iterations.\n\nInstructions for Gemini (Answer Synthesis Agent):\n\n1. Receive Input:\n  * `main_question` (string): The original question asked by the user.\n  * `context` (array of objects): The collection of sub-questions and their answers generated by previous agents. Each object should contain `sub_question`, `answer`, and relevant metadata.\n  * `previous_answer_generated` (string, optional): The partially constructed answer from the previous iteration. If this is the first iteration, this field will be absent or empty.\n  * `previous_conversation` (array, optional): The last 3 conversations between the user and the agent. Will be empty or null for fresh chats. Each conversation should be an object with `user` and `agent` fields.\n\n2. Contextual Understanding:\n  * If `previous_conversation` is present, analyze it to understand the ongoing conversation and the user's evolving needs.\n  * Use the context from the previous conversations to better understand the `main_question` and the provided `context`.\n\n3. Answer Synthesis and Continuation:\n  * Analyze the `main_question`, `context`, and `previous_conversation` to understand the user's intent and the relevant information.\n  * If `previous_answer_generated` is present, ensure the new response is a logical continuation of the previous one, not a repetition or disconnected information.\n  * Only proceed to a second iteration if the user has explicitly requested a detailed answer, if the question inherently requires extensive information, or if the initial response is demonstrably incomplete.\n\n4. Iterative Response (Maximum Two Iterations):\n  * First Iteration: Generate an initial response based on the `context`.\n  * Second Iteration: If a second iteration is needed, receive the `previous_answer_generated` and continue building the response. The second response must be a continuation of the previous one.\n  * After the second iteration, the response must be complete.\n\n5. Markdown Output:\n  * Output the generated answer to the `main_question`, **formatted in Markdown**. Use appropriate Markdown syntax for headings, lists, bold/italic text, code blocks, etc., to enhance readability.\n\n6. Contextual Accuracy:\n  * Ensure the answer accurately reflects the information provided in the `context` and is relevant to the `main_question`, considering the `previous_conversation`.\n\n7. Focus on Continuity: The second response must be a logical continuation of the first, providing additional relevant information, not a repetition or a disjointed answer.\n\n8. Markdown Formatting: The output **must** be formatted using Markdown syntax for clear and easy information absorption by the user.
 
 Expected Output:A string representing the generated response, adhering to the above guidelines. Please provide only the relevant answer in a structured manner with proper headings if needed and do not specify the source of content.
@@ -316,7 +383,7 @@ Semantic Similarity: Apply semantic analysis to find closely related content whe
 Error Management: Implement robust error handling strategies to address data gaps or ambiguous queries effectively.
                 """
 
-                prompt = f"""
+            prompt = f"""
 previous_conversation - {previous_conversation}
 
 main_question - '{query}'
@@ -325,25 +392,76 @@ Reference Data:
 {reference_data}
 '''
                         """
-                # print(f"prompt: {prompt}")
-                return vai.get_prompt_response(
-                    prompt,
-                    logger,
-                    google_key_config_path=google_key_config_path,
-                    response_schema=response_schema,
-                    model_name=model_name,
-                    system_instruction=system_instruction
+            # print(f"prompt: {prompt}")
+            return {
+                "prompt": prompt,
+                "google_key_config_path": google_key_config_path,
+                "response_schema": response_schema,
+                "model_name": model_name,
+                "system_instruction": system_instruction
+            }
+
+        @classmethod
+        def agent3(cls, query, reference_data, logger, model_name='gemini-2.0-flash-001',
+                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                   response_schema=None, previous_conversation=''
+                   ):
+            """
+            Generates a chatbot prompt to get a response from the model.
+
+            Constructs a detailed prompt outlining the required behavior of the chatbot
+            and passes it along with the reference data for model processing.
+            """
+            try:
+                logger.info('Agent3 sales Chat Bot Prompt Function called')
+                ag3_request = cls._agent3_request(
+                    query, reference_data, model_name=model_name, google_key_config_path=google_key_config_path,
+                    response_schema=response_schema, previous_conversation=previous_conversation
                 )
+                return vai.get_prompt_response(logger=logger, **ag3_request)
             except Exception as e:
                 logger.error(f'Error fetching response from prompt: {e}')
                 return ''
 
         @classmethod
-        def agent4(cls, user_question, all_contents, previous_answer_generated, logger,
-                   model_name='gemini-2.0-flash-001',
-                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
-                   previous_conversation=''):
-            logger.info(f"Agent4 called for summarizing all the responses from agent3...")
+        async def agent3_async(cls, query, reference_data, logger, model_name='gemini-2.0-flash-001',
+                               google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                               response_schema=None, previous_conversation=''
+                               ):
+            """Awaitable twin of agent3."""
+            try:
+                logger.info('Agent3 sales Chat Bot async Prompt Function called')
+                ag3_request = cls._agent3_request(
+                    query, reference_data, model_name=model_name, google_key_config_path=google_key_config_path,
+                    response_schema=response_schema, previous_conversation=previous_conversation
+                )
+                return await vai.get_prompt_response_async(logger=logger, **ag3_request)
+            except Exception as e:
+                logger.error(f'Error fetching response from prompt: {e}')
+                return ''
+
+        @classmethod
+        async def agent3_stream(cls, query, reference_data, logger, model_name='gemini-2.0-flash-001',
+                                google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                previous_conversation=''):
+            """Streaming twin of agent3; yields the markdown answer chunk by chunk."""
+            logger.info('Agent3 sales Chat Bot streaming Prompt Function called')
+            ag3_request = cls._agent3_request(
+                query, reference_data, model_name=model_name, google_key_config_path=google_key_config_path,
+                previous_conversation=previous_conversation
+            )
+            async for chunk in vai.stream_prompt_response_async(logger=logger, **ag3_request):
+                yield chunk
+
+        @classmethod
+        def _agent4_request(cls, user_question, all_contents, previous_answer_generated, logger,
+                            model_name='gemini-2.0-flash-001',
+                            google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                            previous_conversation=''):
+            """Builds the agent4 prompt and model settings shared by agent4 and agent4_async."""
+            if isinstance(all_contents, list):
+                all_contents, _ = cp.pack_items(all_contents, cp.get_budget('SalesAgent4'), logger,
+                                                agent_name='SalesAgent4')
 
             ag4_sys_instruction = """
   Objective: To synthesize a comprehensive and continuous answer to the user's main question using the provided context and previous conversation history, building upon previous responses if necessary, explicitly listing assumptions at the end, and formatting the response in Markdown. Limit to a maximum of two iterations. Output in JSON format.\n\nInstructions for Gemini (Answer Synthesis Agent):\n\n1. Receive Input:\n    * `main_question` (string): The original question asked by the user.\n    * `context` (array of objects): The collection of sub-questions and their answers generated by previous agents. Each object should contain `sub_question`, `answer`, and relevant metadata.\n    * `previous_answer_generated` (string, optional): The partially constructed answer from the previous iteration. If this is the first iteration, this field will be absent or empty.\n    * `previous_conversation` (array, optional): The last 3 conversations between the user and the agent. Will be empty or null for fresh chats. Each conversation should be an object with `user` and `agent` fields.\n\n2. Contextual Understanding:\n    * If `previous_conversation` is present, analyze it to understand the ongoing conversation and the user's evolving needs.\n    * Use the context from the previous conversations to better understand the `main_question` and the provided `context`.\n\n3. Answer Synthesis and Continuation:\n    * Analyze the `main_question`, `context`, and `previous_conversation` to understand the user's intent and the relevant information.\n    * If `previous_answer_generated` is present, ensure the new response is a logical continuation of the previous one, not a repetition or disconnected information.\n    * Only proceed to a second iteration if the user has explicitly requested a detailed answer, if the question inherently requires extensive information, or if the initial response is demonstrably incomplete.\n\n4. Iterative Response (Maximum Two Iterations):\n    * First Iteration: Generate an initial response based on the `context`. If the response is complete, set `finished_response` to \"yes\". If more information or refinement is needed, set `finished_response` to \"no\".\n    * Second Iteration: If `finished_response` was \"no\" in the first iteration, receive the `previous_answer_generated` and continue building the response. Set `finished_response` to \"yes\" to indicate the final answer. The second response must be a continuation of the previous one.\n    * After the second iteration, the response must be complete and `finished_response` must be \"yes\".\n\n5. Structured JSON Output:\n    * `response` (string): The generated answer to the `main_question`, **formatted in Markdown**. Use appropriate Markdown syntax for headings, lists, bold/italic text, code blocks, etc., to enhance readability.\n    * `finished_response` (string): Either \"yes\" (answer is complete) or \"no\" (more information needed, only applicable on first iteration).\n    * `assumptions` (array of strings, optional): List any assumptions made during the answer synthesis process. This should be placed at the end of the `response` string.\n\n6. Contextual Accuracy and Assumption Awareness:\n    * Ensure the answer accurately reflects the information provided in the `context` and is relevant to the `main_question`, considering the `previous_conversation`.\n    * Explicitly list all assumptions made during the answer synthesis process at the end of the response, so the user is aware of the context used for the answer.\n\n7. Focus on Continuity: The second response must be a logical continuation of the first, providing additional relevant information, not a repetition or a disjointed answer.\n\n8. Markdown Formatting: The `response` field **must** be formatted using Markdown syntax for clear and easy information absorption by the user.
@@ -387,16 +505,17 @@ previous_answer_generated - {previous_answer_generated}
 previous_conversation - {previous_conversation}
             '''
 
-            ag4_res = vai.get_prompt_response(
-                ag4_prompt,
-                logger,
-                model_name=model_name,
-                location='us-central1',
-                google_key_config_path=google_key_config_path,
-                system_instruction=ag4_sys_instruction,
-                response_schema=ag4_resp_schema
-            )
+            return {
+                "prompt": ag4_prompt,
+                "model_name": model_name,
+                "location": 'us-central1',
+                "google_key_config_path": google_key_config_path,
+                "system_instruction": ag4_sys_instruction,
+                "response_schema": ag4_resp_schema
+            }
 
+        @classmethod
+        def _agent4_parse(cls, ag4_res, logger):
             logger.info(f"Agent4 response: {ag4_res}")
 
             try:
@@ -415,6 +534,36 @@ previous_conversation - {previous_conversation}
 
             return ag4_res
 
+        @classmethod
+        def agent4(cls, user_question, all_contents, previous_answer_generated, logger,
+                   model_name='gemini-2.0-flash-001',
+                   google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                   previous_conversation=''):
+            logger.info(f"Agent4 called for summarizing all the responses from agent3...")
+
+            ag4_request = cls._agent4_request(
+                user_question, all_contents, previous_answer_generated, logger, model_name=model_name,
+                google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+            )
+            ag4_res = vai.get_prompt_response(logger=logger, **ag4_request)
+
+            return cls._agent4_parse(ag4_res, logger)
+
+        @classmethod
+        async def agent4_async(cls, user_question, all_contents, previous_answer_generated, logger,
+                               model_name='gemini-2.0-flash-001',
+                               google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                               previous_conversation=''):
+            logger.info(f"Agent4 async called for summarizing all the responses from agent3...")
+
+            ag4_request = cls._agent4_request(
+                user_question, all_contents, previous_answer_generated, logger, model_name=model_name,
+                google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+            )
+            ag4_res = await vai.get_prompt_response_async(logger=logger, **ag4_request)
+
+            return cls._agent4_parse(ag4_res, logger)
+
         @classmethod
         def basic_agent(cls, user_question, db_cursor, logger,
                         model_name='gemini-2.0-flash-001', specific_details='WinfoBots',
@@ -426,15 +575,10 @@ previous_conversation - {previous_conversation}
                 each_sub_question = ut.clean_string(user_question).lower()
                 # print(f"each_sub_question: {each_sub_question}")
 
-                each_question_embedding = em.get_embedding(
-                    each_sub_question, logger, google_key_config_path=google_key_config_path, location=location
+                l_contents = cls._basic_agent_contents(
+                    each_sub_question, db_cursor, logger, specific_details, google_key_config_path,
+                    nearest_neighbours, location
                 )
-                l_content_ids = cls._query_vectors(specific_details, each_question_embedding, nearest_neighbours,
-                                                   db_cursor,
-                                                   logger)
-                logger.info(
-                    f"contents used for specific question:\n specific details:{specific_details}\nquestion: {each_sub_question}\ncontents: {l_content_ids}")
-                l_contents = cls._get_content(specific_details, l_content_ids, db_cursor, logger)
                 prompt_res = cls.agent3(each_sub_question, l_contents, logger,
                                         google_key_config_path=google_key_config_path,
                                         response_schema=response_schema, model_name=model_name,
@@ -447,8 +591,140 @@ previous_conversation - {previous_conversation}
 
             return prompt_res
 
+        @classmethod
+        def _basic_agent_contents_many(cls, sub_questions, db_cursor, logger,
+                                       google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                       nearest_neighbours=30, location='us-central1'):
+            """
+            Embeds several questions in one batch, retrieves their nearest sales contents in one statement and
+            returns the readable text per question.
+
+            Parameters:
+            sub_questions (list): (specific_details, question) pairs.
+
+            Returns:
+            list: The packed contents text per question, in the order of sub_questions.
+            """
+            question_embeddings = em.get_embeddings(
+                [each_sub_question for _, each_sub_question in sub_questions], logger,
+                google_key_config_path=google_key_config_path, location=location
+            )
+            queries = [
+                (specific_details, embedding)
+                for (specific_details, _), embedding in zip(sub_questions, question_embeddings)
+            ]
+            questions_contents = cls._retrieve_contents_many(queries, nearest_neighbours, db_cursor, logger)
+
+            all_texts = []
+            for (specific_details, each_sub_question), l_contents in zip(sub_questions, questions_contents):
+                logger.info(
+                    f"contents used for specific question:\n specific details:{specific_details}\nquestion: {each_sub_question}\n"
+                    f"contents: {[(content_id, round(distance, 4)) for content_id, _, distance in l_contents]}")
+                l_texts, _ = cp.pack([text for _, text, _ in l_contents], cp.get_budget('SalesAgent3'), logger,
+                                     agent_name='SalesAgent3', separator='\n')
+                all_texts.append(l_texts)
+            return all_texts
+
+        @classmethod
+        def _basic_agent_contents(cls, each_sub_question, db_cursor, logger, specific_details='WinfoBots',
+                                  google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                  nearest_neighbours=30, location='us-central1'):
+            """Embeds the question and returns the nearest sales contents as readable text."""
+            return cls._basic_agent_contents_many(
+                [(specific_details, each_sub_question)], db_cursor, logger,
+                google_key_config_path=google_key_config_path, nearest_neighbours=nearest_neighbours,
+                location=location
+            )[0]
+
+        @classmethod
+        async def basic_agent_async(cls, user_question, db_cursor, logger,
+                                    model_name='gemini-2.0-flash-001', specific_details='WinfoBots',
+                                    google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                    response_schema=None, previous_conversation='', nearest_neighbours=30,
+                                    location='us-central1'):
+            """
+            Awaitable twin of basic_agent. Embedding and vector/content lookups run on the db pool and the
+            final agent3 call is awaited.
+            """
+            logger.info("Basic Agent async called for getting the basic info of embedding...")
+            try:
+                each_sub_question = ut.clean_string(user_question).lower()
+                l_contents = await ep.run_db(
+                    cls._basic_agent_contents, each_sub_question, db_cursor, logger, specific_details,
+                    google_key_config_path, nearest_neighbours, location
+                )
+                prompt_res = await cls.agent3_async(each_sub_question, l_contents, logger,
+                                                    google_key_config_path=google_key_config_path,
+                                                    response_schema=response_schema, model_name=model_name,
+                                                    previous_conversation=previous_conversation)
+            except Exception as e:
+                logger.error(f"Error occurred while processing basic agent: {e}")
+                prompt_res = ''
+
+            logger.info(f"Response: {prompt_res}")
+
+            return prompt_res
+
+        @classmethod
+        async def basic_agent_stream(cls, user_question, db_cursor, logger,
+                                     model_name='gemini-2.0-flash-001', specific_details='WinfoBots',
+                                     google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                     previous_conversation='', nearest_neighbours=30, location='us-central1'):
+            """Streaming twin of basic_agent; retrieval runs on the db pool, then agent3 tokens are yielded."""
+            logger.info("Basic Agent streaming called for getting the basic info of embedding...")
+            each_sub_question = ut.clean_string(user_question).lower()
+            l_contents = await ep.run_db(
+                cls._basic_agent_contents, each_sub_question, db_cursor, logger, specific_details,
+                google_key_config_path, nearest_neighbours, location
+            )
+            async for chunk in cls.agent3_stream(each_sub_question, l_contents, logger, model_name=model_name,
+                                                 google_key_config_path=google_key_config_path,
+                                                 previous_conversation=previous_conversation):
+                yield chunk
+
     class GetContents(Agents):
         """"""
+        # Model calls a turn may have in flight at once, shared by its specific and generic questions.
+        max_concurrent_llm_calls = 8
+
+        @classmethod
+        def _call_limited(cls, llm_limiter, func, *args, **kwargs):
+            with llm_limiter:
+                return func(*args, **kwargs)
+
+        @classmethod
+        async def _call_limited_async(cls, llm_limiter, func, *args, **kwargs):
+            async with llm_limiter:
+                return await func(*args, **kwargs)
+
+        @classmethod
+        def _flatten_specific_questions(cls, specific_questions):
+            """
+            Flattens the sub-questions of all specific question sets so they can be retrieved together.
+
+            Returns:
+            tuple: ([(ag1_question, indexes of its sub-questions)], [(specific_details, cleaned sub-question)]).
+            """
+            question_sets = []
+            sub_questions = []
+            for each_set in specific_questions:
+                if len(each_set['sub_questions']) == 0:
+                    continue
+                question_indexes = []
+                for each_sub_question in each_set['sub_questions']:
+                    question_indexes.append(len(sub_questions))
+                    sub_questions.append(
+                        (each_set['specific_details'], ut.clean_string(each_sub_question).lower())
+                    )
+                question_sets.append((each_set['ag1_question'], question_indexes))
+            return question_sets, sub_questions
+
+        @classmethod
+        def _join_specific_answers(cls, question_sets, answers):
+            return [
+                {"ag1_question": ag1_question, "response": "".join(f"\n\n{answers[index]}" for index in question_indexes)}
+                for ag1_question, question_indexes in question_sets
+            ]
 
         @classmethod
         def get_specific_questions_contents(
@@ -459,38 +735,47 @@ previous_conversation - {previous_conversation}
                 nearest_neighbours=60,
                 google_key_config_path='../configuration/Google_Key(WinfoBots).json',
                 response_schema=None,
-                model_name='gemini-2.0-flash-001'
+                model_name='gemini-2.0-flash-001',
+                llm_limiter=None
         ):
-            """"""
+            """
+            Answers the specific questions from the sales contents. The contents of all sub-questions are retrieved
+            in one batch, then the sub-questions are answered in parallel.
+
+            Parameters:
+            llm_limiter (BoundedSemaphore): Limit on concurrent agent3 calls, shared with other work of the turn.
+                A limiter of max_concurrent_llm_calls is used when it is not given.
+            """
             logger.info(
                 f"Sales chart bot stated with get_specific_questions_contents. user question: {specific_questions}")
 
-            # final_content_ids = {}
             final_specific_ques_res = []
             try:
-                for each_set in specific_questions:
-                    specific_details = each_set['specific_details']
-                    ag1_question = each_set['ag1_question']
-                    sub_questions = each_set['sub_questions']
-                    if len(sub_questions) == 0:
-                        continue
-
-                    sub_questions_resp = {"ag1_question": ag1_question, "response": ""}
-                    for each_sub_question in sub_questions:
-                        # print(f"specific_question: {specific_question}")
-                        each_sub_question = ut.clean_string(each_sub_question).lower()
-                        # print(f"each_sub_question: {each_sub_question}")
-
-                        prompt_res = cls.basic_agent(each_sub_question, db_cursor, logger, model_name=model_name,
-                                                     specific_details=specific_details,
-                                                     google_key_config_path=google_key_config_path,
-                                                     response_schema=response_schema,
-                                                     nearest_neighbours=nearest_neighbours)
-
-                        sub_questions_resp["response"] += f"\n\n{prompt_res}"
-
-                    final_specific_ques_res.append(sub_questions_resp)
-                    # break
+                question_sets, sub_questions = cls._flatten_specific_questions(specific_questions)
+                questions_contents = cls._basic_agent_contents_many(
+                    sub_questions, db_cursor, logger, google_key_config_path=google_key_config_path,
+                    nearest_neighbours=nearest_neighbours
+                )
+                llm_limiter = llm_limiter or threading.BoundedSemaphore(cls.max_concurrent_llm_calls)
+
+                def answer(index):
+                    try:
+                        return cls._call_limited(
+                            llm_limiter, cls.agent3, sub_questions[index][1], questions_contents[index], logger,
+                            google_key_config_path=google_key_config_path, response_schema=response_schema,
+                            model_name=model_name
+                        )
+                    except Exception as e:
+                        logger.error(f"Error occurred while processing basic agent: {e}")
+                        return ''
+
+                answers = []
+                if sub_questions:
+                    with concurrent.futures.ThreadPoolExecutor(
+                            max_workers=min(cls.max_concurrent_llm_calls, len(sub_questions))) as executor:
+                        answers = list(executor.map(answer, range(len(sub_questions))))
+
+                final_specific_ques_res = cls._join_specific_answers(question_sets, answers)
             except Exception as e:
                 logger.error(f"Sales chart bot failed with get specific questions contents. error: {e}")
                 logger.error(f"specific_questions: {specific_questions}")
@@ -498,39 +783,153 @@ previous_conversation - {previous_conversation}
             return final_specific_ques_res
 
         @classmethod
-        def get_generic_questions_contents(cls, generic_questions, logger,
-                                           google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            """"""
+        async def get_specific_questions_contents_async(
+                cls,
+                specific_questions,
+                db_cursor,
+                logger,
+                nearest_neighbours=60,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                response_schema=None,
+                model_name='gemini-2.0-flash-001',
+                llm_limiter=None
+        ):
+            """Awaitable twin of get_specific_questions_contents; llm_limiter is an asyncio.Semaphore."""
+            logger.info(
+                f"Sales chart bot stated with get_specific_questions_contents_async. user question: {specific_questions}")
+
+            final_specific_ques_res = []
+            try:
+                question_sets, sub_questions = cls._flatten_specific_questions(specific_questions)
+                questions_contents = await ep.run_db(
+                    cls._basic_agent_contents_many, sub_questions, db_cursor, logger,
+                    google_key_config_path, nearest_neighbours
+                )
+                llm_limiter = llm_limiter or asyncio.Semaphore(cls.max_concurrent_llm_calls)
+
+                async def answer(index):
+                    try:
+                        return await cls._call_limited_async(
+                            llm_limiter, cls.agent3_async, sub_questions[index][1], questions_contents[index], logger,
+                            google_key_config_path=google_key_config_path, response_schema=response_schema,
+                            model_name=model_name
+                        )
+                    except Exception as e:
+                        logger.error(f"Error occurred while processing basic agent: {e}")
+                        return ''
+
+                answers = await asyncio.gather(*(answer(index) for index in range(len(sub_questions))))
+                final_specific_ques_res = cls._join_specific_answers(question_sets, answers)
+            except Exception as e:
+                logger.error(f"Sales chart bot failed with get specific questions contents. error: {e}")
+                logger.error(f"specific_questions: {specific_questions}")
+
+            return final_specific_ques_res
+
+        @classmethod
+        def _generic_jobs(cls, generic_questions):
+            """
+            Flattens the generic questions into their sub-questions.
+
+            Returns:
+            tuple: ([{"ag1_question": ..., "response": ""}], [(response index, generic question, sub-question)]).
+            """
             all_generic_responses = []
+            generic_jobs = []
             for generic_question in generic_questions:
-                ag1_question = generic_question['ag1_question']
                 sub_questions = generic_question['sub_questions']
-                each_generic_question_resp = {"ag1_question": ag1_question, "response": ""}
                 if len(sub_questions) == 0:
-                    # sub_questions = [ag1_question]
                     continue
 
-                with open(google_key_config_path) as l_config_data:
-                    service_account_details = json.load(l_config_data)
-
-                l_api_key = service_account_details.get('api_key')
                 for each_sub_question in sub_questions:
-                    try:
-                        generic_response = vai.get_prompt_response(
-                            each_sub_question, logger, model_name='gemini-2.0-flash-001', location='us-central1',
-                            google_search=True,
-                            google_key_config_path=google_key_config_path,
-                            api_key=l_api_key
-                        )
-                        logger.info(f"Generic question user question: {generic_question}")
-                        logger.info(f"Sales chart bot response for get_generic_questions_contents: {generic_response}")
-                    except Exception as e:
-                        logger.error(f"Sales chart bot failed with get_generic_questions_contents. error: {e}")
-                        logger.error(f"generic_question: {generic_question}")
-                        generic_response = ''
+                    generic_jobs.append((len(all_generic_responses), generic_question, each_sub_question))
+                all_generic_responses.append({"ag1_question": generic_question['ag1_question'], "response": ""})
+            return all_generic_responses, generic_jobs
+
+        @classmethod
+        def _log_generic_response(cls, generic_question, generic_response, logger):
+            logger.info(f"Generic question user question: {generic_question}")
+            logger.info(f"Sales chart bot response for get_generic_questions_contents: {generic_response}")
+
+        @classmethod
+        def get_generic_questions_contents(cls, generic_questions, logger,
+                                           google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                           llm_limiter=None):
+            """
+            Answers the generic questions with Google-search-grounded Gemini calls, all sub-questions in parallel.
+
+            Parameters:
+            llm_limiter (BoundedSemaphore): Limit on concurrent model calls, shared with other work of the turn.
+                A limiter of max_concurrent_llm_calls is used when it is not given.
+            """
+            all_generic_responses, generic_jobs = cls._generic_jobs(generic_questions)
+            if not generic_jobs:
+                return all_generic_responses
+
+            l_api_key = vai.get_api_key(google_key_config_path)
+            llm_limiter = llm_limiter or threading.BoundedSemaphore(cls.max_concurrent_llm_calls)
+
+            def answer(generic_job):
+                _, generic_question, each_sub_question = generic_job
+                try:
+                    generic_response = cls._call_limited(
+                        llm_limiter, vai.get_prompt_response,
+                        each_sub_question, logger, model_name='gemini-2.0-flash-001', location='us-central1',
+                        google_search=True,
+                        google_key_config_path=google_key_config_path,
+                        api_key=l_api_key
+                    )
+                    cls._log_generic_response(generic_question, generic_response, logger)
+                except Exception as e:
+                    logger.error(f"Sales chart bot failed with get_generic_questions_contents. error: {e}")
+                    logger.error(f"generic_question: {generic_question}")
+                    generic_response = ''
+                return generic_response
+
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(cls.max_concurrent_llm_calls, len(generic_jobs))) as executor:
+                generic_responses = list(executor.map(answer, generic_jobs))
+
+            for (response_index, _, _), generic_response in zip(generic_jobs, generic_responses):
+                all_generic_responses[response_index]['response'] += f"\n\n{generic_response}" if generic_response else ''
+
+            return all_generic_responses
+
+        @classmethod
+        async def get_generic_questions_contents_async(
+                cls, generic_questions, logger,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                llm_limiter=None
+        ):
+            """Awaitable twin of get_generic_questions_contents; llm_limiter is an asyncio.Semaphore."""
+            all_generic_responses, generic_jobs = cls._generic_jobs(generic_questions)
+            if not generic_jobs:
+                return all_generic_responses
+
+            l_api_key = vai.get_api_key(google_key_config_path)
+            llm_limiter = llm_limiter or asyncio.Semaphore(cls.max_concurrent_llm_calls)
+
+            async def answer(generic_job):
+                _, generic_question, each_sub_question = generic_job
+                try:
+                    generic_response = await cls._call_limited_async(
+                        llm_limiter, vai.get_prompt_response_async,
+                        each_sub_question, logger, model_name='gemini-2.0-flash-001', location='us-central1',
+                        google_search=True,
+                        google_key_config_path=google_key_config_path,
+                        api_key=l_api_key
+                    )
+                    cls._log_generic_response(generic_question, generic_response, logger)
+                except Exception as e:
+                    logger.error(f"Sales chart bot failed with get_generic_questions_contents. error: {e}")
+                    logger.error(f"generic_question: {generic_question}")
+                    generic_response = ''
+                return generic_response
+
+            generic_responses = await asyncio.gather(*(answer(generic_job) for generic_job in generic_jobs))
 
-                    each_generic_question_resp['response'] += f"\n\n{generic_response}" if generic_response else ''
-                    all_generic_responses.append(each_generic_question_resp)
+            for (response_index, _, _), generic_response in zip(generic_jobs, generic_responses):
+                all_generic_responses[response_index]['response'] += f"\n\n{generic_response}" if generic_response else ''
 
             return all_generic_responses
 
@@ -609,176 +1008,220 @@ class SupportAgent:
 
     class ContentRetriever:
         """"""
+        content_fetch_workers = 8
 
         def __init__(self):
             pass
 
         @classmethod
-        def _query_vectors(cls, product_name, process_name, customer_name, query_embedding, num_neighbours,
-                           db_cursor, logger):
-            """
-            Queries the database to find the nearest content IDs
-            based on vector similarity to the query_embedding.
-            """
-            vectors_query = f"""
-            select distinct content_id
-            from(
-            select content_id, embedding 
-            from support_content_embedding 
-            where upper(customer_name) = upper(:customer_name) 
+        def _query_vectors_many(cls, product_name, process_name, customer_name, query_embeddings, num_neighbours,
+                                db_cursor, logger, general=False):
             """
+            Finds the nearest content IDs for several query embeddings in one database round trip.
 
-            if process_name:
-                vectors_query += f"""
-                and (process_name = '{process_name}' or process_name is null) 
-                """
+            Every query gets its own top-k branch in a single UNION ALL statement, so N sub-questions cost one
+            execute instead of N. The in-process vector index is used instead when it is enabled and loaded.
 
-            vectors_query += f"""
-            and upper(product_name) = upper(:product_name)
-            order by vector_distance(
-            embedding,
-            :query_embedding
-            ) asc
-            fetch first
-            {num_neighbours}
-            rows only
-            )"""
-            try:
-                # query_embedding = str(query_embedding)
-                logger.info(
-                    f"vector search query: {vectors_query} with following conditions \nproduct name: {product_name}"
-                    f"\nprocess name: {process_name}\ncustomer name: {customer_name}"
-                )
-                db_cursor.execute(
-                    vectors_query,
-                    {
-                        'product_name': product_name,
-                        # 'process_name': process_name,
-                        'customer_name': customer_name,
-                        'query_embedding': str(query_embedding)
-                    }
-                )
-                vectors_data = db_cursor.fetchall()
-                content_ids = [v_id[0] for v_id in vectors_data]
-            except Exception as e:
-                logger.error(f'Error fetching support content ids from Database: {e}')
-                logger.error(
-                    f'query_embedding: {query_embedding}\n embedding_type: {type(query_embedding)}'
-                )
-                content_ids = []
-            return content_ids
+            Parameters:
+            general (bool): Search general_content_embedding (no customer filter) instead of
+                support_content_embedding.
 
-        @classmethod
-        def _general_query_vectors(cls, product_name, process_name, customer_name, query_embedding, num_neighbours,
-                           db_cursor, logger):
-            """
-            Queries the database to find the nearest content IDs
-            based on vector similarity to the query_embedding.
-            """
-            vectors_query = f"""
-            select distinct content_id
-            from(
-            select content_id, embedding 
-            from general_content_embedding 
-            where 1 = 1 
+            Returns:
+            list: One list of content ids per query embedding, nearest first.
             """
+            if general:
+                content_ids = vix.search_general_many(product_name, process_name, query_embeddings, num_neighbours,
+                                                      logger)
+            else:
+                content_ids = vix.search_support_many(product_name, process_name, customer_name, query_embeddings,
+                                                      num_neighbours, logger)
+            if content_ids is not None:
+                return content_ids
+
+            content_ids = [[] for _ in query_embeddings]
+            queries = [(query_no, embedding) for query_no, embedding in enumerate(query_embeddings) if embedding]
+            if not queries:
+                return content_ids
+
+            table_name = 'general_content_embedding' if general else 'support_content_embedding'
+            filters = "upper(product_name) = upper(:product_name)"
+            bind_values = {'product_name': product_name}
+            if not general:
+                filters += " and upper(customer_name) = upper(:customer_name)"
+                bind_values['customer_name'] = customer_name
             if process_name:
-                vectors_query += f"""
-            and (process_name = '{process_name}' or process_name is null) 
-            """
+                filters += " and (process_name = :process_name or process_name is null)"
+                bind_values['process_name'] = process_name
+
+            branches = []
+            for query_no, embedding in queries:
+                branches.append(f"""
+            select {query_no} query_no, content_id, distance
+            from(
+            select content_id, vector_distance(embedding, :query_embedding_{query_no}) distance
+            from {table_name}
+            where {filters}
+            order by distance asc
+            {ovi.fetch_clause(num_neighbours)}
+            )""")
+                bind_values[f'query_embedding_{query_no}'] = em.to_vector(embedding)
+            vectors_query = "\n            union all".join(branches) + "\n            order by query_no, distance"
 
-            vectors_query += f"""
-            and upper(product_name) = upper(:product_name)
-            order by vector_distance(
-            embedding,
-            :query_embedding
-            ) asc
-            fetch first
-            {num_neighbours}
-            rows only
-            )"""
             try:
-                # query_embedding = str(query_embedding)
                 logger.info(
-                    f"vector search query: {vectors_query} with following conditions \nproduct name: {product_name}"
-                    f"\nprocess name: {process_name}"
-                )
-                db_cursor.execute(
-                    vectors_query,
-                    {
-                        'product_name': product_name,
-                        # 'process_name': process_name,
-                        # 'customer_name': customer_name,
-                        'query_embedding': str(query_embedding)
-                    }
+                    f"vector search for {len(queries)} queries on {table_name} with following conditions "
+                    f"\nproduct name: {product_name}\nprocess name: {process_name}\ncustomer name: {customer_name}"
                 )
-                vectors_data = db_cursor.fetchall()
-                content_ids = [v_id[0] for v_id in vectors_data]
+                db_cursor.execute(vectors_query, bind_values)
+                for query_no, content_id, _ in db_cursor.fetchall():
+                    if content_id not in content_ids[query_no]:
+                        content_ids[query_no].append(content_id)
             except Exception as e:
                 logger.error(f'Error fetching support content ids from Database: {e}')
-                logger.error(
-                    f'query_embedding: {query_embedding}\n embedding_type: {type(query_embedding)}'
-                )
-                content_ids = []
+                logger.error(f'vectors_query: {vectors_query}')
             return content_ids
 
         @classmethod
-        def _get_content(cls, product, content_ids, nosql_conn, logger):
+        def _fetch_contents(cls, table_name, content_ids, nosql_conn, logger):
             """
-            Retrieves content text for the specified content IDs
-            from the database table 'SUPPORT_CONTENT'.
+            Fetches the content texts of the given content IDs from a NoSQL documents table, each ID once.
+
+            Contents are served from the content cache when possible; the rest are read by primary key with
+            parallel GetRequests (at most content_fetch_workers at a time) and added to the cache.
+
+            Returns:
+            dict: content_id to content text, for the contents that were found.
             """
-            logger.info('Get Content Function Called')
+            content_ids = list(dict.fromkeys(content_ids))
             if not content_ids:
-                return []
+                return {}
+
+            contents, missing_ids, generation = cc.get_many(table_name, content_ids)
+            if not missing_ids:
+                return contents
 
-            content_query = ("SELECT content_details FROM SupportDocumentsContent WHERE content_id IN (" +
-                             ",".join(map(str, content_ids)) + ")")
             try:
-                # print(f"content_query: {content_query}")
-                sales_content_l = tm.execute_select_query(nosql_conn, content_query)
-                sales_content = [each_content.get('content_details').get('content') for each_content in sales_content_l]
+                rows = tm.get_rows_by_key(
+                    nosql_conn, table_name, [{'content_id': content_id} for content_id in missing_ids],
+                    max_workers=cls.content_fetch_workers
+                )
             except Exception as e:
                 logger.error(f'Error fetching Content from Database: {e}')
-                logger.error(f'content query: {content_query}')
-                sales_content = []
+                logger.error(f'{table_name} content ids: {missing_ids}')
+                return contents
 
-            # final_texts = [(str(content[0].read()) if hasattr(content[0], 'read') else str(content[0])) for content in
-            #                sales_content]
-            final_texts = '\n\n'.join(sales_content)
-            # print(f"final_texts: {final_texts}")
+            fetched = {
+                row.get('content_id'): (row.get('content_details') or {}).get('content')
+                for row in rows if row is not None
+            }
+            cc.set_many(table_name, fetched, generation)
+            contents.update(fetched)
+            logger.info(f"{len(content_ids) - len(missing_ids)} contents from cache, {len(fetched)} read from {table_name}.")
+            return contents
+
+        @classmethod
+        def _pack_contents(cls, content_ids, contents, logger, token_budget=None):
+            """Joins the fetched contents in the order of content_ids, packed to token_budget when it is given."""
+            texts = [contents[content_id] for content_id in content_ids if content_id in contents]
+            if token_budget:
+                final_texts, _ = cp.pack(texts, token_budget, logger, agent_name='Agent3.1')
+            else:
+                final_texts = '\n\n'.join(texts)
             return final_texts
 
+
+    class GetContents(ContentRetriever):
+        """"""
+        max_concurrent_questions = 8
+        question_timeout_seconds = 60.0
+
         @classmethod
-        def _get_general_content(cls, product, content_ids, nosql_conn, logger):
+        def _agent31_config(cls, customer_name, product_name, nosql_conn, logger, general=False):
             """
-            Retrieves content text for the specified content IDs
-            from the database table 'SUPPORT_CONTENT'.
+            Resolves the Agent3.1 prompt configuration of a customer and product.
+            Returns (system_instructions, llm_model_name, llm_server_location, nearest_neighbours,
+            context_token_budget), with defaults when it is not configured.
             """
-            logger.info('Get Content Function Called')
-            if not content_ids:
-                return []
-
-            content_query = ("SELECT content_details FROM GeneralDocumentsContent WHERE content_id IN (" +
-                             ",".join(map(str, content_ids)) + ")")
             try:
-                # print(f"content_query: {content_query}")
-                sales_content_l = tm.execute_select_query(nosql_conn, content_query)
-                sales_content = [each_content.get('content_details').get('content') for each_content in sales_content_l]
+                # General documents are configured per exact customer and product, customer documents case-insensitively.
+                prompt_config_details = pcr.get_config(
+                    nosql_conn, customer_name, product_name, 'Agent3.1', logger, ignore_case=not general
+                )
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
+                nearest_neighbours = prompt_config_details.get('nearest_neighbours')
+                context_token_budget = prompt_config_details.get('context_token_budget')
             except Exception as e:
-                logger.error(f'Error fetching Content from Database: {e}')
-                logger.error(f'content query: {content_query}')
-                sales_content = []
+                logger.error(
+                    f"Agent3.1 prompt is not configured. Error: {e}")
+                system_instructions = ''
+                llm_server_location = 'us-central1'
+                llm_model_name = 'gemini-2.0-flash-001'
+                nearest_neighbours = 30
+                context_token_budget = None
 
-            # final_texts = [(str(content[0].read()) if hasattr(content[0], 'read') else str(content[0])) for content in
-            #                sales_content]
-            final_texts = '\n\n'.join(sales_content)
-            # print(f"final_texts: {final_texts}")
-            return final_texts
+            return system_instructions, llm_model_name, llm_server_location, nearest_neighbours, context_token_budget
 
+        @classmethod
+        def _basic_agent_contents_many(
+                cls, user_questions, customer_name, product_name, process_name, db_cursor,
+                nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                general=False
+        ):
+            """
+            Retrieves the reference contents of several questions together: the questions are embedded in one
+            batch, searched in one vector query and every content is fetched once, however many questions share it.
 
-    class GetContents(ContentRetriever):
-        """"""
+            Parameters:
+            general (bool): Use the general (Oracle) documents instead of the customer documents.
+
+            Returns:
+            list: (question, contents, system_instructions, llm_model_name, llm_server_location) per question,
+                in the order of user_questions.
+            """
+            (system_instructions, llm_model_name, llm_server_location, nearest_neighbours,
+             context_token_budget) = cls._agent31_config(customer_name, product_name, nosql_conn, logger,
+                                                         general=general)
+
+            sub_questions = [ut.clean_string(user_question).lower() for user_question in user_questions]
+            question_embeddings = em.get_embeddings(
+                sub_questions, logger, google_key_config_path=google_key_config_path, location=llm_server_location
+            )
+            question_content_ids = cls._query_vectors_many(
+                product_name, process_name, customer_name, question_embeddings, nearest_neighbours, db_cursor,
+                logger, general=general
+            )
+            contents = cls._fetch_contents(
+                'GeneralDocumentsContent' if general else 'SupportDocumentsContent',
+                [content_id for content_ids in question_content_ids for content_id in content_ids],
+                nosql_conn, logger
+            )
+
+            token_budget = cp.get_budget('Agent3.1', context_token_budget)
+            questions_contents = []
+            for each_sub_question, l_content_ids in zip(sub_questions, question_content_ids):
+                logger.info(
+                    f"contents used for specific question:\n specific details:{product_name}\nquestion: {each_sub_question}\ncontents: {l_content_ids}")
+                l_contents = cls._pack_contents(l_content_ids, contents, logger, token_budget) if l_content_ids else []
+                questions_contents.append(
+                    (each_sub_question, l_contents, system_instructions, llm_model_name, llm_server_location)
+                )
+            return questions_contents
+
+        @classmethod
+        def _basic_agent_contents(
+                cls, user_question, customer_name, product_name, process_name, db_cursor,
+                nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """
+            Resolves the Agent3.1 prompt configuration and retrieves the reference contents for the question.
+            Returns (question, contents, system_instructions, llm_model_name, llm_server_location).
+            """
+            return cls._basic_agent_contents_many(
+                [user_question], customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                google_key_config_path=google_key_config_path
+            )[0]
 
         @classmethod
         def _basic_agent(
@@ -788,49 +1231,39 @@ class SupportAgent:
         ):
             logger.info("Basic Agent called for getting the basic info of embedding...")
             try:
+                (each_sub_question, l_contents, system_instructions, llm_model_name,
+                 llm_server_location) = cls._basic_agent_contents(
+                    user_question, customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                    google_key_config_path=google_key_config_path
+                )
+                prompt_res = cls._prompt_resp(
+                    each_sub_question, l_contents, system_instructions, llm_model_name, llm_server_location, logger,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+                )
+            except Exception as e:
+                logger.error(f"Error occurred while processing basic agent: {e}")
+                prompt_res = ''
 
-                prompt_config_query = f"""
-                SELECT 
-                    system_instruction, 
-                    response_schema,
-                    input_prompt,
-                    llm_model_name,
-                    llm_server_location, 
-                    nearest_neighbours
-                FROM WAIAgentPromptsConfig
-                WHERE upper(customer) = upper('{customer_name}')
-                and prompt_level = 'Agent3.1'
-                and upper(product_name) = upper('{product_name}')
-                """
-
-                try:
-                    prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                    system_instructions = prompt_config_details[0].get('system_instruction')
-                    llm_model_name = prompt_config_details[0].get('llm_model_name')
-                    llm_server_location = prompt_config_details[0].get('llm_server_location')
-                    nearest_neighbours = prompt_config_details[0].get('nearest_neighbours')
-                except Exception as e:
-                    logger.error(
-                        f"Agent3.1 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
-                    system_instructions = ''
-                    llm_server_location = 'us-central1'
-                    llm_model_name = 'gemini-2.0-flash-001'
-                    nearest_neighbours = 30
+            logger.info(f"Response: {prompt_res}")
 
-                each_sub_question = ut.clean_string(user_question).lower()
-                # print(f"each_sub_question: {each_sub_question}")
+            return prompt_res
 
-                each_question_embedding = em.get_embedding(
-                    each_sub_question, logger, google_key_config_path=google_key_config_path, location=llm_server_location
-                )
-                l_content_ids = cls._query_vectors(
-                    product_name, process_name, customer_name, each_question_embedding,
-                    nearest_neighbours, db_cursor, logger
+        @classmethod
+        async def _basic_agent_async(
+                cls, user_question, customer_name, product_name, process_name, db_cursor,
+                nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                previous_conversation=''
+        ):
+            """Awaitable twin of _basic_agent; retrieval runs on the db pool."""
+            logger.info("Basic Agent async called for getting the basic info of embedding...")
+            try:
+                (each_sub_question, l_contents, system_instructions, llm_model_name,
+                 llm_server_location) = await ep.run_db(
+                    cls._basic_agent_contents,
+                    user_question, customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                    google_key_config_path=google_key_config_path
                 )
-                logger.info(
-                    f"contents used for specific question:\n specific details:{product_name}\nquestion: {each_sub_question}\ncontents: {l_content_ids}")
-                l_contents = cls._get_content(product_name, l_content_ids, nosql_conn, logger)
-                prompt_res = cls._prompt_resp(
+                prompt_res = await cls._prompt_resp_async(
                     each_sub_question, l_contents, system_instructions, llm_model_name, llm_server_location, logger,
                     google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
                 )
@@ -842,6 +1275,20 @@ class SupportAgent:
 
             return prompt_res
 
+        @classmethod
+        def _general_basic_agent_contents(
+                cls, user_question, customer_name, product_name, process_name, db_cursor,
+                nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """
+            Resolves the Agent3.1 prompt configuration and retrieves the reference contents for the question.
+            Returns (question, contents, system_instructions, llm_model_name, llm_server_location).
+            """
+            return cls._basic_agent_contents_many(
+                [user_question], customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                google_key_config_path=google_key_config_path, general=True
+            )[0]
+
         @classmethod
         def _general_basic_agent(
                 cls, user_question, customer_name, product_name, process_name, db_cursor,
@@ -850,49 +1297,39 @@ class SupportAgent:
         ):
             logger.info("Basic Agent called for getting the basic info of embedding...")
             try:
+                (each_sub_question, l_contents, system_instructions, llm_model_name,
+                 llm_server_location) = cls._general_basic_agent_contents(
+                    user_question, customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                    google_key_config_path=google_key_config_path
+                )
+                prompt_res = cls._prompt_resp(
+                    each_sub_question, l_contents, system_instructions, llm_model_name, llm_server_location, logger,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+                )
+            except Exception as e:
+                logger.error(f"Error occurred while processing basic agent: {e}")
+                prompt_res = ''
 
-                prompt_config_query = f"""
-                SELECT 
-                    system_instruction, 
-                    response_schema,
-                    input_prompt,
-                    llm_model_name,
-                    llm_server_location, 
-                    nearest_neighbours
-                FROM WAIAgentPromptsConfig
-                WHERE customer = '{customer_name}'
-                and prompt_level = 'Agent3.1'
-                and product_name = '{product_name}'
-                """
-
-                try:
-                    prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                    system_instructions = prompt_config_details[0].get('system_instruction')
-                    llm_model_name = prompt_config_details[0].get('llm_model_name')
-                    llm_server_location = prompt_config_details[0].get('llm_server_location')
-                    nearest_neighbours = prompt_config_details[0].get('nearest_neighbours')
-                except Exception as e:
-                    logger.error(
-                        f"Agent3.1 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
-                    system_instructions = ''
-                    llm_server_location = 'us-central1'
-                    llm_model_name = 'gemini-2.0-flash-001'
-                    nearest_neighbours = 30
+            logger.info(f"Response: {prompt_res}")
 
-                each_sub_question = ut.clean_string(user_question).lower()
-                # print(f"each_sub_question: {each_sub_question}")
+            return prompt_res
 
-                each_question_embedding = em.get_embedding(
-                    each_sub_question, logger, google_key_config_path=google_key_config_path, location=llm_server_location
-                )
-                l_content_ids = cls._general_query_vectors(
-                    product_name, process_name, customer_name, each_question_embedding,
-                    nearest_neighbours, db_cursor, logger
+        @classmethod
+        async def _general_basic_agent_async(
+                cls, user_question, customer_name, product_name, process_name, db_cursor,
+                nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                previous_conversation=''
+        ):
+            """Awaitable twin of _general_basic_agent; retrieval runs on the db pool."""
+            logger.info("Basic Agent async called for getting the basic info of embedding...")
+            try:
+                (each_sub_question, l_contents, system_instructions, llm_model_name,
+                 llm_server_location) = await ep.run_db(
+                    cls._general_basic_agent_contents,
+                    user_question, customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                    google_key_config_path=google_key_config_path
                 )
-                logger.info(
-                    f"contents used for specific question:\n specific details:{product_name}\nquestion: {each_sub_question}\ncontents: {l_content_ids}")
-                l_contents = cls._get_general_content(product_name, l_content_ids, nosql_conn, logger)
-                prompt_res = cls._prompt_resp(
+                prompt_res = await cls._prompt_resp_async(
                     each_sub_question, l_contents, system_instructions, llm_model_name, llm_server_location, logger,
                     google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
                 )
@@ -917,7 +1354,38 @@ class SupportAgent:
             """
             try:
                 logger.info(f'Support agent 1 called with the following issue_question: \n{issue_question}')
-                prompt = f"""
+                resp_request = cls._prompt_resp_request(
+                    issue_question, reference_data, system_instructions, llm_model_name, llm_server_location,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+                )
+                return vai.get_prompt_response(logger=logger, **resp_request)
+            except Exception as e:
+                logger.error(f'Error fetching response from prompt: {e}')
+                return ''
+
+        @classmethod
+        async def _prompt_resp_async(
+                cls, issue_question, reference_data, system_instructions, llm_model_name, llm_server_location, logger,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json', previous_conversation=''
+        ):
+            """Awaitable twin of _prompt_resp."""
+            try:
+                logger.info(f'Support agent 1 async called with the following issue_question: \n{issue_question}')
+                resp_request = cls._prompt_resp_request(
+                    issue_question, reference_data, system_instructions, llm_model_name, llm_server_location,
+                    google_key_config_path=google_key_config_path, previous_conversation=previous_conversation
+                )
+                return await vai.get_prompt_response_async(logger=logger, **resp_request)
+            except Exception as e:
+                logger.error(f'Error fetching response from prompt: {e}')
+                return ''
+
+        @classmethod
+        def _prompt_resp_request(
+                cls, issue_question, reference_data, system_instructions, llm_model_name, llm_server_location,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json', previous_conversation=''
+        ):
+            prompt = f"""
                 "main_question": "{issue_question}"
                 "context": 
                 '''
@@ -926,21 +1394,243 @@ class SupportAgent:
 
                 "previous_conversation": {previous_conversation}
                 """
-                # print(f"prompt: {prompt}")
-                return vai.get_prompt_response(
-                    prompt,
-                    logger,
-                    google_key_config_path=google_key_config_path,
-                    model_name=llm_model_name,
-                    system_instruction=system_instructions,
-                    location=llm_server_location
+            # print(f"prompt: {prompt}")
+            return {
+                "prompt": prompt,
+                "google_key_config_path": google_key_config_path,
+                "model_name": llm_model_name,
+                "system_instruction": system_instructions,
+                "location": llm_server_location
+            }
+
+        @classmethod
+        def configure_fan_out(cls, max_concurrent_questions=None, question_timeout_seconds=None):
+            """
+            Parameters:
+            max_concurrent_questions (int): Sub-questions answered by Agent3.1 at the same time.
+            question_timeout_seconds (float): Time a sub-question may take from the moment it starts before it is
+                answered with an empty response.
+            """
+            if max_concurrent_questions is not None:
+                cls.max_concurrent_questions = max(1, int(max_concurrent_questions))
+            if question_timeout_seconds is not None:
+                cls.question_timeout_seconds = max(1.0, float(question_timeout_seconds))
+
+        @classmethod
+        def load_config(cls, config_path):
+            """Reads the support agent configuration file; a missing file keeps the defaults."""
+            try:
+                with open(config_path, 'r') as agent_config:
+                    cls.configure_fan_out(**json.load(agent_config))
+            except FileNotFoundError:
+                pass
+
+        @classmethod
+        def _question_jobs(
+                cls, source, questions, product_name, process_name, customer_name, db_cursor, nosql_conn, logger,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json', general=False
+        ):
+            """
+            Retrieves the reference contents of one source's sub-questions in a batch.
+
+            Returns:
+            list: (source, question, question_contents, retrieval_seconds) per question, question_contents being an
+                item of _basic_agent_contents_many. Empty when the retrieval fails.
+            """
+            started = time.perf_counter()
+            try:
+                questions_contents = cls._basic_agent_contents_many(
+                    questions, customer_name, product_name, process_name, db_cursor, nosql_conn, logger,
+                    google_key_config_path=google_key_config_path, general=general
                 )
             except Exception as e:
-                logger.error(f'Error fetching response from prompt: {e}')
-                return ''
+                logger.error(f"Support chart bot failed with get {source} questions contents. error: {e}")
+                logger.error(f"doc_questions: {questions}")
+                return []
+
+            retrieval_seconds = time.perf_counter() - started
+            return [
+                (source, question, question_contents, retrieval_seconds)
+                for question, question_contents in zip(questions, questions_contents)
+            ]
+
+        @classmethod
+        def _log_question_latency(cls, logger, source, question, retrieval_seconds, queue_seconds, llm_seconds,
+                                  status):
+            logger.info(
+                f"Agent3.1 {status} for {source} question in {retrieval_seconds + queue_seconds + llm_seconds:.3f}s "
+                f"(retrieval batch: {retrieval_seconds:.3f}s, queued: {queue_seconds:.3f}s, llm: {llm_seconds:.3f}s)"
+                f"\nquestion: {question}"
+            )
+
+        @classmethod
+        def _answer_questions(
+                cls, question_jobs, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """
+            Answers retrieved sub-questions with Agent3.1 in parallel, at most max_concurrent_questions at a time.
+
+            A question still running question_timeout_seconds after it started is answered with an empty response;
+            its model call finishes in the background and is discarded.
+
+            Parameters:
+            question_jobs (list): Items of _question_jobs, from any number of sources.
+
+            Returns:
+            list: {"question": ..., "answer": ...} per job, in the order of question_jobs.
+            """
+            if not question_jobs:
+                return []
+
+            fan_out_started = time.perf_counter()
+            started = {}
+            answers = [''] * len(question_jobs)
+            statuses = ['timed out'] * len(question_jobs)
+            finished = {}
+
+            def answer(index, question_contents):
+                started[index] = time.perf_counter()
+                try:
+                    return cls._prompt_resp(*question_contents, logger, google_key_config_path=google_key_config_path)
+                finally:
+                    finished[index] = time.perf_counter()
+
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(cls.max_concurrent_questions, len(question_jobs))
+            )
+            try:
+                pending = {
+                    executor.submit(answer, index, question_contents): index
+                    for index, (_, _, question_contents, _) in enumerate(question_jobs)
+                }
+                while pending:
+                    done, _ = concurrent.futures.wait(
+                        pending, timeout=cls._next_deadline(pending.values(), started),
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        index = pending.pop(future)
+                        try:
+                            answers[index] = future.result()
+                            statuses[index] = 'answered'
+                        except Exception as e:
+                            logger.error(f"Agent3.1 failed for question: {question_jobs[index][1]}. Error: {e}")
+                            statuses[index] = 'failed'
+                    now = time.perf_counter()
+                    for future, index in list(pending.items()):
+                        if (index in started and not future.done()
+                                and now - started[index] >= cls.question_timeout_seconds):
+                            logger.warning(
+                                f"Agent3.1 timed out after {cls.question_timeout_seconds}s for question: "
+                                f"{question_jobs[index][1]}"
+                            )
+                            del pending[future]
+            finally:
+                executor.shutdown(wait=False)
+
+            now = time.perf_counter()
+            for index, (source, question, _, retrieval_seconds) in enumerate(question_jobs):
+                question_started = started.get(index, now)
+                cls._log_question_latency(
+                    logger, source, question, retrieval_seconds, question_started - fan_out_started,
+                    finished.get(index, now) - question_started, statuses[index]
+                )
+            return [
+                {"question": question, "answer": answers[index]}
+                for index, (_, question, _, _) in enumerate(question_jobs)
+            ]
+
+        @classmethod
+        def _next_deadline(cls, indexes, started):
+            """Seconds until the earliest running question times out; the full timeout when none is running."""
+            now = time.perf_counter()
+            remaining = [
+                started[index] + cls.question_timeout_seconds - now for index in indexes if index in started
+            ]
+            return max(0.0, min(remaining)) if remaining else cls.question_timeout_seconds
+
+        @classmethod
+        async def _answer_questions_async(
+                cls, question_jobs, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """Awaitable twin of _answer_questions; a timed-out model call is cancelled."""
+            fan_out_started = time.perf_counter()
+            semaphore = asyncio.Semaphore(cls.max_concurrent_questions)
+
+            async def answer(source, question, question_contents, retrieval_seconds):
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        prompt_res = await asyncio.wait_for(
+                            cls._prompt_resp_async(
+                                *question_contents, logger, google_key_config_path=google_key_config_path
+                            ),
+                            timeout=cls.question_timeout_seconds
+                        )
+                        status = 'answered'
+                    except asyncio.TimeoutError:
+                        logger.warning(
+                            f"Agent3.1 timed out after {cls.question_timeout_seconds}s for question: {question}"
+                        )
+                        prompt_res = ''
+                        status = 'timed out'
+                    cls._log_question_latency(
+                        logger, source, question, retrieval_seconds, started - fan_out_started,
+                        time.perf_counter() - started, status
+                    )
+                return {"question": question, "answer": prompt_res}
+
+            return list(await asyncio.gather(*(answer(*question_job) for question_job in question_jobs)))
+
+        @classmethod
+        def get_customer_doc_questions_contents(
+                cls,
+                doc_questions,
+                product_name,
+                process_name,
+                customer_name,
+                db_cursor,
+                nosql_conn,
+                logger,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """"""
+            logger.info(
+                f"Support chart bot stated with get_customer_doc_questions_contents. user question: {doc_questions}")
+
+            question_jobs = cls._question_jobs(
+                'customer_documents', doc_questions, product_name, process_name, customer_name, db_cursor,
+                nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            return cls._answer_questions(question_jobs, logger, google_key_config_path=google_key_config_path)
+
+        @classmethod
+        async def get_customer_doc_questions_contents_async(
+                cls,
+                doc_questions,
+                product_name,
+                process_name,
+                customer_name,
+                db_cursor,
+                nosql_conn,
+                logger,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """Awaitable twin of get_customer_doc_questions_contents."""
+            logger.info(
+                f"Support chart bot stated with get_customer_doc_questions_contents_async. user question: {doc_questions}")
+
+            question_jobs = await ep.run_db(
+                cls._question_jobs,
+                'customer_documents', doc_questions, product_name, process_name, customer_name, db_cursor,
+                nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            return await cls._answer_questions_async(
+                question_jobs, logger, google_key_config_path=google_key_config_path
+            )
 
         @classmethod
-        def get_customer_doc_questions_contents(
+        def get_general_doc_questions_contents(
                 cls,
                 doc_questions,
                 product_name,
@@ -955,28 +1645,14 @@ class SupportAgent:
             logger.info(
                 f"Support chart bot stated with get_customer_doc_questions_contents. user question: {doc_questions}")
 
-            fina_ques_res = []
-            try:
-                for each_question in doc_questions:
-                    prompt_res = cls._basic_agent(
-                        each_question, customer_name, product_name, process_name, db_cursor, nosql_conn,
-                        logger, google_key_config_path=google_key_config_path,
-                    )
-                    each_resp = {
-                        "question": each_question,
-                        "answer": prompt_res
-                    }
-
-                    fina_ques_res.append(each_resp)
-                    # break
-            except Exception as e:
-                logger.error(f"Support chart bot failed with get doc questions contents. error: {e}")
-                logger.error(f"doc_questions: {doc_questions}")
-
-            return fina_ques_res
+            question_jobs = cls._question_jobs(
+                'oracle_general_documents', doc_questions, product_name, process_name, customer_name, db_cursor,
+                nosql_conn, logger, google_key_config_path=google_key_config_path, general=True
+            )
+            return cls._answer_questions(question_jobs, logger, google_key_config_path=google_key_config_path)
 
         @classmethod
-        def get_general_doc_questions_contents(
+        async def get_general_doc_questions_contents_async(
                 cls,
                 doc_questions,
                 product_name,
@@ -987,29 +1663,18 @@ class SupportAgent:
                 logger,
                 google_key_config_path='../configuration/Google_Key(WinfoBots).json'
         ):
-            """"""
+            """Awaitable twin of get_general_doc_questions_contents."""
             logger.info(
-                f"Support chart bot stated with get_customer_doc_questions_contents. user question: {doc_questions}")
-
-            fina_ques_res = []
-            try:
-                for each_question in doc_questions:
-                    prompt_res = cls._general_basic_agent(
-                        each_question, customer_name, product_name, process_name, db_cursor, nosql_conn,
-                        logger, google_key_config_path=google_key_config_path,
-                    )
-                    each_resp = {
-                        "question": each_question,
-                        "answer": prompt_res
-                    }
-
-                    fina_ques_res.append(each_resp)
-                    # break
-            except Exception as e:
-                logger.error(f"Support chart bot failed with get doc questions contents. error: {e}")
-                logger.error(f"doc_questions: {doc_questions}")
+                f"Support chart bot stated with get_general_doc_questions_contents_async. user question: {doc_questions}")
 
-            return fina_ques_res
+            question_jobs = await ep.run_db(
+                cls._question_jobs,
+                'oracle_general_documents', doc_questions, product_name, process_name, customer_name, db_cursor,
+                nosql_conn, logger, google_key_config_path=google_key_config_path, general=True
+            )
+            return await cls._answer_questions_async(
+                question_jobs, logger, google_key_config_path=google_key_config_path
+            )
 
         @classmethod
         def group_questions_by_source(cls, all_questions, logger):
@@ -1068,31 +1733,26 @@ class SupportAgent:
 
     class Agents(GetContents):
         @classmethod
-        def agent1(cls, previous_chats, ticket_description, customer_process_descriptions, customer_name, product_name,
-                   nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            logger.info(f'Support agent 1 called with the following ticket description: \n{ticket_description}')
-
-            prompt_config_query = f"""
-            SELECT 
-                system_instruction, 
-                response_schema,
-                input_prompt,
-                llm_model_name,
-                llm_server_location, 
-                nearest_neighbours
-            FROM WAIAgentPromptsConfig
-            WHERE customer = '{customer_name}'
-            and prompt_level = 'Agent1'
-            and product_name = '{product_name}'
-            """
+        def _trim_json_resp(cls, agent_resp, logger, agent_name):
+            """Trims the model response to the outer JSON object; returns None when it cannot be parsed."""
+            try:
+                start_index = agent_resp.find('{')
+                end_index = agent_resp.rfind('}')
+                return agent_resp[start_index:end_index + 1]
+            except Exception as e:
+                logger.error(f"Error occurred while parsing {agent_name} response: {e}")
+                return None
 
+        @classmethod
+        def _agent1_request(cls, previous_chats, ticket_description, customer_process_descriptions, customer_name, product_name,
+                            nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_name, product_name, 'Agent1', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
             except Exception as e:
-                logger.error(f"Agent1 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                logger.error(f"Agent1 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
@@ -1123,50 +1783,54 @@ class SupportAgent:
     }}
             '''
 
-            ag1_resp = vai.get_prompt_response(
-                ag1_prompt, logger, system_instruction=system_instructions, model_name=llm_model_name,
-                location=llm_server_location, response_schema=response_schema,
-                google_key_config_path=google_key_config_path
+            return {
+                "prompt": ag1_prompt,
+                "system_instruction": system_instructions,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path
+            }
+
+        @classmethod
+        def agent1(cls, previous_chats, ticket_description, customer_process_descriptions, customer_name, product_name,
+                   nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            logger.info(f'Support agent 1 called with the following ticket description: \n{ticket_description}')
+
+            ag1_request = cls._agent1_request(
+                previous_chats, ticket_description, customer_process_descriptions, customer_name, product_name,
+                nosql_conn, logger, google_key_config_path=google_key_config_path
             )
+            ag1_resp = vai.get_prompt_response(logger=logger, **ag1_request)
             logger.info(f"Support agent1 resp: \n {ag1_resp}")
 
-            try:
-                start_index = ag1_resp.find('{')
-                end_index = ag1_resp.rfind('}')
-                ag1_resp = ag1_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag1_resp = None
-
-            return ag1_resp
+            return cls._trim_json_resp(ag1_resp, logger, "agent1")
 
         @classmethod
-        def agent2(cls, ticket_description, customer_id, process_name, process_flow,
-                   product_name, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            logger.info(
-                f'Support agent 2 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+        async def agent1_async(cls, previous_chats, ticket_description, customer_process_descriptions, customer_name, product_name,
+                               nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent1."""
+            logger.info(f'Support agent 1 called with the following ticket description: \n{ticket_description}')
 
-            prompt_config_query = f"""
-                        SELECT 
-                            system_instruction, 
-                            response_schema,
-                            input_prompt,
-                            llm_model_name,
-                            llm_server_location, 
-                            nearest_neighbours
-                        FROM WAIAgentPromptsConfig
-                        WHERE customer = '{customer_id}'
-                        and prompt_level = 'Agent2'
-                        and product_name = '{product_name}'
-                        """
+            ag1_request = await ep.run_db(
+                cls._agent1_request, previous_chats, ticket_description, customer_process_descriptions, customer_name,
+                product_name, nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            ag1_resp = await vai.get_prompt_response_async(logger=logger, **ag1_request)
+            logger.info(f"Support agent1 resp: \n {ag1_resp}")
+
+            return cls._trim_json_resp(ag1_resp, logger, "agent1")
 
+        @classmethod
+        def _agent2_request(cls, ticket_description, customer_id, process_name, process_flow,
+                            product_name, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_id, product_name, 'Agent2', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
             except Exception as e:
-                logger.error(f"Agent2 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                logger.error(f"Agent2 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
@@ -1216,22 +1880,45 @@ class SupportAgent:
     }}
             '''
 
-            ag2_resp = vai.get_prompt_response(
-                ag2_prompt, logger, system_instruction=system_instructions, model_name=llm_model_name,
-                location=llm_server_location, response_schema=response_schema,
+            return {
+                "prompt": ag2_prompt,
+                "system_instruction": system_instructions,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path
+            }
+
+        @classmethod
+        def agent2(cls, ticket_description, customer_id, process_name, process_flow,
+                   product_name, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            logger.info(
+                f'Support agent 2 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+
+            ag2_request = cls._agent2_request(
+                ticket_description, customer_id, process_name, process_flow, product_name, nosql_conn, logger,
                 google_key_config_path=google_key_config_path
             )
+            ag2_resp = vai.get_prompt_response(logger=logger, **ag2_request)
             logger.info(f"Support agent2 resp: \n {ag2_resp}")
 
-            try:
-                start_index = ag2_resp.find('{')
-                end_index = ag2_resp.rfind('}')
-                ag2_resp = ag2_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag2_resp = None
+            return cls._trim_json_resp(ag2_resp, logger, "agent2")
+
+        @classmethod
+        async def agent2_async(cls, ticket_description, customer_id, process_name, process_flow,
+                               product_name, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent2."""
+            logger.info(
+                f'Support agent 2 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+
+            ag2_request = await ep.run_db(
+                cls._agent2_request, ticket_description, customer_id, process_name, process_flow, product_name,
+                nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            ag2_resp = await vai.get_prompt_response_async(logger=logger, **ag2_request)
+            logger.info(f"Support agent2 resp: \n {ag2_resp}")
 
-            return ag2_resp
+            return cls._trim_json_resp(ag2_resp, logger, "agent2")
 
         @classmethod
         def agent3(cls, categorized_questions, product_name, process_name, customer_name, ai_db_conn,
@@ -1243,7 +1930,6 @@ class SupportAgent:
             doc_resp = []
             winfo_db_data = []
             oracle_db_data = []
-            oracle_general_content = []
 
             try:
                 winfo_db_questions = categorized_questions.get('product_database')
@@ -1251,21 +1937,24 @@ class SupportAgent:
                 doc_questions = categorized_questions.get('customer_documents')
                 oracle_general_questions = categorized_questions.get('oracle_general_documents')
 
-                if doc_questions:
-                    with ai_db_conn.cursor() as ai_db_cursor:
-                        doc_resp = cls.get_customer_doc_questions_contents(
-                            doc_questions, product_name, process_name, customer_name, ai_db_cursor, nosql_conn, logger,
-                             google_key_config_path=google_key_config_path
-                        )
-
-                if oracle_general_questions:
-                    with ai_db_conn.cursor() as ai_db_cursor:
-                        oracle_general_content = cls.get_general_doc_questions_contents(
-                            oracle_general_questions, product_name, process_name, customer_name, ai_db_cursor, nosql_conn, logger,
-                             google_key_config_path=google_key_config_path
-                        )
-
-                doc_resp.extend(oracle_general_content)
+                # Contents are retrieved per source in one batch each, then the sub-questions of both sources are
+                # answered together so the turn waits for the slowest question instead of the sum of all of them.
+                question_jobs = []
+                with ai_db_conn.cursor() as ai_db_cursor:
+                    if doc_questions:
+                        question_jobs.extend(cls._question_jobs(
+                            'customer_documents', doc_questions, product_name, process_name, customer_name,
+                            ai_db_cursor, nosql_conn, logger, google_key_config_path=google_key_config_path
+                        ))
+
+                    if oracle_general_questions:
+                        question_jobs.extend(cls._question_jobs(
+                            'oracle_general_documents', oracle_general_questions, product_name, process_name,
+                            customer_name, ai_db_cursor, nosql_conn, logger,
+                            google_key_config_path=google_key_config_path, general=True
+                        ))
+
+                doc_resp = cls._answer_questions(question_jobs, logger, google_key_config_path=google_key_config_path)
 
                 if winfo_db_questions:
                     winfo_db_data = []
@@ -1280,35 +1969,75 @@ class SupportAgent:
             return doc_resp, winfo_db_data, oracle_db_data
 
         @classmethod
-        def agent4(cls, ticket_description, resolved_questions, customer_name, product_name, process_flow, nosql_conn,
-                   logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            logger.info(f'Support agent 4 called with the following ticket_description: \n{ticket_description}')
+        async def agent3_async(cls, categorized_questions, product_name, process_name, customer_name, ai_db_conn,
+                               nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+                               ):
+            """Awaitable twin of agent3."""
+            logger.info(f'Support agent 3 async called with the following categorized_questions: \n{categorized_questions}')
 
-            prompt_config_query = f"""
-            SELECT 
-                system_instruction, 
-                response_schema,
-                input_prompt,
-                llm_model_name,
-                llm_server_location, 
-                nearest_neighbours
-            FROM WAIAgentPromptsConfig
-            WHERE customer = '{customer_name}'
-            and prompt_level = 'Agent4'
-            and product_name = '{product_name}'
-            """
+            doc_resp = []
+            winfo_db_data = []
+            oracle_db_data = []
+
+            try:
+                winfo_db_questions = categorized_questions.get('product_database')
+                oracle_db_questions = categorized_questions.get('customer_database')
+                doc_questions = categorized_questions.get('customer_documents')
+                oracle_general_questions = categorized_questions.get('oracle_general_documents')
+
+                question_jobs = []
+                with ai_db_conn.cursor() as ai_db_cursor:
+                    if doc_questions:
+                        question_jobs.extend(await ep.run_db(
+                            cls._question_jobs,
+                            'customer_documents', doc_questions, product_name, process_name, customer_name,
+                            ai_db_cursor, nosql_conn, logger, google_key_config_path=google_key_config_path
+                        ))
+
+                    if oracle_general_questions:
+                        question_jobs.extend(await ep.run_db(
+                            cls._question_jobs,
+                            'oracle_general_documents', oracle_general_questions, product_name, process_name,
+                            customer_name, ai_db_cursor, nosql_conn, logger,
+                            google_key_config_path=google_key_config_path, general=True
+                        ))
+
+                doc_resp = await cls._answer_questions_async(
+                    question_jobs, logger, google_key_config_path=google_key_config_path
+                )
+
+                if winfo_db_questions:
+                    winfo_db_data = []
+
+                if oracle_db_questions:
+                    oracle_db_data = []
+
+            except Exception as e:
+                logger.error(f'Error fetching response from each category: {e}')
 
+            return doc_resp, winfo_db_data, oracle_db_data
+
+        @classmethod
+        def _agent4_request(cls, ticket_description, resolved_questions, customer_name, product_name, process_flow, nosql_conn,
+                            logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_name, product_name, 'Agent4', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
+                context_token_budget = prompt_config_details.get('context_token_budget')
             except Exception as e:
                 logger.error(
-                    f"Agent4 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                    f"Agent4 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
+                context_token_budget = None
+
+            if isinstance(resolved_questions, list):
+                resolved_questions, _ = cp.pack_items(
+                    resolved_questions, cp.get_budget('Agent4', context_token_budget), logger, agent_name='Agent4'
+                )
 
             response_schema = {
                 "type": "OBJECT",
@@ -1347,56 +2076,55 @@ class SupportAgent:
 }}
             '''
 
-            ag4_resp = vai.get_prompt_response(
-                ag4_prompt, logger, model_name=llm_model_name, location=llm_server_location,
-                response_schema=response_schema, google_key_config_path=google_key_config_path,
-                system_instruction=system_instructions
-            )
+            return {
+                "prompt": ag4_prompt,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path,
+                "system_instruction": system_instructions
+            }
 
-            logger.info(f"Agent4 response: \n{ag4_resp}")
+        @classmethod
+        def agent4(cls, ticket_description, resolved_questions, customer_name, product_name, process_flow, nosql_conn,
+                   logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            logger.info(f'Support agent 4 called with the following ticket_description: \n{ticket_description}')
 
-            try:
-                start_index = ag4_resp.find('{')
-                end_index = ag4_resp.rfind('}')
-                ag4_resp = ag4_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag4_resp = None
+            ag4_request = cls._agent4_request(
+                ticket_description, resolved_questions, customer_name, product_name, process_flow, nosql_conn, logger,
+                google_key_config_path=google_key_config_path
+            )
+            ag4_resp = vai.get_prompt_response(logger=logger, **ag4_request)
+            logger.info(f"Agent4 response: \n{ag4_resp}")
 
-            return ag4_resp
+            return cls._trim_json_resp(ag4_resp, logger, "agent4")
 
         @classmethod
-        def agent5(cls, customer_name, product_name, ticket_desc, ticket_comments, previous_chats, previous_summary,
-                   ai_comments, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            """
-            Generating summary for the provided information.
-            """
-            logger.info(
-                'Support agent 5 called with the following for summarization.'
+        async def agent4_async(cls, ticket_description, resolved_questions, customer_name, product_name, process_flow, nosql_conn,
+                               logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent4."""
+            logger.info(f'Support agent 4 called with the following ticket_description: \n{ticket_description}')
+
+            ag4_request = await ep.run_db(
+                cls._agent4_request, ticket_description, resolved_questions, customer_name, product_name,
+                process_flow, nosql_conn, logger, google_key_config_path=google_key_config_path
             )
+            ag4_resp = await vai.get_prompt_response_async(logger=logger, **ag4_request)
+            logger.info(f"Agent4 response: \n{ag4_resp}")
 
-            prompt_config_query = f"""
-            SELECT 
-                system_instruction, 
-                response_schema,
-                input_prompt,
-                llm_model_name,
-                llm_server_location, 
-                nearest_neighbours
-            FROM WAIAgentPromptsConfig
-            WHERE customer = '{customer_name}'
-            and prompt_level = 'Agent5'
-            and product_name = '{product_name}'
-            """
+            return cls._trim_json_resp(ag4_resp, logger, "agent4")
 
+        @classmethod
+        def _agent5_request(cls, customer_name, product_name, ticket_desc, ticket_comments, previous_chats, previous_summary,
+                            ai_comments, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_name, product_name, 'Agent5', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
             except Exception as e:
                 logger.error(
-                    f"Agent5 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                    f"Agent5 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
@@ -1411,45 +2139,62 @@ class SupportAgent:
 }}
                     """
 
-            ag5_resp = vai.get_prompt_response(
-                ag5_prompt, logger, system_instruction=system_instructions, model_name=llm_model_name,
-                location=llm_server_location, google_key_config_path=google_key_config_path
+            return {
+                "prompt": ag5_prompt,
+                "system_instruction": system_instructions,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "google_key_config_path": google_key_config_path
+            }
+
+        @classmethod
+        def agent5(cls, customer_name, product_name, ticket_desc, ticket_comments, previous_chats, previous_summary,
+                   ai_comments, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """
+            Generating summary for the provided information.
+            """
+            logger.info(
+                'Support agent 5 called with the following for summarization.'
+            )
+
+            ag5_request = cls._agent5_request(
+                customer_name, product_name, ticket_desc, ticket_comments, previous_chats, previous_summary,
+                ai_comments, nosql_conn, logger, google_key_config_path=google_key_config_path
             )
+            ag5_resp = vai.get_prompt_response(logger=logger, **ag5_request)
             logger.info(f"Support agent5 resp: \n {ag5_resp}")
 
             return ag5_resp
 
         @classmethod
-        def agent6(cls, product_name, previous_chats, support_query, summarized_chat_content,
-                   customer_id, process_name, process_flow, nosql_conn, logger,
-                   google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+        async def agent5_async(cls, customer_name, product_name, ticket_desc, ticket_comments, previous_chats, previous_summary,
+                               ai_comments, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent5."""
             logger.info(
-                f'Support agent 6 called with the following ticket: \n Support query: {support_query}\n'
-                f'Customer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}'
+                'Support agent 5 called with the following for summarization.'
             )
 
-            prompt_config_query = f"""
-            SELECT 
-                system_instruction, 
-                response_schema,
-                input_prompt,
-                llm_model_name,
-                llm_server_location, 
-                nearest_neighbours
-            FROM WAIAgentPromptsConfig
-            WHERE customer = '{customer_id}'
-            and prompt_level = 'Agent6'
-            and product_name = '{product_name}'
-            """
+            ag5_request = await ep.run_db(
+                cls._agent5_request, customer_name, product_name, ticket_desc, ticket_comments, previous_chats,
+                previous_summary, ai_comments, nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            ag5_resp = await vai.get_prompt_response_async(logger=logger, **ag5_request)
+            logger.info(f"Support agent5 resp: \n {ag5_resp}")
+
+            return ag5_resp
 
+        @classmethod
+        def _agent6_request(cls, product_name, previous_chats, support_query, summarized_chat_content,
+                            customer_id, process_name, process_flow, nosql_conn, logger,
+                            google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_id, product_name, 'Agent6', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
             except Exception as e:
                 logger.error(
-                    f"Agent6 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                    f"Agent6 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
@@ -1499,56 +2244,77 @@ class SupportAgent:
 }}
             '''
 
-            ag6_resp = vai.get_prompt_response(
-                ag6_prompt, logger, system_instruction=system_instructions, model_name=llm_model_name,
-                location=llm_server_location, response_schema=response_schema,
-                google_key_config_path=google_key_config_path
+            return {
+                "prompt": ag6_prompt,
+                "system_instruction": system_instructions,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path
+            }
+
+        @classmethod
+        def agent6(cls, product_name, previous_chats, support_query, summarized_chat_content,
+                   customer_id, process_name, process_flow, nosql_conn, logger,
+                   google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            logger.info(
+                f'Support agent 6 called with the following ticket: \n Support query: {support_query}\n'
+                f'Customer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}'
             )
+
+            ag6_request = cls._agent6_request(
+                product_name, previous_chats, support_query, summarized_chat_content, customer_id, process_name,
+                process_flow, nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            ag6_resp = vai.get_prompt_response(logger=logger, **ag6_request)
             logger.info(f"Support agent6 resp: \n {ag6_resp}")
 
-            try:
-                start_index = ag6_resp.find('{')
-                end_index = ag6_resp.rfind('}')
-                ag6_resp = ag6_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag6_resp = None
+            return cls._trim_json_resp(ag6_resp, logger, "agent6")
+
+        @classmethod
+        async def agent6_async(cls, product_name, previous_chats, support_query, summarized_chat_content,
+                               customer_id, process_name, process_flow, nosql_conn, logger,
+                               google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent6."""
+            logger.info(
+                f'Support agent 6 called with the following ticket: \n Support query: {support_query}\n'
+                f'Customer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}'
+            )
+
+            ag6_request = await ep.run_db(
+                cls._agent6_request, product_name, previous_chats, support_query, summarized_chat_content,
+                customer_id, process_name, process_flow, nosql_conn, logger,
+                google_key_config_path=google_key_config_path
+            )
+            ag6_resp = await vai.get_prompt_response_async(logger=logger, **ag6_request)
+            logger.info(f"Support agent6 resp: \n {ag6_resp}")
 
-            return ag6_resp
+            return cls._trim_json_resp(ag6_resp, logger, "agent6")
 
         @classmethod
-        def agent7(
+        def _agent7_request(
                 cls, customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
                 generated_questions_answers, chat_summary, chat_history, support_agent_query,
                 google_key_config_path='../configuration/Google_Key(WinfoBots).json'
         ):
-            logger.info(f'Support agent7 called with the following ticket_description: \n{ticket_description}')
-
-            prompt_config_query = f"""
-            SELECT 
-                system_instruction, 
-                response_schema,
-                input_prompt,
-                llm_model_name,
-                llm_server_location, 
-                nearest_neighbours
-            FROM WAIAgentPromptsConfig
-            WHERE customer = '{customer_name}'
-            and prompt_level = 'Agent7'
-            and product_name = '{product_name}'
-            """
-
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_name, product_name, 'Agent7', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
+                context_token_budget = prompt_config_details.get('context_token_budget')
             except Exception as e:
                 logger.error(
-                    f"Agent4 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                    f"Agent4 prompt is not configured. Error: {e}")
                 system_instructions = ''
                 llm_model_name = 'gemini-2.0-flash-001'
                 llm_server_location = 'us-central1'
+                context_token_budget = None
+
+            if isinstance(generated_questions_answers, list):
+                generated_questions_answers, _ = cp.pack_items(
+                    generated_questions_answers, cp.get_budget('Agent7', context_token_budget), logger, agent_name='Agent7'
+                )
 
             response_schema = {
                 "type": "OBJECT",
@@ -1590,51 +2356,79 @@ class SupportAgent:
 }}
             """
 
-            ag7_resp = vai.get_prompt_response(
-                ag7_prompt, logger, model_name=llm_model_name, location=llm_server_location,
-                response_schema=response_schema,
-                google_key_config_path=google_key_config_path, system_instruction=system_instructions
-            )
+            return {
+                "prompt": ag7_prompt,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path,
+                "system_instruction": system_instructions
+            }
+
+        @classmethod
+        def agent7(
+                cls, customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
+                generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            logger.info(f'Support agent7 called with the following ticket_description: \n{ticket_description}')
 
+            ag7_request = cls._agent7_request(
+                customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
+                generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path=google_key_config_path
+            )
+            ag7_resp = vai.get_prompt_response(logger=logger, **ag7_request)
             logger.info(f"Agent7 response: \n{ag7_resp}")
 
-            try:
-                start_index = ag7_resp.find('{')
-                end_index = ag7_resp.rfind('}')
-                ag7_resp = ag7_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag7_resp = None
+            return cls._trim_json_resp(ag7_resp, logger, "agent7")
+
+        @classmethod
+        async def agent7_async(
+                cls, customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
+                generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """Awaitable twin of agent7."""
+            logger.info(f'Support agent7 called with the following ticket_description: \n{ticket_description}')
+
+            ag7_request = await ep.run_db(
+                cls._agent7_request, customer_name, product_name, ticket_description, initial_analysis, nosql_conn,
+                logger, generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path=google_key_config_path
+            )
+            ag7_resp = await vai.get_prompt_response_async(logger=logger, **ag7_request)
+            logger.info(f"Agent7 response: \n{ag7_resp}")
 
-            return ag7_resp
+            return cls._trim_json_resp(ag7_resp, logger, "agent7")
 
         @classmethod
-        def agent8(cls, ticket_description, customer_id, process_name, process_flow,
-                   product_name, additional_questions, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
-            logger.info(
-                f'Support agent8 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+        async def agent7_stream(
+                cls, customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
+                generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+        ):
+            """Streaming twin of agent7; yields the raw JSON response chunk by chunk."""
+            logger.info(f'Support agent7 streaming called with the following ticket_description: \n{ticket_description}')
 
-            prompt_config_query = f"""
-                SELECT 
-                    system_instruction, 
-                    response_schema,
-                    input_prompt,
-                    llm_model_name,
-                    llm_server_location, 
-                    nearest_neighbours
-                FROM WAIAgentPromptsConfig
-                WHERE customer = '{customer_id}'
-                and prompt_level = 'Agent8'
-                and product_name = '{product_name}'
-            """
+            ag7_request = await ep.run_db(
+                cls._agent7_request, customer_name, product_name, ticket_description, initial_analysis, nosql_conn,
+                logger, generated_questions_answers, chat_summary, chat_history, support_agent_query,
+                google_key_config_path=google_key_config_path
+            )
+            async for chunk in vai.stream_prompt_response_async(logger=logger, **ag7_request):
+                yield chunk
 
+        @classmethod
+        def _agent8_request(cls, ticket_description, customer_id, process_name, process_flow,
+                            product_name, additional_questions, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
             try:
-                prompt_config_details = tm.execute_select_query(nosql_conn, prompt_config_query)
-                system_instructions = prompt_config_details[0].get('system_instruction')
-                llm_model_name = prompt_config_details[0].get('llm_model_name')
-                llm_server_location = prompt_config_details[0].get('llm_server_location')
+                prompt_config_details = pcr.get_config(nosql_conn, customer_id, product_name, 'Agent8', logger)
+                system_instructions = prompt_config_details.get('system_instruction')
+                llm_model_name = prompt_config_details.get('llm_model_name')
+                llm_server_location = prompt_config_details.get('llm_server_location')
             except Exception as e:
-                logger.error(f"Agent8 prompt is not configured. Error: {e}\nprompt_config_query: {prompt_config_query}")
+                logger.error(f"Agent8 prompt is not configured. Error: {e}")
                 return None
 
             response_schema = {
@@ -1683,22 +2477,49 @@ class SupportAgent:
     }}
             '''
 
-            ag8_resp = vai.get_prompt_response(
-                ag8_prompt, logger, system_instruction=system_instructions, model_name=llm_model_name,
-                location=llm_server_location, response_schema=response_schema,
-                google_key_config_path=google_key_config_path
+            return {
+                "prompt": ag8_prompt,
+                "system_instruction": system_instructions,
+                "model_name": llm_model_name,
+                "location": llm_server_location,
+                "response_schema": response_schema,
+                "google_key_config_path": google_key_config_path
+            }
+
+        @classmethod
+        def agent8(cls, ticket_description, customer_id, process_name, process_flow,
+                   product_name, additional_questions, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            logger.info(
+                f'Support agent8 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+
+            ag8_request = cls._agent8_request(
+                ticket_description, customer_id, process_name, process_flow, product_name, additional_questions,
+                nosql_conn, logger, google_key_config_path=google_key_config_path
             )
+            if ag8_request is None:
+                return None
+            ag8_resp = vai.get_prompt_response(logger=logger, **ag8_request)
             logger.info(f"Support agent8 resp: \n {ag8_resp}")
 
-            try:
-                start_index = ag8_resp.find('{')
-                end_index = ag8_resp.rfind('}')
-                ag8_resp = ag8_resp[start_index:end_index + 1]
-            except Exception as e:
-                logger.error(f"Error occurred while parsing agent1 response: {e}")
-                ag8_resp = None
+            return cls._trim_json_resp(ag8_resp, logger, "agent8")
+
+        @classmethod
+        async def agent8_async(cls, ticket_description, customer_id, process_name, process_flow,
+                               product_name, additional_questions, nosql_conn, logger, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+            """Awaitable twin of agent8."""
+            logger.info(
+                f'Support agent8 called with the following ticket: \n Ticket description: {ticket_description}\nCustomer ID: {customer_id}\nProcess Name: {process_name}\nProccess Flow: {process_flow}')
+
+            ag8_request = await ep.run_db(
+                cls._agent8_request, ticket_description, customer_id, process_name, process_flow, product_name,
+                additional_questions, nosql_conn, logger, google_key_config_path=google_key_config_path
+            )
+            if ag8_request is None:
+                return None
+            ag8_resp = await vai.get_prompt_response_async(logger=logger, **ag8_request)
+            logger.info(f"Support agent8 resp: \n {ag8_resp}")
 
-            return ag8_resp
+            return cls._trim_json_resp(ag8_resp, logger, "agent8")
 
         @classmethod
         def complete_response_analyzer(
@@ -1825,7 +2646,7 @@ class SupportAgent:
             logger.error(f"Loading comments failed. Error: {e}")
             processed_comments = 0
 
-        chat_summary = cls.Agents.agent5(
+        chat_summary = await cls.Agents.agent5_async(
             customer_name, product_name, ticket_desc, ticket_comments, [], '',
             ai_comments, nosql_conn, logger, google_key_config_path=google_key_config_path
         )
@@ -1848,10 +2669,12 @@ class SupportAgent:
         }
         logger.info(f"insert_ticket_summary_query: {insert_ticket_summary_query}")
         try:
-            inert_flg = tm.execute_insert_query(nosql_conn, insert_ticket_summary_query, 'TicketSummary')
+            inert_flg = await ep.run_db(tm.execute_insert_query, nosql_conn, insert_ticket_summary_query, 'TicketSummary')
         except Exception as e:
             logger.error(
                 f"Failed to insert chat summary for chat id: {chat_id}. Error details: {e}")
+        finally:
+            ssc.invalidate(chat_id=chat_id)
 
 
 if __name__ == '__main__':
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 import time
 from vertexai.generative_models import Part
 import asyncio
+import threading
+import concurrent.futures
 from borneo import PutRequest
 import mimetypes
 import uuid
@@ -17,7 +19,12 @@ from src.app.services.embeddingActivites import EmbeddingManager as em
 from src.app.chatbot.aiAgents import SalesAgent as sa
 from src.app.chatbot.aiAgents import SupportAgent as supa
 from src.app.services.nosqlConnection import NoSQLTableManager as tm
+from src.app.services.contentCache import ContentCache as cc
+from src.app.services.chatWriteBehind import ChatWriteBehind as cwb
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+from src.app.services.executionPools import ExecutionPools as ep
 from src.app.utils.pdfStringExtract import PDFProcessor as pdfp
+from src.app.utils.streamUtils import JsonFieldStreamer
 
 
 class PDFProcessingService:
@@ -44,6 +51,10 @@ class PDFProcessingService:
 
 class ChatOperations:
     """"""
+    SESSION_COLUMNS = ('session_id', 'chat_id', 'user_name', 'start_time', 'end_time', 'meta_data')
+    MESSAGE_COLUMNS = (
+        'message_id', 'user_message', 'response', 'message_time', 'response_time', 'nearest_neighbours', 'error_msg'
+    )
 
     @classmethod
     def generate_chat_id(cls):
@@ -51,8 +62,8 @@ class ChatOperations:
 
     @classmethod
     def get_chat_id(cls, issue_id: str, nosql_conn):
-        chat_id_q = f"SELECT chat_id FROM ChatSessions WHERE issue_id = '{issue_id}'"
-        new_chat_id = tm.execute_select_query(nosql_conn, chat_id_q)
+        chat_id_q = "SELECT chat_id FROM ChatSessions WHERE issue_id = $issue_id"
+        new_chat_id = tm.execute_select_query(nosql_conn, chat_id_q, {'issue_id': issue_id})
         try:
             new_chat_id = new_chat_id[0].get('chat_id')
             chat_id = new_chat_id
@@ -61,104 +72,117 @@ class ChatOperations:
             raise e
 
     @classmethod
-    def get_chat_history(cls, chat_id, nosql_conn, logger, issue_id=None):
-        logger.info(
-            f"Getting chat history for chat_id: {chat_id} and issue_id: {issue_id}"
-        )
+    def _get_chat_session(cls, chat_id, nosql_conn, issue_id=None):
+        """
+        Reads the session of a chat: by primary key for a chat_id, with one query for an issue_id.
 
+        Returns:
+        tuple: (session row with the columns of SESSION_COLUMNS or None, number of sessions found).
+        """
         if issue_id:
-            prv_chats_cnt_q = f"SELECT count(1) as count FROM ChatSessions WHERE issue_id = '{issue_id}'"
+            sessions = tm.execute_select_query(
+                nosql_conn,
+                f"SELECT {', '.join(cls.SESSION_COLUMNS)} FROM ChatSessions WHERE issue_id = $issue_id",
+                {'issue_id': issue_id}
+            )
         else:
-            prv_chats_cnt_q = f"SELECT count(1) as count FROM ChatSessions WHERE chat_id = '{chat_id}'"
+            sessions = [
+                session for session in tm.get_rows_by_key(nosql_conn, 'ChatSessions', [{'chat_id': chat_id}])
+                if session is not None
+            ]
 
+        if not sessions:
+            return None, 0
+        return {column: sessions[0].get(column) for column in cls.SESSION_COLUMNS}, len(sessions)
+
+    @classmethod
+    def _get_chat_feedback(cls, chat_id, nosql_conn, logger):
+        """Returns the feedback of every message of the chat, read with one query, by integer message_id."""
+        feedback_query = "SELECT message_id, feedback FROM ChatFeedback WHERE chat_id = $chat_id"
         try:
-            prv_chats_cnt = tm.execute_select_query(nosql_conn, prv_chats_cnt_q)
-            prv_chats_cnt = prv_chats_cnt[0].get('count')
+            return {
+                int(each_feedback.get('message_id')): each_feedback.get('feedback')
+                for each_feedback in tm.execute_select_query(nosql_conn, feedback_query, {'chat_id': chat_id})
+            }
         except Exception as e:
-            logger.error(f"Error occurred while getting previous chat count. error: {e}\nchat session count query: {prv_chats_cnt_q}")
-            prv_chats_cnt = 0
+            logger.warning(f"Unable to get the feedback of chat id: {chat_id}\nError: {e}")
+            return {}
+
+    @classmethod
+    def get_chat_history(cls, chat_id, nosql_conn, logger, issue_id=None):
+        """
+        Loads a chat session with its messages and the feedback of each message.
+
+        The session, the messages and the feedback are read with one round trip each and joined in memory, whatever
+        the number of messages. Rows still queued in ChatWriteBehind take precedence over the stored ones.
+
+        Returns:
+        tuple: (session details with their 'messages', or {} when the chat has no messages; number of sessions of
+            the issue_id, or of the chat_id when no issue_id is given).
+        """
+        logger.info(
+            f"Getting chat history for chat_id: {chat_id} and issue_id: {issue_id}"
+        )
 
+        pending_session, pending_msgs = cwb.get_pending(chat_id, issue_id=issue_id)
+        try:
+            if pending_session is not None:
+                # The chat's last turn is not stored yet; its queued session is the newest.
+                session_details = {column: pending_session.get(column) for column in cls.SESSION_COLUMNS}
+                prv_chats_cnt = 1
+            else:
+                session_details, prv_chats_cnt = cls._get_chat_session(chat_id, nosql_conn, issue_id=issue_id)
+        except Exception as e:
+            logger.error(f"Error occurred while getting the chat session. error: {e}")
+            return {}, 0
+
+        if session_details is None:
+            return {}, 0
+        chat_id = session_details.get('chat_id')
+
+        prv_chats_query = """
+        select 
+            message_id, 
+            user_message, 
+            response, 
+            message_time, 
+            response_time, 
+            nearest_neighbours, 
+            error_msg 
+        from ChatMessages WHERE chat_id = $chat_id
+        """
         try:
-            if issue_id:
-                chat_id_q = f"SELECT chat_id FROM ChatSessions WHERE issue_id = '{issue_id}'"
-                new_chat_id = tm.execute_select_query(nosql_conn, chat_id_q)
-                new_chat_id = new_chat_id[0].get('chat_id')
-                chat_id = new_chat_id
-
-            prv_chats_query = f"""
-            select 
-                message_id, 
-                user_message, 
-                response, 
-                message_time, 
-                response_time, 
-                nearest_neighbours, 
-                error_msg 
-            from ChatMessages WHERE chat_id = '{chat_id}'
-            order by message_id
-            """
-
-            prv_chats = tm.execute_select_query(nosql_conn, prv_chats_query)
+            prv_chats = tm.execute_select_query(nosql_conn, prv_chats_query, {'chat_id': chat_id})
         except Exception as e:
             logger.error(f"Error occurred while getting previous chats. error: {e}")
             prv_chats = None
 
+        if pending_msgs:
+            chats_by_id = {int(chat['message_id']): chat for chat in prv_chats or []}
+            for msg in pending_msgs:
+                chats_by_id[int(msg['message_id'])] = {column: msg.get(column) for column in cls.MESSAGE_COLUMNS}
+            prv_chats = list(chats_by_id.values())
+
         chat_hist = {}
         if prv_chats:
             try:
-                session_details_q = f"""
-                SELECT 
-                    session_id, 
-                    chat_id, 
-                    user_name, 
-                    start_time, 
-                    end_time, 
-                    meta_data 
-                FROM ChatSessions 
-                WHERE chat_id = '{chat_id}'
-                """
-                session_details = tm.execute_select_query(nosql_conn, session_details_q)
-                session_details = session_details[0]
-                for item in prv_chats:
-                    item["message_id"] = int(item["message_id"])
-
-                prv_chats = sorted(prv_chats, key=lambda x: x["message_id"])
+                msg_feedback = cls._get_chat_feedback(chat_id, nosql_conn, logger)
+                prv_chats = sorted(prv_chats, key=lambda x: int(x["message_id"]))
 
                 for chat in prv_chats:
-                    try:
-                        msg_feedback_query = f"""
-                        SELECT 
-                            feedback 
-                        FROM ChatFeedback 
-                        where chat_id = '{chat_id}' 
-                            and message_id = {int(chat.get('message_id'))}
-                        """
-                        msg_feedback = tm.execute_select_query(nosql_conn, msg_feedback_query)
-                        msg_feedback = msg_feedback[0].get('feedback')
-                    except Exception as e:
-                        logger.warning(
-                            f"Unable to find feedback for \nchat id: {chat_id}\nmessage id: {chat.get('message_id')}"
-                            f"\nError: {e}"
-                        )
-                        msg_feedback = {}
-
-                    chat['message_id'] = str(chat.pop('message_id', ''))
+                    chat['message_id'] = str(int(chat.pop('message_id', '')))
                     chat['user_message'] = chat.pop('user_message', '')
                     chat['response'] = chat.get('response', '')
                     chat['message_time'] = chat.pop('message_time', '') #.strftime('%Y-%m-%d %H:%M:%S.%f')
                     chat['response_time'] = chat.get('response_time', '') #.strftime('%Y-%m-%d %H:%M:%S.%f')
                     chat['nearest_neighbours'] = chat.get('nearest_neighbours', '')
                     chat['error_msg'] = chat.get('error_msg', '')
-                    chat['feedback'] = msg_feedback
+                    chat['feedback'] = msg_feedback.get(int(chat['message_id']), {})
 
-                session_details['start_time'] = session_details.get('start_time') #.strftime('%Y-%m-%d %H:%M:%S.%f')
-                session_details['end_time'] = session_details.get('end_time') #.strftime('%Y-%m-%d %H:%M:%S.%f')
                 session_details['messages'] = prv_chats
-
                 chat_hist = session_details
             except Exception as e:
                 logger.error(f"Failed to get the chat history from DB. Error details: {e}")
-            # print(f"chat_hist: {chat_hist}")
         return chat_hist, prv_chats_cnt
 
     @classmethod
@@ -251,9 +275,11 @@ class ChatOperations:
     def _update_chat(cls, full_chat, resp, message_id, error_msg, logger):
         logger.info('Update chat function called.')
         try:
-            full_chat['messages'][message_id - 1]['response'] = resp
-            full_chat['messages'][message_id - 1]['response_time'] = datetime.now(timezone.utc).isoformat(timespec='microseconds')
-            full_chat['messages'][message_id - 1]['error_msg'] = error_msg
+            # Looked up by id: a chat served from SessionStateCache holds only its latest messages.
+            message = next(msg for msg in full_chat['messages'] if int(msg['message_id']) == int(message_id))
+            message['response'] = resp
+            message['response_time'] = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+            message['error_msg'] = error_msg
             full_chat['end_time'] = datetime.now(timezone.utc).isoformat(timespec='microseconds')
         except Exception as e:
             logger.error(f"Error executing while updating chat: {e}")
@@ -262,76 +288,42 @@ class ChatOperations:
 
     @classmethod
     def _store_chat_db(cls, prv_chats_cnt, full_chat, session_id, chat_id, nosql_conn, logger, issue_id=''):
-        logger.info('Store chat to db function called.')
-        # print(f"prv_chats_cnt: {prv_chats_cnt}")
-        # db_cursor.setinputsizes(chat=oracledb.DB_TYPE_CLOB)
+        """
+        Hands the session and the last message of the chat to ChatWriteBehind, which stores them after the response
+        is returned. Both rows are full puts, so a new chat (prv_chats_cnt == 0) and an existing one are stored alike.
 
-        if prv_chats_cnt == 0:
-            session_insertion_data = {
-                "session_id": session_id,
-                "chat_id": chat_id,
-                "user_name": full_chat.get('user_name'),
-                "start_time":full_chat.get('start_time'),
-                "end_time":full_chat.get('end_time'),
-                "meta_data":full_chat.get('meta_data')
-            }
-            if issue_id:
-                session_insertion_data['issue_id'] = issue_id
+        Returns:
+        bool: True once the rows are queued.
+        """
+        logger.info('Store chat to db function called.')
 
-            # print(f"full_chat: {full_chat}")
+        session_data = {
+            "session_id": session_id,
+            "chat_id": chat_id,
+            "user_name": full_chat.get('user_name'),
+            "start_time": full_chat.get('start_time'),
+            "end_time": full_chat.get('end_time'),
+            "meta_data": full_chat.get('meta_data')
+        }
+        if issue_id:
+            session_data['issue_id'] = issue_id
 
-            try:
-                # print(f"session_insertion_data: {session_insertion_data}")
-                insertion_flg = tm.execute_insert_query(nosql_conn, session_insertion_data, 'ChatSessions')
-                # for each_msg in full_chat.get('messages'):
-                each_msg = full_chat.get('messages')[-1]
-                msg_insertion_data = {
-                    "chat_id": full_chat.get('chat_id'),
-                    "message_id": each_msg.get('message_id'),
-                    "user_message": each_msg.get('user_message'),
-                    "response": each_msg.get('response'),
-                    "message_time": each_msg.get('message_time'),
-                    "response_time": each_msg.get('response_time'),
-                    "nearest_neighbours": each_msg.get('nearest_neighbours'),
-                    "error_msg": each_msg.get('error_msg')
-                }
-                # print(f"msg_insertion_data: {msg_insertion_data}")
-                msg_insert_flg = tm.execute_insert_query(nosql_conn, msg_insertion_data, 'ChatMessages')
-            except Exception as e:
-                logger.error(f"Error executing while inserting chats to db: {e}")
-                return False
-        else:
-            session_update_data = {
-                "session_id": session_id,
-                "chat_id": chat_id,
-                "user_name": full_chat.get('user_name'),
-                "start_time":full_chat.get('start_time'),
-                "end_time":full_chat.get('end_time'),
-                "meta_data":full_chat.get('meta_data')
+        try:
+            each_msg = full_chat.get('messages')[-1]
+            msg_insertion_data = {
+                "chat_id": full_chat.get('chat_id'),
+                "message_id": each_msg.get('message_id'),
+                "user_message": each_msg.get('user_message'),
+                "response": each_msg.get('response'),
+                "message_time": each_msg.get('message_time'),
+                "response_time": each_msg.get('response_time'),
+                "nearest_neighbours": each_msg.get('nearest_neighbours'),
+                "error_msg": each_msg.get('error_msg')
             }
-            if issue_id:
-                session_update_data['issue_id'] = issue_id
-
-            try:
-                update_flg = tm.execute_update_query(nosql_conn, session_update_data, 'ChatSessions')
-                # for each_msg in full_chat.get('messages'):
-                each_msg = full_chat.get('messages')[-1]
-                msg_insertion_data = {
-                    "chat_id": full_chat.get('chat_id'),
-                    "message_id": each_msg.get('message_id'),
-                    "user_message": each_msg.get('user_message'),
-                    "response": each_msg.get('response'),
-                    "message_time": each_msg.get('message_time'),
-                    "response_time": each_msg.get('response_time'),
-                    "nearest_neighbours": each_msg.get('nearest_neighbours'),
-                    "error_msg": each_msg.get('error_msg')
-                }
-                msg_insert_flg = tm.execute_insert_query(nosql_conn, msg_insertion_data, 'ChatMessages')
-            except Exception as e:
-                logger.error(f"Error executing while updating chats to db: {e}\nfull chat: {full_chat}")
-                return False
-
-        return True
+            return cwb.enqueue(chat_id, session_data, [msg_insertion_data], issue_id=issue_id, nosql_conn=nosql_conn)
+        except Exception as e:
+            logger.error(f"Error executing while storing chats to db: {e}\nfull chat: {full_chat}")
+            return False
 
     @classmethod
     def _get_prev_msgs(cls, prev_chat, logger, prv_chat_cnt=3):
@@ -377,9 +369,16 @@ class ChatOperations:
     def get_chat_response(cls, chat_id, message_id, nosql_conn, logger):
         logger.info(f"Getting the chat response function called.")
 
+        _, pending_msgs = cwb.get_pending(chat_id)
+        for msg in pending_msgs:
+            if str(msg.get('message_id')) == str(message_id):
+                return msg.get('response')
+
         try:
-            chat_text_query = f"select response from ChatMessages WHERE chat_id = '{chat_id}' and message_id = '{message_id}'"
-            chat_text = tm.execute_select_query(nosql_conn, chat_text_query)
+            chat_text_query = "select response from ChatMessages WHERE chat_id = $chat_id and message_id = $message_id"
+            chat_text = tm.execute_select_query(
+                nosql_conn, chat_text_query, {'chat_id': chat_id, 'message_id': str(message_id)}
+            )
             chat_text = chat_text[0].get('response')
         except Exception as e:
             logger.error(f"Failed to get the message response for \nchat id: {chat_id}\nmessage id: {message_id}\nError: {e}")
@@ -415,18 +414,11 @@ class SalesChatBot(ChatOperations):
                 db_cursor.execute(content_questions_query)
                 questions_data = db_cursor.fetchall()
 
-            def process_question(question: Tuple[int, str]):
-                query_id, query = question
+            def process_question(question: Tuple[int, str, list]):
+                query_id, query, query_embedding = question
                 logger.info(f'Thread started: query_id={query_id}, query={query}')
 
                 try:
-                    query_embedding = em.get_embedding(
-                        str(query), logger,
-                        embedding_model='text-embedding-005',
-                        dimensions=256,
-                        google_key_config_path=google_key_config_path
-                    )
-
                     if not query_embedding:
                         logger.warning(f"No embedding found for query_id={query_id}")
                         return
@@ -440,8 +432,22 @@ class SalesChatBot(ChatOperations):
                 except Exception as e:
                     logger.exception(f"Error in thread for query_id={query_id}: {str(e)}")
 
-            with ThreadPoolExecutor(max_workers=20) as executor:
-                executor.map(process_question, questions_data)
+            # Embed in pages so a large backfill does not hold every vector in memory at once.
+            page_size = 1000
+            for start in range(0, len(questions_data), page_size):
+                page = questions_data[start:start + page_size]
+                page_embeddings = em.get_embeddings_batch(
+                    [str(query) for _, query in page], logger,
+                    embedding_model='text-embedding-005',
+                    dimensions=256,
+                    google_key_config_path=google_key_config_path
+                )
+
+                with ThreadPoolExecutor(max_workers=20) as executor:
+                    executor.map(
+                        process_question,
+                        [(query_id, query, embedding) for (query_id, query), embedding in zip(page, page_embeddings)]
+                    )
 
         @classmethod
         def _update_question_embedding_db(cls, embedding, query_id, conn, logger):
@@ -449,7 +455,7 @@ class SalesChatBot(ChatOperations):
             Updates the embedding for a question in the database.
             """
             logger.info('update_question_embedding_db() called.')
-            embedding = json.dumps(embedding)
+            embedding = em.to_vector(embedding)
             update_query = (
                 "update SALES_CONTENT_EMBEDDING_NEW set embedding = :embedding where query_id = :query_id"
             )
@@ -557,7 +563,8 @@ class SalesChatBot(ChatOperations):
 
             questions = pr.get_prompt_response(questionnaire_prompt, logger,
                                                google_key_config_path=google_key_config_path,
-                                               response_schema=response_schema, system_instruction=system_instructions)
+                                               response_schema=response_schema, system_instruction=system_instructions,
+                                               use_cache=True)
 
             try:
                 start_index = questions.find('{')
@@ -753,7 +760,8 @@ class SalesChatBot(ChatOperations):
                 pdf_content = pr.get_prompt_response(
                     contents, logger, model_name='gemini-2.0-flash',
                     system_instruction=system_instruction,
-                    google_key_config_path=google_key_config_path
+                    google_key_config_path=google_key_config_path,
+                    use_cache=True
                 )
 
                 try:
@@ -822,7 +830,7 @@ class SalesChatBot(ChatOperations):
                     try:
                         response = pr.get_prompt_response(prompt, logger, google_key_config_path=google_key_config_path,
                                                           system_instruction=system_instruction,
-                                                          response_schema=response_schema)
+                                                          response_schema=response_schema, use_cache=True)
 
                         start_index = response.find('{')
                         end_index = response.rfind('}') + 1
@@ -864,16 +872,25 @@ class SalesChatBot(ChatOperations):
             # print(f"categorized_questions: {categorized_questions}")
             logger.info(f"Categorized questions: {categorized_questions}")
 
-            r_specific_responses = sa.GetContents.get_specific_questions_contents(
-                categorized_questions['all_specific_questions'], db_cursor, logger,
-                nearest_neighbours=nearest_neighbours,
-                google_key_config_path=google_key_config_path,
-                model_name=model_name
-            )
-            # print(f"specific_responses: {r_specific_responses}")
+            # Generic questions need no retrieval, so they are answered in a worker while the specific questions
+            # are retrieved and answered here; both groups share one limit on concurrent model calls.
+            llm_limiter = threading.BoundedSemaphore(sa.GetContents.max_concurrent_llm_calls)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                generic_future = executor.submit(
+                    sa.GetContents.get_generic_questions_contents,
+                    categorized_questions['all_generic_questions'], logger,
+                    google_key_config_path=google_key_config_path, llm_limiter=llm_limiter
+                )
+                r_specific_responses = sa.GetContents.get_specific_questions_contents(
+                    categorized_questions['all_specific_questions'], db_cursor, logger,
+                    nearest_neighbours=nearest_neighbours,
+                    google_key_config_path=google_key_config_path,
+                    model_name=model_name,
+                    llm_limiter=llm_limiter
+                )
+                # print(f"specific_responses: {r_specific_responses}")
 
-            r_generic_responses = sa.GetContents.get_generic_questions_contents(
-                categorized_questions['all_generic_questions'], logger, google_key_config_path=google_key_config_path)
+                r_generic_responses = generic_future.result()
             # print(f"generic_responses: {r_generic_responses}")
 
             final_content = []
@@ -936,6 +953,95 @@ class SalesChatBot(ChatOperations):
 
         return prompt_resp
 
+    @classmethod
+    async def _basic_search_async(cls, user_query, model_name, google_key_config_path, nearest_neighbours, db_cursor,
+                                  logger, specific_details='WinfoBots', previous_conversation=''):
+        """Awaitable twin of _basic_search."""
+        logger.info("Sales Bot started with async basic search.")
+        user_query = ut.clean_string(user_query).lower()
+        prompt_resp = await sa.Agents.basic_agent_async(
+                user_query, db_cursor, logger, model_name=model_name,
+                specific_details=specific_details, google_key_config_path=google_key_config_path,
+                nearest_neighbours=nearest_neighbours, previous_conversation=previous_conversation
+            )
+
+        return prompt_resp
+
+    @classmethod
+    async def _advanced_search_async(cls, user_query, model_name, google_key_config_path, nearest_neighbours,
+                                     db_cursor, logger, previous_conversation=''):
+        """Awaitable twin of _advanced_search built on the async agents."""
+        logger.info('Sales Bot started with async advanced search.')
+        try:
+            res_ag1 = await sa.Agents.agent1_async(user_query, logger, model_name=model_name,
+                                                   google_key_config_path=google_key_config_path,
+                                                   previous_conversation=previous_conversation)
+
+            res_ag1 = json.loads(res_ag1)
+            ls_ag1 = res_ag1['questions_to_answer']
+
+            res_ag2 = await sa.Agents.agent2_async(user_query, ls_ag1, logger, model_name=model_name,
+                                                   google_key_config_path=google_key_config_path,
+                                                   previous_conversation=previous_conversation)
+            logger.info(f"Final agent2 response: {res_ag2}")
+
+            categorized_questions = sa.GetContents.categorize_questions(res_ag2, logger)
+            logger.info(f"Categorized questions: {categorized_questions}")
+
+            llm_limiter = asyncio.Semaphore(sa.GetContents.max_concurrent_llm_calls)
+            r_specific_responses, r_generic_responses = await asyncio.gather(
+                sa.GetContents.get_specific_questions_contents_async(
+                    categorized_questions['all_specific_questions'], db_cursor, logger,
+                    nearest_neighbours=nearest_neighbours,
+                    google_key_config_path=google_key_config_path,
+                    model_name=model_name,
+                    llm_limiter=llm_limiter
+                ),
+                sa.GetContents.get_generic_questions_contents_async(
+                    categorized_questions['all_generic_questions'], logger,
+                    google_key_config_path=google_key_config_path, llm_limiter=llm_limiter
+                )
+            )
+
+            final_content = []
+            if len(r_specific_responses) > 0:
+                final_content.extend(r_specific_responses)
+
+            if len(r_generic_responses) > 0:
+                dist_sub_questions = []
+                for each in final_content:
+                    dist_sub_questions.append(each['ag1_question'])
+
+                for each_generic_response in r_generic_responses:
+                    if each_generic_response['ag1_question'] in dist_sub_questions:
+                        final_content[dist_sub_questions.index(each_generic_response['ag1_question'])][
+                            'response'] += f"\n\n{each_generic_response['response']}"
+                    else:
+                        final_content.append(each_generic_response)
+
+            f_res = ""
+            retry = True
+            retry_count = 0
+            while retry:
+                ag4_resp = await sa.Agents.agent4_async(user_query, final_content, '', logger, model_name=model_name,
+                                                        google_key_config_path=google_key_config_path,
+                                                        previous_conversation=previous_conversation)
+                f_res += f"\n{ag4_resp['response']}"
+                retry_count += 1
+                if str(ag4_resp['finished_response']).lower() == 'yes' or retry_count == 5:
+                    retry = False
+
+            if len(categorized_questions['all_more_info_questions']) > 0:
+                for each_more_info_questions in categorized_questions['all_more_info_questions']:
+                    sub_questions = each_more_info_questions['sub_questions']
+                    if len(sub_questions) > 0:
+                        for each_more_info_question in sub_questions:
+                            f_res += f"\n\n{each_more_info_question}"
+        except Exception as e:
+            logger.error(f'Failed to complete advanced search for the user question. Error details: {e}')
+            f_res = ''
+
+        return f_res
 
     @classmethod
     async def sales_chatbot(cls, data, conn, logger, model_name='gemini-2.0-flash-001', nearest_neighbours=50, google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
@@ -967,7 +1073,7 @@ class SalesChatBot(ChatOperations):
 
                 if not chat_id:
                     return 'Unable to fetch the response. Please contact support team.', '', ''
-                prev_chat, prv_chats_cnt = cls.get_chat_history(chat_id, conn, logger)
+                prev_chat, prv_chats_cnt = await ep.run_db(cls.get_chat_history, chat_id, conn, logger)
                 # print(f"prev_chat before adding new msg: {prev_chat}")
                 # print(f"prv_chats_cnt: {prv_chats_cnt}")
 
@@ -981,9 +1087,9 @@ class SalesChatBot(ChatOperations):
                 # print(f"prev_chat after adding new msg: {prev_chat}")
                 # print(f"query_id: {query_id}")
                 if str(query_level).lower() == 'advanced':
-                    f_res = cls._advanced_search(user_query, model_name, google_key_config_path, nearest_neighbours, db_cursor, logger, previous_conversation=previous_conversation)
+                    f_res = await cls._advanced_search_async(user_query, model_name, google_key_config_path, nearest_neighbours, db_cursor, logger, previous_conversation=previous_conversation)
                 elif str(query_level).lower() == 'basic':
-                    f_res = cls._basic_search(user_query, model_name, google_key_config_path, nearest_neighbours, db_cursor, logger, previous_conversation=previous_conversation, specific_details=product_name)
+                    f_res = await cls._basic_search_async(user_query, model_name, google_key_config_path, nearest_neighbours, db_cursor, logger, previous_conversation=previous_conversation, specific_details=product_name)
                 else:
                     error_msg = f"Invalid query level: {query_level}. Please enter 'basic' or 'advanced'."
             except Exception as e:
@@ -993,11 +1099,65 @@ class SalesChatBot(ChatOperations):
             full_chat = cls._update_chat(prev_chat, f_res, query_id, error_msg, logger)
             # print(f"full_chat: {full_chat}")
             # print(f"prv_chats_cnt: {prv_chats_cnt}")
-            store_chat_status = cls._store_chat_db(prv_chats_cnt, full_chat, session_id, chat_id, db_cursor, logger)
+            store_chat_status = await ep.run_db(
+                cls._store_chat_db, prv_chats_cnt, full_chat, session_id, chat_id, db_cursor, logger
+            )
             logger.info(f"Store chat status: {store_chat_status}")
 
         return f_res, chat_id, query_id
 
+    @classmethod
+    async def sales_chatbot_stream(cls, data, conn, nosql_conn, logger, model_name='gemini-2.0-flash-001',
+                                   nearest_neighbours=50,
+                                   google_key_config_path='../configuration/Google_Key(WinfoBots).json'):
+        """
+        Streaming variant of the basic sales chatbot. Yields (event, payload) tuples: 'start', 'token' events
+        with the agent3 markdown as Gemini produces it, and 'end' with the full response once it has been stored.
+        """
+        if not data or not data.get('chat_id'):
+            logger.error('No data or chat id received in the request.')
+            yield 'error', {"data": 'Unable to fetch the response. Please contact support team.'}
+            return
+
+        user_query = data.get('question')
+        session_id = data.get('session_id')
+        user_name = data.get('user_name')
+        product_name = data.get('product_name')
+        chat_id = data.get('chat_id')
+
+        prev_chat, prv_chats_cnt = await ep.run_db(cls.get_chat_history, chat_id, nosql_conn, logger)
+        if not prev_chat:
+            prev_chat = cls._initiate_chat(session_id, chat_id, user_name, model_name, f'{product_name} Pre-Sales Agent', 'Basic', logger)
+            previous_conversation = ''
+        else:
+            previous_conversation = cls.prev_chats_list(prev_chat, logger, prev_chat_cnt=3)
+
+        prev_chat, query_id = cls._add_message_to_chat(prev_chat, user_query, nearest_neighbours, logger)
+        yield 'start', {"chat_id": chat_id, "query_id": query_id}
+
+        error_msg = ''
+        f_res = ''
+        try:
+            with conn.cursor() as db_cursor:
+                async for chunk in sa.Agents.basic_agent_stream(
+                        user_query, db_cursor, logger, model_name=model_name, specific_details=product_name,
+                        google_key_config_path=google_key_config_path, nearest_neighbours=nearest_neighbours,
+                        previous_conversation=previous_conversation
+                ):
+                    f_res += chunk
+                    yield 'token', {"data": chunk}
+        except Exception as e:
+            logger.error(f'Failed to stream bot response. Error details: {e}')
+            error_msg = f"Error occurred while streaming bot response. Error details: {e}"
+
+        full_chat = cls._update_chat(prev_chat, f_res, query_id, error_msg, logger)
+        store_chat_status = await ep.run_db(
+            cls._store_chat_db, prv_chats_cnt, full_chat, session_id, chat_id, nosql_conn, logger
+        )
+        logger.info(f"Store chat status: {store_chat_status}")
+
+        yield 'end', {"data": f_res, "chat_id": chat_id, "query_id": query_id}
+
 
 class SupportChatBot(ChatOperations):
     """"""
@@ -1017,24 +1177,212 @@ class SupportChatBot(ChatOperations):
 
         error_msg = ''
 
-        if data:
-            user_message = data.get('user_message')
-            session_id = data.get('session_id')
-            chat_id = data.get('chat_id')
-            user_name = data.get('user_name')
-            jira_ticket_id = data.get('issue_id').strip()
-            customer_name = data.get('customer_name')
-            product_name = data.get('product_name')
-            sub_process = ''
-            ticket_description = ''
-            ticket_status = ''
-            ticket_comments = ''
-            process_name = ''
-            initial_analysis = ''
-        else:
+        if not data:
             logger.error('No data received in the request.')
             return '', '', ''
 
+        if not data.get('chat_id'):
+            return 'Unable to fetch the response. Please contact support team.', '', ''
+
+        chat_ctx = await cls._load_support_chat(
+            data, ai_db_conn, nosql_conn, logger, model_name, nearest_neighbours, google_key_config_path
+        )
+
+        try:
+            f_res = await cls._advanced_search_async(
+                chat_ctx['user_message'],
+                chat_ctx['ticket_description'],
+                initial_analysis=chat_ctx['initial_analysis'],
+                chat_summary=chat_ctx['chat_summary'],
+                product_name=chat_ctx['product_name'],
+                process_name=chat_ctx['process_name'],
+                customer_name=chat_ctx['customer_name'],
+                sub_process=chat_ctx['sub_process'],
+                google_key_config_path=google_key_config_path,
+                process_flow=chat_ctx['process_flow'],
+                ai_db_conn=ai_db_conn,
+                nosql_conn=nosql_conn,
+                logger=logger,
+                previous_conversation=chat_ctx['previous_conversation']
+            )
+        except Exception as e:
+            logger.error(f'Failed to start bot. Error details: {e}')
+            error_msg = f"Error occurred while starting bot. Error details: {e}"
+            f_res = {'resolution':'Agent is not responding. Please contact support team..'}
+
+        await ep.run_db(cls._save_support_response, chat_ctx, f_res, error_msg, nosql_conn, logger)
+
+        return f_res, chat_ctx['chat_id'], chat_ctx['message_id']
+
+    @classmethod
+    async def support_agent_stream(
+            cls, data, ai_db_conn, nosql_conn, logger, model_name='gemini-2.0-flash-001', nearest_neighbours=50,
+            google_key_config_path='../configuration/Google_Key(WinfoBots).json'
+    ):
+        """
+        Streaming variant of support_agent. Yields (event, payload) tuples: a 'start' event once the chat is
+        loaded, 'token' events carrying the agent7 resolution text as Gemini produces it, and an 'end' event with
+        the same response dict support_agent returns. The full response is stored before 'end' is sent.
+        """
+        logger.info(f"Support chat agent stream called with following data:\n{data}")
+
+        if not data or not data.get('chat_id'):
+            logger.error('No data or chat id received in the request.')
+            yield 'error', {"data": 'Unable to fetch the response. Please contact support team.'}
+            return
+
+        chat_ctx = await cls._load_support_chat(
+            data, ai_db_conn, nosql_conn, logger, model_name, nearest_neighbours, google_key_config_path
+        )
+        yield 'start', {"chat_id": chat_ctx['chat_id'], "message_id": chat_ctx['message_id']}
+
+        error_msg = ''
+        resolution_streamer = JsonFieldStreamer('resolution')
+        try:
+            final_content = await cls._resolution_content_async(
+                chat_ctx['user_message'], chat_ctx['chat_summary'], chat_ctx['product_name'],
+                chat_ctx['process_name'], chat_ctx['customer_name'], google_key_config_path,
+                chat_ctx['process_flow'], ai_db_conn, nosql_conn, logger,
+                previous_conversation=chat_ctx['previous_conversation']
+            )
+
+            async for chunk in supa.Agents.agent7_stream(
+                    chat_ctx['customer_name'], chat_ctx['product_name'], chat_ctx['ticket_description'],
+                    chat_ctx['initial_analysis'], nosql_conn, logger, final_content, chat_ctx['chat_summary'],
+                    chat_ctx['previous_conversation'], chat_ctx['user_message'],
+                    google_key_config_path=google_key_config_path
+            ):
+                resolution_text = resolution_streamer.feed(chunk)
+                if resolution_text:
+                    yield 'token', {"data": resolution_text}
+
+            logger.info(f"Agent7 streamed response: \n{resolution_streamer.buffer}")
+            ag7_resp = supa.Agents._trim_json_resp(resolution_streamer.buffer, logger, "agent7")
+            f_res = cls._resolution_response(ag7_resp)
+        except Exception as e:
+            logger.error(f'Failed to complete streamed search for the user question. Error details: {e}')
+            error_msg = f"Error occurred while streaming bot response. Error details: {e}"
+            f_res = {'resolution':'Agent is not responding. Please contact support team..'}
+
+        await ep.run_db(cls._save_support_response, chat_ctx, f_res, error_msg, nosql_conn, logger)
+
+        yield 'end', {"data": f_res, "chat_id": chat_ctx['chat_id'], "message_id": chat_ctx['message_id']}
+
+    @classmethod
+    async def _load_support_chat(
+            cls, data, ai_db_conn, nosql_conn, logger, model_name, nearest_neighbours, google_key_config_path
+    ):
+        """
+        Loads the ticket details, chat history, chat summary and process flow for the support message and adds
+        the user message to the chat. A repeat turn of an active chat takes its state from SessionStateCache and
+        makes no read, except the chat summary once it is older than summary_ttl_seconds.
+        """
+        user_message = data.get('user_message')
+        session_id = data.get('session_id')
+        chat_id = data.get('chat_id')
+        user_name = data.get('user_name')
+        jira_ticket_id = data.get('issue_id').strip()
+        customer_name = data.get('customer_name')
+        product_name = data.get('product_name')
+
+        state, state_generation = ssc.get(chat_id, jira_ticket_id, customer_name)
+        if state is not None and time.monotonic() - state['chat_summary_read_at'] < ssc.summary_ttl_seconds:
+            logger.info(f"Support chat state of chat id: {chat_id} served from the session state cache.")
+        else:
+            state = await ep.run_db(
+                cls._read_support_state, chat_id, jira_ticket_id, customer_name, ai_db_conn, nosql_conn, logger,
+                cached_state=state
+            )
+        ticket = state['ticket']
+        prev_chat = state['prev_chat']
+        prv_chats_cnt = state['prv_chats_cnt']
+
+        if not prev_chat:
+            prev_chat = cls._initiate_chat(
+                session_id, chat_id, user_name, model_name, f"{product_name} Support Agent",
+                'Advanced', logger
+            )
+
+            '''Initiating chat summary'''
+            asyncio.create_task(
+                supa.initial_ticket_summary(
+                    chat_id, jira_ticket_id, ticket['ticket_status'], ticket['ticket_description'],
+                    ticket['ticket_comments'], ticket['initial_analysis'], customer_name, product_name, nosql_conn,
+                    logger, google_key_config_path
+                )
+            )
+
+            previous_conversation = ''
+        else:
+            previous_conversation = cls.prev_chats_list(prev_chat, logger, prev_chat_cnt=3)
+
+        prev_chat, message_id = cls._add_message_to_chat(prev_chat, user_message, nearest_neighbours, logger)
+
+        return {
+            "user_message": user_message,
+            "session_id": session_id,
+            "chat_id": chat_id,
+            "jira_ticket_id": jira_ticket_id,
+            "customer_name": customer_name,
+            "product_name": product_name,
+            "sub_process": ticket['sub_process'],
+            "ticket_description": ticket['ticket_description'],
+            "initial_analysis": ticket['initial_analysis'],
+            "process_name": ticket['process_name'],
+            "ticket": ticket,
+            "prev_chat": prev_chat,
+            "prv_chats_cnt": prv_chats_cnt,
+            "previous_conversation": previous_conversation,
+            "message_id": message_id,
+            "chat_summary": state['chat_summary'],
+            "chat_summary_read_at": state['chat_summary_read_at'],
+            "process_flow": state['process_flow'],
+            "state_generation": state_generation
+        }
+
+    @classmethod
+    def _read_support_state(cls, chat_id, jira_ticket_id, customer_name, ai_db_conn, nosql_conn, logger,
+                            cached_state=None):
+        """
+        Reads the ticket details, chat history, chat summary and process flow of a support chat.
+
+        Parameters:
+        cached_state (dict): The state from SessionStateCache whose chat summary is out of date. Only the chat
+            summary is read; the rest of the state is kept.
+
+        Returns:
+        dict: 'ticket', 'prev_chat', 'prv_chats_cnt', 'chat_summary', 'chat_summary_read_at', 'process_name' and
+            'process_flow'.
+        """
+        chat_summary_read_at = time.monotonic()
+        chat_summary = cls._read_chat_summary(chat_id, customer_name, nosql_conn, logger)
+        if cached_state:
+            return {**cached_state, "chat_summary": chat_summary, "chat_summary_read_at": chat_summary_read_at}
+
+        ticket = cls._read_ticket(jira_ticket_id, customer_name, ai_db_conn, logger)
+        prev_chat, prv_chats_cnt = cls.get_chat_history(chat_id, nosql_conn, logger, issue_id=jira_ticket_id)
+        process_flow = cls._read_process_flow(customer_name, ticket['process_name'], nosql_conn, logger)
+
+        return {
+            "ticket": ticket,
+            "prev_chat": prev_chat,
+            "prv_chats_cnt": prv_chats_cnt,
+            "chat_summary": chat_summary,
+            "chat_summary_read_at": chat_summary_read_at,
+            "process_name": ticket['process_name'],
+            "process_flow": process_flow
+        }
+
+    @classmethod
+    def _read_ticket(cls, jira_ticket_id, customer_name, ai_db_conn, logger):
+        """Reads the ticket details of a support chat from support_tickets."""
+        sub_process = ''
+        ticket_description = ''
+        ticket_status = ''
+        ticket_comments = ''
+        process_name = ''
+        initial_analysis = ''
+
         with ai_db_conn.cursor() as app_db_cursor:
             try:
                 ticket_details_query = """
@@ -1063,59 +1411,51 @@ class SupportChatBot(ChatOperations):
                     """
                 )
 
-        if not chat_id:
-            return 'Unable to fetch the response. Please contact support team.', '', ''
-        prev_chat, prv_chats_cnt = cls.get_chat_history(chat_id, nosql_conn, logger, issue_id=jira_ticket_id)
-        # print(f"prev_chat before adding new msg: {prev_chat}")
-        # print(f"prv_chats_cnt: {prv_chats_cnt}")
-
-        if not prev_chat:
-            prev_chat = cls._initiate_chat(
-                session_id, chat_id, user_name, model_name, f"{product_name} Support Agent",
-                'Advanced', logger
-            )
-
-            '''Initiating chat summary'''
-            asyncio.create_task(
-                supa.initial_ticket_summary(
-                    chat_id, jira_ticket_id, ticket_status, ticket_description, ticket_comments,
-                    initial_analysis, customer_name, product_name, nosql_conn, logger, google_key_config_path
-                )
-            )
-
-            previous_conversation = ''
-        else:
-            previous_conversation = cls.prev_chats_list(prev_chat, logger, prev_chat_cnt=3)
-
-        prev_chat, message_id = cls._add_message_to_chat(prev_chat, user_message, nearest_neighbours, logger)
-        # print(f"prev_chat after adding new msg: {prev_chat}")
-        # print(f"message_id: {message_id}")
+        return {
+            "ticket_description": ticket_description,
+            "ticket_status": ticket_status,
+            "ticket_comments": ticket_comments,
+            "process_name": process_name,
+            "sub_process": sub_process,
+            "initial_analysis": initial_analysis
+        }
 
+    @classmethod
+    def _read_chat_summary(cls, chat_id, customer_name, nosql_conn, logger):
+        """Reads the chat summary of a support chat from TicketSummary."""
         try:
-            chat_summary_query = f"""
+            chat_summary_query = """
                 select 
                     summary 
                 from TicketSummary 
-                where chat_id = '{chat_id}' 
-                and customer_name = '{customer_name}'
+                where chat_id = $chat_id 
+                and customer_name = $customer_name
             """
-            summary = tm.execute_select_query(nosql_conn, chat_summary_query)
+            summary = tm.execute_select_query(
+                nosql_conn, chat_summary_query, {'chat_id': chat_id, 'customer_name': customer_name}
+            )
             chat_summary = summary[0].get('summary').get('chat_summary')
         except Exception as e:
             logger.warning(f"Failed to get the chat summary from db. Error details: {e}")
             chat_summary = ''
+        return chat_summary
 
+    @classmethod
+    def _read_process_flow(cls, customer_name, process_name, nosql_conn, logger):
+        """Reads the flow of the customer's process from CustomerProcessDetails."""
         try:
-            process_flow_query = f"""
+            process_flow_query = """
             SELECT 
                 process_details 
             FROM CustomerProcessDetails 
-            where customer_name = '{customer_name}' 
+            where customer_name = $customer_name 
+            and process_name = $process_name
             """
 
             if process_name:
-                process_flow_query += " and process_name = '{process_name}'"
-                process_data = tm.execute_select_query(nosql_conn, process_flow_query)
+                process_data = tm.execute_select_query(
+                    nosql_conn, process_flow_query, {'customer_name': customer_name, 'process_name': process_name}
+                )
                 process_flow = process_data[0].get('process_details').get('flow')
             else:
                 process_flow = ''
@@ -1124,40 +1464,47 @@ class SupportChatBot(ChatOperations):
                 f"Failed to get the process flow for customer - {customer_name} with process - {process_name}. Error details:{e}"
             )
             process_flow = ''
+        return process_flow
 
-        try:
-            f_res = cls._advanced_search(
-                user_message,
-                ticket_description,
-                initial_analysis=initial_analysis,
-                chat_summary=chat_summary,
-                product_name=product_name,
-                process_name=process_name,
-                customer_name=customer_name,
-                sub_process=sub_process,
-                google_key_config_path=google_key_config_path,
-                process_flow=process_flow,
-                ai_db_conn=ai_db_conn,
-                nosql_conn=nosql_conn,
-                logger=logger,
-                previous_conversation=previous_conversation
-            )
-        except Exception as e:
-            logger.error(f'Failed to start bot. Error details: {e}')
-            error_msg = f"Error occurred while starting bot. Error details: {e}"
-            f_res = {'resolution':'Agent is not responding. Please contact support team..'}
-
-        full_chat = cls._update_chat(prev_chat, f_res, message_id, error_msg, logger)
-        # print(f"full_chat: {full_chat}")
-        # print(f"prv_chats_cnt: {prv_chats_cnt}")
-        # with ai_db_conn.cursor() as ai_db_cursor:
-            # print(f"jira_ticket_id: {jira_ticket_id}")
-        store_chat_status = cls._store_chat_db(prv_chats_cnt, full_chat, session_id, chat_id,
-                                               nosql_conn, logger, issue_id=jira_ticket_id)
+    @classmethod
+    def _save_support_response(cls, chat_ctx, f_res, error_msg, nosql_conn, logger):
+        full_chat = cls._update_chat(chat_ctx['prev_chat'], f_res, chat_ctx['message_id'], error_msg, logger)
+        store_chat_status = cls._store_chat_db(
+            chat_ctx['prv_chats_cnt'], full_chat, chat_ctx['session_id'], chat_ctx['chat_id'],
+            nosql_conn, logger, issue_id=chat_ctx['jira_ticket_id']
+        )
         logger.info(f"Chat storing completed with status - {store_chat_status}")
 
-        return f_res, chat_id, message_id
+        if store_chat_status:
+            ssc.set(
+                chat_ctx['chat_id'], chat_ctx['jira_ticket_id'], chat_ctx['customer_name'],
+                {
+                    "ticket": chat_ctx['ticket'],
+                    "prev_chat": full_chat,
+                    "prv_chats_cnt": max(chat_ctx['prv_chats_cnt'], 1),
+                    "chat_summary": chat_ctx['chat_summary'],
+                    "chat_summary_read_at": chat_ctx['chat_summary_read_at'],
+                    "process_name": chat_ctx['process_name'],
+                    "process_flow": chat_ctx['process_flow']
+                },
+                chat_ctx['state_generation']
+            )
+        return store_chat_status
 
+    @classmethod
+    def _resolution_response(cls, ag7_resp):
+        """Maps the agent7 JSON response to the resolution dict returned to the caller."""
+        f_res = {}
+        if ag7_resp:
+            ag7_resp = json.loads(ag7_resp)
+            f_res['resolution'] = ag7_resp.get('resolution')
+            assumptions = ag7_resp.get('assumptions')
+            if assumptions:
+                f_res['assumptions'] = assumptions
+            additional_questions = ag7_resp.get('additional_questions')
+            if additional_questions:
+                f_res['additional_questions'] = additional_questions
+        return f_res
 
     @classmethod
     def _advanced_search(
@@ -1211,6 +1558,60 @@ class SupportChatBot(ChatOperations):
 
         return f_res
 
+    @classmethod
+    async def _resolution_content_async(
+            cls, user_message, chat_summary, product_name, process_name, customer_name, google_key_config_path,
+            process_flow, ai_db_conn, nosql_conn, logger, previous_conversation=''
+    ):
+        """Runs agent6 and agent3 and returns the answered questions used as agent7 context."""
+        final_content = []
+        res_ag6 = await supa.Agents.agent6_async(
+            product_name, previous_conversation, user_message, chat_summary, customer_name, process_name,
+            process_flow, nosql_conn, logger, google_key_config_path=google_key_config_path
+        )
+        res_ag6 = json.loads(res_ag6)
+
+        categorized_questions = supa.GetContents.group_questions_by_source(res_ag6, logger)
+        logger.info(f"Categorized questions: {categorized_questions}")
+
+        doc_resp, winfo_db_data, oracle_db_data = await supa.Agents.agent3_async(
+            categorized_questions, product_name, process_name, customer_name, ai_db_conn, nosql_conn,
+            logger, google_key_config_path=google_key_config_path
+        )
+
+        final_content.extend(doc_resp)
+        final_content.extend(winfo_db_data)
+        final_content.extend(oracle_db_data)
+
+        return final_content
+
+    @classmethod
+    async def _advanced_search_async(
+            cls, user_message, ticket_description, initial_analysis, chat_summary, product_name, process_name,
+            customer_name, sub_process, google_key_config_path, process_flow, ai_db_conn, nosql_conn,
+            logger, previous_conversation=''
+    ):
+        """Awaitable twin of _advanced_search built on the async agents."""
+        logger.info('Support Bot started with async advanced search.')
+        try:
+            final_content = await cls._resolution_content_async(
+                user_message, chat_summary, product_name, process_name, customer_name, google_key_config_path,
+                process_flow, ai_db_conn, nosql_conn, logger, previous_conversation=previous_conversation
+            )
+
+            ag7_resp = await supa.Agents.agent7_async(
+                customer_name, product_name, ticket_description, initial_analysis, nosql_conn, logger,
+                final_content, chat_summary, previous_conversation, user_message,
+                google_key_config_path=google_key_config_path
+            )
+            f_res = cls._resolution_response(ag7_resp)
+
+        except Exception as e:
+            logger.error(f'Failed to complete advanced search for the user question. Error details: {e}')
+            f_res = {'resolution':'Agent is not responding. Please contact support team..'}
+
+        return f_res
+
 
 class OracleSupportProcessFiles:
     """"""
@@ -1233,14 +1634,19 @@ class OracleSupportProcessFiles:
                 WHERE questions_generated = 'No' 
                 and product_name = 'Oracle'
                 """
-                all_contents = tm.execute_select_query(nosql_conn, all_contents_query)
+                all_contents = tm.execute_select_query(nosql_conn, all_contents_query, prepared=True)
                 logger.info(f"all_contents: {all_contents}")
                 print(f"Query for contents: \n{all_contents_query}")
                 print(f"all_contents: {all_contents}")
                 if len(all_contents) == 0:
                     records_flg = False
+                content_embeddings = em.get_embeddings_batch(
+                    [ut.clean_string(content.get('content_details').get('content')).lower() for content in all_contents],
+                    logger, embedding_model='text-embedding-005', dimensions=256,
+                    google_key_config_path=google_key_config_path, location=location
+                )
                 with conn.cursor() as db_cursor:
-                    for content in all_contents:
+                    for content, content_embedding in zip(all_contents, content_embeddings):
                         content_id = content.get('content_id')
                         # title = content.get('content_details').get('title')
                         content_text = content.get('content_details').get('content')
@@ -1255,12 +1661,8 @@ class OracleSupportProcessFiles:
                         # )
                         print(f"content id: {content_id}")
 
-                        content_embedding = em.get_embedding(
-                            ut.clean_string(content_text).lower(), logger, embedding_model='text-embedding-005', dimensions=256,
-                            google_key_config_path=google_key_config_path, location=location
-                        )
                         logger.info(f'query_embedding: {content_embedding}')
-                        if len(content_embedding) == 0:
+                        if not content_embedding:
                             logger.info(f"No embedding found for content id - {content_id}")
                             continue
 
@@ -1281,6 +1683,7 @@ class OracleSupportProcessFiles:
                         else:
                             content['questions_generated'] = "Yes"
                             update_flg = tm.execute_update_query(nosql_conn, content, 'SupportDocumentsContent')
+                            cc.invalidate('SupportDocumentsContent', [content_id])
 
                             if update_flg:
                                 logger.info("content flag updated.")
@@ -1298,21 +1701,29 @@ class OracleSupportProcessFiles:
             min_content_limit = 33700
             max_content_limit = 33800
             while records_flg:
-                all_contents_query = f"""
+                all_contents_query = """
                 SELECT *
                 FROM GeneralDocumentsContent
                 WHERE questions_generated = 'No' 
                 and product_name = 'Oracle'
-                and (content_id > {min_content_limit} and content_id <= {max_content_limit})
+                and (content_id > $min_content_limit and content_id <= $max_content_limit)
                 """
-                all_contents = tm.execute_select_query(nosql_conn, all_contents_query)
+                all_contents = tm.execute_select_query(
+                    nosql_conn, all_contents_query,
+                    {'min_content_limit': min_content_limit, 'max_content_limit': max_content_limit}
+                )
                 logger.info(f"all_contents: {all_contents}")
                 print(f"Query for contents: \n{all_contents_query}")
                 print(f"all_contents: {all_contents}")
                 if len(all_contents) == 0:
                     records_flg = False
+                content_embeddings = em.get_embeddings_batch(
+                    [ut.clean_string(content.get('content_details').get('content')).lower() for content in all_contents],
+                    logger, embedding_model='text-embedding-005', dimensions=256,
+                    google_key_config_path=google_key_config_path, location=location
+                )
                 with conn.cursor() as db_cursor:
-                    for content in all_contents:
+                    for content, content_embedding in zip(all_contents, content_embeddings):
                         content_id = content.get('content_id')
                         # title = content.get('content_details').get('title')
                         content_text = content.get('content_details').get('content')
@@ -1326,12 +1737,8 @@ class OracleSupportProcessFiles:
                         # )
                         print(f"content id: {content_id}")
 
-                        content_embedding = em.get_embedding(
-                            ut.clean_string(content_text).lower(), logger, embedding_model='text-embedding-005', dimensions=256,
-                            google_key_config_path=google_key_config_path, location=location
-                        )
                         logger.info(f'query_embedding: {content_embedding}')
-                        if len(content_embedding) == 0:
+                        if not content_embedding:
                             logger.info(f"No embedding found for content id - {content_id}")
                             continue
 
@@ -1351,6 +1758,7 @@ class OracleSupportProcessFiles:
                         else:
                             content["questions_generated"] = "Yes"
                             update_flg = tm.execute_update_query(nosql_conn, content, 'GeneralDocumentsContent')
+                            cc.invalidate('GeneralDocumentsContent', [content_id])
 
                             if update_flg:
                                 logger.info("content flag updated.")
@@ -1383,7 +1791,7 @@ class OracleSupportProcessFiles:
                         'process_area': process_area,
                         'sub_process': sub_process,
                         'customer_name': customer_name,
-                        'embedding': json.dumps(embedding)
+                        'embedding': em.to_vector(embedding)
                     }
                 )
             except Exception as e:
@@ -1417,7 +1825,7 @@ class OracleSupportProcessFiles:
                         'process_name': process_name,
                         'process_area': process_area,
                         'sub_process': sub_process,
-                        'embedding': json.dumps(embedding)
+                        'embedding': em.to_vector(embedding)
                     }
                 )
             except Exception as e:
@@ -1487,7 +1895,8 @@ Example output:
 
             questions = pr.get_prompt_response(questionnaire_prompt, logger,
                                                google_key_config_path=google_key_config_path,
-                                               response_schema=response_schema, system_instruction=system_instructions)
+                                               response_schema=response_schema, system_instruction=system_instructions,
+                                               use_cache=True)
 
             try:
                 start_index = questions.find('{')
@@ -1578,6 +1987,7 @@ Example output:
                 }
                 request = PutRequest().set_table_name('SupportDocumentsContent').set_value(row).set_update(True)
                 nosql_conn.put(request)
+                cc.invalidate('SupportDocumentsContent', [content_id])
             except Exception as e:
                 logger.error(f"Error executing sales_content_table_update: {e}")
                 logger.error(f"content_id: {content_id}")
@@ -1603,7 +2013,7 @@ Example output:
 
                 for each_item in content:
                     logger.info(f'each_item: {each_item}, file_name: {file_name}, product: {product}')
-                    content_id = tm.get_next_sequence_id(nosql_conn, "SupportContentIdSeq")
+                    content_id = tm.get_next_sequence_id(nosql_conn, "SupportContentIdSeq", logger)
                     title = each_item.get('section_title')
                     text = each_item.get('section_text')
                     # Sanitize section_text
@@ -1628,6 +2038,7 @@ Example output:
                     }
                     try:
                         flg = tm.execute_insert_query(nosql_conn, content_record, 'SupportDocumentsContent')
+                        cc.invalidate('SupportDocumentsContent', [content_id])
                     except Exception as e:
                         logger.error(f"Error executing content_insert_query: {e}")
                         logger.error(f"content_record: {content_record}")
@@ -1658,7 +2069,7 @@ Example output:
 
                 for each_item in content:
                     logger.info(f'each_item: {each_item}, file_name: {file_name}, product: {product}')
-                    content_id = tm.get_next_sequence_id(nosql_conn, "GeneralDocumentsContentIdSeq")
+                    content_id = tm.get_next_sequence_id(nosql_conn, "GeneralDocumentsContentIdSeq", logger)
                     title = each_item.get('section_title')
                     text = each_item.get('section_text')
                     # Sanitize section_text
@@ -1683,6 +2094,7 @@ Example output:
                     try:
                         put_request = PutRequest().set_table_name('GeneralDocumentsContent').set_value(content_record)
                         result = nosql_conn.put(put_request)
+                        cc.invalidate('GeneralDocumentsContent', [content_id])
 
                         if result.get_version() is not None:
                             logger.info(
@@ -1790,25 +2202,27 @@ class WinfoBotsSupportProcessFiles:
                 db_cursor.execute(questions_query)
                 questions_data = db_cursor.fetchall()
 
-                for question in questions_data:
-                    query_id = question[0]
-                    query = str(question[1])
-                    logger.info(f'query_id: {query_id}, query: {query}')
-
-                    query_embedding = em.get_embedding(
-                        query, logger, embedding_model='text-embedding-005', dimensions=256,
-                        google_key_config_path=google_key_config_path, location=location
+                page_size = 1000
+                for start in range(0, len(questions_data), page_size):
+                    page = questions_data[start:start + page_size]
+                    page_embeddings = em.get_embeddings_batch(
+                        [str(question[1]) for question in page], logger, embedding_model='text-embedding-005',
+                        dimensions=256, google_key_config_path=google_key_config_path, location=location
                     )
-                    logger.info(f'query_embedding: {query_embedding}')
-                    if len(query_embedding) == 0:
-                        logger.info(f"No embedding found for query_id - {query_id}")
-                        continue
+                    for question, query_embedding in zip(page, page_embeddings):
+                        query_id = question[0]
+                        query = str(question[1])
+                        logger.info(f'query_id: {query_id}, query: {query}')
+                        logger.info(f'query_embedding: {query_embedding}')
+                        if not query_embedding:
+                            logger.info(f"No embedding found for query_id - {query_id}")
+                            continue
 
-                    update_status = cls._update_question_embedding_db(query_embedding, query_id, db_cursor, logger)
-                    if not update_status:
-                        logger.error(f"Error updating query_embedding for query_id - {query_id}")
+                        update_status = cls._update_question_embedding_db(query_embedding, query_id, db_cursor, logger)
+                        if not update_status:
+                            logger.error(f"Error updating query_embedding for query_id - {query_id}")
 
-                    # break
+                        # break
 
         @classmethod
         def _update_question_embedding_db(cls, embedding, query_id, db_cursor, logger):
@@ -1816,7 +2230,7 @@ class WinfoBotsSupportProcessFiles:
             Updates the embedding for a question in the database.
             """
             logger.info('update_question_embedding_db() called.')
-            embedding = json.dumps(embedding)
+            embedding = em.to_vector(embedding)
             update_query = (
                 "update support_content_embedding set embedding = :embedding where query_id = :query_id"
             )
@@ -1894,7 +2308,8 @@ class WinfoBotsSupportProcessFiles:
 
             questions = pr.get_prompt_response(questionnaire_prompt, logger,
                                                google_key_config_path=google_key_config_path,
-                                               response_schema=response_schema, system_instruction=system_instructions)
+                                               response_schema=response_schema, system_instruction=system_instructions,
+                                               use_cache=True)
 
             try:
                 start_index = questions.find('{')
@@ -1948,7 +2363,7 @@ class WinfoBotsSupportProcessFiles:
                 WHERE questions_generated = 'No' 
                 and product_name = 'WinfoBots'
                 """
-                contents = tm.execute_select_query(nosql_conn, all_contents_query)
+                contents = tm.execute_select_query(nosql_conn, all_contents_query, prepared=True)
                 logger.info(f"contents: {contents}")
                 print(f"Query for contents: \n{all_contents_query}")
                 print(f"all_contents: {contents}")
@@ -2056,6 +2471,7 @@ class WinfoBotsSupportProcessFiles:
             try:
                 content['questions_generated'] = 'Yes'
                 update_flg = tm.execute_update_query(nosql_conn, content, 'SupportDocumentsContent')
+                cc.invalidate('SupportDocumentsContent', [content.get('content_id')])
             except Exception as e:
                 logger.error(f"Error executing sales_content_table_update: {e}")
                 logger.error(f"content_id: {content.get('content_id')}")
@@ -2151,7 +2567,7 @@ class WinfoBotsSupportProcessFiles:
 
                 for each_item in content:
                     logger.info(f'each_item: {each_item}, file_name: {file_name}')
-                    content_id = tm.get_next_sequence_id(nosql_conn, "SupportContentIdSeq")
+                    content_id = tm.get_next_sequence_id(nosql_conn, "SupportContentIdSeq", logger)
                     title = each_item.get('section_title')
                     text = each_item.get('section_text')
 
@@ -2177,6 +2593,7 @@ class WinfoBotsSupportProcessFiles:
                         # result = nosql_conn.put(put_request)
                         # print(f"content_record: {content_record}")
                         insert_flg = tm.execute_insert_query(nosql_conn, content_record, 'SupportDocumentsContent')
+                        cc.invalidate('SupportDocumentsContent', [content_id])
                         if insert_flg:
                             logger.info(
                                 f"Record inserted into 'SupportDocumentsContent' with content_id = {content_id}")
@@ -2260,7 +2677,8 @@ class WinfoBotsSupportProcessFiles:
                 pdf_content = pr.get_prompt_response(
                     contents, logger, model_name='gemini-2.0-flash',
                     system_instruction=system_instruction,
-                    google_key_config_path=google_key_config_path
+                    google_key_config_path=google_key_config_path,
+                    use_cache=True
                 )
 
                 try:
@@ -2322,7 +2740,7 @@ class WinfoBotsSupportProcessFiles:
                     try:
                         response = pr.get_prompt_response(prompt, logger, google_key_config_path=google_key_config_path,
                                                           system_instruction=system_instruction,
-                                                          response_schema=response_schema)
+                                                          response_schema=response_schema, use_cache=True)
 
                         start_index = response.find('{')
                         end_index = response.rfind('}') + 1
@@ -2411,7 +2829,8 @@ class WinfoBotsSupportProcessFiles:
             pdf_content = pr.get_prompt_response(
                 contents, logger, model_name=model_name,
                 system_instruction=system_instruction,
-                google_key_config_path=google_key_config_path
+                google_key_config_path=google_key_config_path,
+                use_cache=True
             )
 
             try:
@@ -2472,7 +2891,8 @@ class WinfoBotsSupportProcessFiles:
                 try:
                     response = pr.get_prompt_response(prompt, logger, google_key_config_path=google_key_config_path,
                                                       system_instruction=system_instruction,
-                                                      response_schema=response_schema, model_name=model_name)
+                                                      response_schema=response_schema, model_name=model_name,
+                                                      use_cache=True)
 
                     start_index = response.find('{')
                     end_index = response.rfind('}') + 1
@@ -1,6 +1,9 @@
 from datetime import datetime, UTC
 
 from src.app.services.nosqlConnection import NoSQLConnectionManager as cm, NoSQLTableManager as tm
+from src.app.metadata.promptConfigRegistry import PromptConfigRegistry as pcr
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+from src.app.services.executionPools import ExecutionPools as ep
 
 
 class PromptConfigManager:
@@ -13,17 +16,12 @@ class PromptConfigManager:
     """
 
     @classmethod
-    async def get_prompts_data(cls, nosql_conn, logger):
+    def iter_prompts_data(cls, nosql_conn, logger):
+        """Yields the prompt configurations one at a time; WAIAgentPromptsConfig is read a batch at a time."""
         try:
-            prompt_config_data = tm.execute_select_query(
-                nosql_conn,
-                "select * from WAIAgentPromptsConfig"
-            )
-
-            return prompt_config_data
+            yield from tm.iter_query(nosql_conn, "select * from WAIAgentPromptsConfig")
         except Exception as e:
             logger.error(f"Failed to get the prompts configuration data from NoSQL DB. Error: {e}")
-            return []
 
     @classmethod
     async def manage_prompts_config(cls, prompts_config_data: list, handler, logger):
@@ -42,11 +40,16 @@ class PromptConfigManager:
         for each_prompt_config in prompts_config_data:
             try:
                 operation_flag = each_prompt_config.get('operation_flag')
-                cls._wai_agent_prompts_config_manager(each_prompt_config, operation_flag, handler, logger)
+                await ep.run_db(
+                    cls._wai_agent_prompts_config_manager, each_prompt_config, operation_flag, handler, logger
+                )
             except Exception as e:
                 logger.error(f"Failed in insert/update/delete prompts config details. Error: {e}")
                 error = e
 
+        # Invalidated even after a failure, since the configurations before it were written.
+        pcr.invalidate(logger)
+
         if error:
             return f"ERROR: {error}"
         else:
@@ -73,7 +76,7 @@ class PromptConfigManager:
             prompts_config["prompt_creation_time"] = now_utc
             prompts_config["prompt_last_updated"] = now_utc
             try:
-                prompts_config['agent_prompt_id'] = tm.get_next_sequence_id(handler, 'WAIAgentPromptsConfigSeqId')
+                prompts_config['agent_prompt_id'] = tm.get_next_sequence_id(handler, 'WAIAgentPromptsConfigSeqId', logger)
                 tm.execute_insert_query(handler, prompts_config, 'WAIAgentPromptsConfig')
                 logger.info("Insertion of prompt details is successful.")
             except Exception as e:
@@ -113,17 +116,12 @@ class CustomerProcessDetailsConfigManager:
     """
 
     @classmethod
-    async def get_process_details_data(cls, nosql_conn, logger):
+    def iter_process_details_data(cls, nosql_conn, logger):
+        """Yields the process details configurations one at a time; CustomerProcessDetails is read a batch at a time."""
         try:
-            process_details_config_data = tm.execute_select_query(
-                nosql_conn,
-                "select * from CustomerProcessDetails"
-            )
-
-            return process_details_config_data
+            yield from tm.iter_query(nosql_conn, "select * from CustomerProcessDetails")
         except Exception as e:
             logger.error(f"Failed to get the prompts configuration data from NoSQL DB. Error: {e}")
-            return []
 
     @classmethod
     async def manage_process_details_config(cls, process_details_config_data: list, handler, logger):
@@ -142,11 +140,23 @@ class CustomerProcessDetailsConfigManager:
         for each_process_details_config in process_details_config_data:
             try:
                 operation_flag = each_process_details_config.get('operation_flag')
-                cls._wai_process_details_config_manager(each_process_details_config, operation_flag, handler, logger)
+                await ep.run_db(
+                    cls._wai_process_details_config_manager, each_process_details_config, operation_flag, handler,
+                    logger
+                )
             except Exception as e:
                 logger.error(f"Failed in insert/update/delete prompts config details. Error: {e}")
                 error = e
 
+        # Cached support chats hold the process flow of their customer. A deleted row may carry only its key, then
+        # every chat is dropped.
+        customer_names = {config.get('customer_name') for config in process_details_config_data}
+        if None in customer_names:
+            ssc.invalidate_all()
+        else:
+            for customer_name in customer_names:
+                ssc.invalidate(customer_name=customer_name)
+
         if error:
             return f"ERROR: {error}"
         else:
@@ -173,7 +183,7 @@ class CustomerProcessDetailsConfigManager:
             process_details_config["creation_time"] = now_utc
             process_details_config["last_updated"] = now_utc
             try:
-                process_details_config['customer_process_detail_id'] = tm.get_next_sequence_id(handler, 'CustomerProcessDetailsIdSeq')
+                process_details_config['customer_process_detail_id'] = tm.get_next_sequence_id(handler, 'CustomerProcessDetailsIdSeq', logger)
                 tm.execute_insert_query(handler, process_details_config, 'CustomerProcessDetails')
                 logger.info("Insertion of prompt details is successful.")
             except Exception as e:
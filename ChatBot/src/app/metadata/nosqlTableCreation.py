@@ -165,10 +165,15 @@ def create_nosql_objects(handle):
         nearest_neighbours INTEGER,
         comments STRING,
         product_name STRING,
+        context_token_budget INTEGER,
         PRIMARY KEY(agent_prompt_id)
     )
     """
 
+    alter_prompts_config_budget = """
+    ALTER TABLE WAIAgentPromptsConfig (ADD context_token_budget INTEGER)
+    """
+
     sm.create_table(handle, create_sequence_table, 'SequenceTable', read_units=50, write_units=50, storage_gb=1)
     sm.create_table(handle, create_chat_sessions, 'ChatSessions', read_units=50, write_units=50, storage_gb=2)
     sm.create_table(handle, create_messages, 'ChatMessages', read_units=50, write_units=50, storage_gb=2)
@@ -180,6 +185,8 @@ def create_nosql_objects(handle):
     sm.create_table(handle, create_resolver_agent_response_support, 'SupportResolverAgentResponses', read_units=50, write_units=50, storage_gb=2)
     sm.create_table(handle, create_ticket_summary, 'TicketSummary', read_units=50, write_units=50, storage_gb=1)
     sm.create_table(handle, support_prompts_config, 'WAIAgentPromptsConfig', read_units=50, write_units=50, storage_gb=1)
+    # Tables created before context_token_budget was added; fails harmlessly when the column already exists.
+    sm.execute_alter_query(handle, alter_prompts_config_budget)
     sm.create_index(handle, support_doc_content_index1)
     sm.create_index(handle, general_doc_content_index1)
 
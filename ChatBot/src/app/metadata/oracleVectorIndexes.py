@@ -0,0 +1,206 @@
+"""
+A module for creating and maintaining the Oracle AI Vector Search indexes of the embedding tables.
+"""
+
+import re
+import json
+
+
+class OracleVectorIndexManager:
+    """
+    OracleVectorIndexManager owns the vector index DDL of the embedding tables and the switch between exact and
+    approximate (FETCH APPROX FIRST) top-k queries in the content retrievers.
+
+    HNSW indexes (ORGANIZATION INMEMORY NEIGHBOR GRAPH) live in the vector memory pool, so vector_memory_size must be
+    set on the database before they can be created. IVF indexes (ORGANIZATION NEIGHBOR PARTITIONS) are stored on
+    disk and suit tables with frequent inserts; their partitions drift as rows are added, rebuild_vector_index
+    recreates them.
+    """
+    VECTOR_INDEXES = {
+        "sales_content_embedding_new": {
+            "index_name": "sales_content_embedding_vidx",
+            "type": "HNSW",
+            "target_accuracy": 95,
+            "neighbors": 32,
+            "efconstruction": 200
+        },
+        "support_content_embedding": {
+            "index_name": "support_content_embedding_vidx",
+            "type": "IVF",
+            "target_accuracy": 95,
+            "neighbor_partitions": 100
+        },
+        "general_content_embedding": {
+            "index_name": "general_content_embedding_vidx",
+            "type": "IVF",
+            "target_accuracy": 95,
+            "neighbor_partitions": 50
+        }
+    }
+    approximate_search = False
+    target_accuracy = 90
+
+    _identifier = re.compile(r'^[A-Za-z][A-Za-z0-9_$#]{0,127}$')
+
+    @classmethod
+    def configure(cls, approximate_search=None, target_accuracy=None, indexes=None):
+        """
+        Parameters:
+        approximate_search (bool): Use FETCH APPROX FIRST in the content retrievers.
+        target_accuracy (int): Accuracy percentage requested by approximate queries (1-100).
+        indexes (dict): Index settings per table, merged over VECTOR_INDEXES.
+        """
+        if approximate_search is not None:
+            cls.approximate_search = bool(approximate_search)
+        if target_accuracy is not None:
+            if not 0 < int(target_accuracy) <= 100:
+                raise ValueError(f"Target accuracy must be between 1 and 100, got {target_accuracy}.")
+            cls.target_accuracy = int(target_accuracy)
+        if indexes:
+            merged_indexes = dict(cls.VECTOR_INDEXES)
+            for table_name, settings in indexes.items():
+                merged_indexes[table_name] = {**merged_indexes.get(table_name, {}), **settings}
+            cls.VECTOR_INDEXES = merged_indexes
+
+    @classmethod
+    def load_config(cls, config_path):
+        """Reads the vector index configuration file; a missing file keeps exact search."""
+        try:
+            with open(config_path, 'r') as index_config:
+                cls.configure(**json.load(index_config))
+        except FileNotFoundError:
+            cls.configure(approximate_search=False)
+
+    @classmethod
+    def fetch_clause(cls, num_neighbours):
+        """Returns the row limiting clause of a top-k vector query."""
+        num_neighbours = int(num_neighbours)
+        if cls.approximate_search:
+            return f"fetch approx first {num_neighbours} rows only with target accuracy {cls.target_accuracy}"
+        return f"fetch first {num_neighbours} rows only"
+
+    @classmethod
+    def _check_identifier(cls, name):
+        if not cls._identifier.match(str(name)):
+            raise ValueError(f"Invalid Oracle identifier '{name}'.")
+        return name
+
+    @classmethod
+    def build_index_ddl(cls, table_name, index_settings):
+        """
+        Builds the CREATE VECTOR INDEX statement of a table.
+
+        Returns:
+        str: The DDL statement.
+        """
+        index_name = cls._check_identifier(index_settings['index_name'])
+        table_name = cls._check_identifier(table_name)
+        index_type = str(index_settings.get('type', 'HNSW')).upper()
+        accuracy = int(index_settings.get('target_accuracy', 95))
+
+        if index_type == 'HNSW':
+            organization = "inmemory neighbor graph"
+            parameters = (
+                f"type hnsw, neighbors {int(index_settings.get('neighbors', 32))}, "
+                f"efconstruction {int(index_settings.get('efconstruction', 200))}"
+            )
+        elif index_type == 'IVF':
+            organization = "neighbor partitions"
+            parameters = f"type ivf, neighbor partitions {int(index_settings.get('neighbor_partitions', 100))}"
+        else:
+            raise ValueError(f"Unknown vector index type '{index_type}' for {table_name}.")
+
+        return (
+            f"create vector index {index_name} on {table_name} (embedding) "
+            f"organization {organization} distance cosine "
+            f"with target accuracy {accuracy} parameters ({parameters})"
+        )
+
+    @classmethod
+    def index_exists(cls, db_cursor, index_name):
+        db_cursor.execute(
+            "select count(*) from user_indexes where index_name = upper(:index_name)",
+            {'index_name': index_name}
+        )
+        return db_cursor.fetchone()[0] > 0
+
+    @classmethod
+    def drop_vector_index(cls, db_conn, index_name, logger):
+        index_name = cls._check_identifier(index_name)
+        with db_conn.cursor() as db_cursor:
+            if not cls.index_exists(db_cursor, index_name):
+                return False
+            db_cursor.execute(f"drop index {index_name}")
+        logger.info(f"Vector index {index_name} dropped.")
+        return True
+
+    @classmethod
+    def create_vector_index(cls, db_conn, table_name, logger, recreate=False):
+        """
+        Creates the vector index of a table when it does not exist yet.
+
+        Parameters:
+        db_conn (Connection): An Oracle connection.
+        table_name (str): One of the tables in VECTOR_INDEXES.
+        logger (Logger): The logger instance.
+        recreate (bool): Drop and create the index when it already exists.
+
+        Returns:
+        bool: True when the index was created.
+        """
+        index_settings = cls.VECTOR_INDEXES[table_name]
+        ddl = cls.build_index_ddl(table_name, index_settings)
+        if recreate:
+            cls.drop_vector_index(db_conn, index_settings['index_name'], logger)
+
+        with db_conn.cursor() as db_cursor:
+            if cls.index_exists(db_cursor, index_settings['index_name']):
+                logger.info(f"Vector index {index_settings['index_name']} already exists on {table_name}.")
+                return False
+            logger.info(f"Creating vector index: {ddl}")
+            db_cursor.execute(ddl)
+        logger.info(f"Vector index {index_settings['index_name']} created on {table_name}.")
+        return True
+
+    @classmethod
+    def rebuild_vector_index(cls, db_conn, table_name, logger):
+        """Recreates the index of a table, e.g. after bulk loads have skewed the IVF partitions."""
+        return cls.create_vector_index(db_conn, table_name, logger, recreate=True)
+
+    @classmethod
+    def create_vector_indexes(cls, db_conn, logger, recreate=False):
+        """
+        Creates the vector indexes of all embedding tables. A failure on one table is logged and the others are
+        still created.
+
+        Returns:
+        dict: Table name to True (created), False (already existed) or the error message.
+        """
+        results = {}
+        for table_name in cls.VECTOR_INDEXES:
+            try:
+                results[table_name] = cls.create_vector_index(db_conn, table_name, logger, recreate=recreate)
+            except Exception as e:
+                logger.error(f"Failed to create the vector index on {table_name}. Error: {e}")
+                results[table_name] = str(e)
+        return results
+
+
+if __name__ == '__main__':
+    import sys
+    from src.app.services.dbConnect import DBConnection as db
+    from src.app.utils.loggerConfig import LoggerManager as lg
+
+    l_pool_name = 'vector_index_migration'
+    l_logger = lg.configure_logger('logs/oracleVectorIndexes')
+    with open('configuration/db_config.json', 'rb') as l_db_details:
+        l_db_details = json.load(l_db_details)
+    OracleVectorIndexManager.load_config('configuration/oracle_vector_index_config.json')
+
+    l_db_conn = db.connect_db(l_pool_name, db_details=l_db_details.get('WAI_NONPROD'), min_conn=1, max_conn=1)
+    try:
+        print(OracleVectorIndexManager.create_vector_indexes(l_db_conn, l_logger, recreate='--recreate' in sys.argv))
+    finally:
+        db.close_connection(l_db_conn, l_pool_name)
+        db.close_pool(l_pool_name)
+        lg.shutdown_logger(l_logger)
@@ -0,0 +1,206 @@
+"""
+A module for serving agent prompt configurations from memory.
+"""
+
+import os
+import time
+import threading
+
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+
+
+class PromptConfigRegistry:
+    """
+    PromptConfigRegistry keeps the rows of WAIAgentPromptsConfig in memory, indexed by (customer, product_name,
+    prompt_level), so agents resolve their system instruction and model with a dictionary lookup instead of a NoSQL
+    query per call.
+
+    The whole table is read at startup and again once ttl_seconds have passed or invalidate has been called. While a
+    reload runs, other threads keep reading the previous snapshot. invalidate also touches signal_path when it is
+    configured; every worker watching the same file reloads on its next lookup.
+    """
+    _lock = threading.Lock()
+    _load_lock = threading.Lock()
+    _configs = {}
+    _configs_ignore_case = {}
+    _loaded_at = None
+    _stale = True
+    _generation = 0
+    _signal_mtime = None
+    ttl_seconds = 300
+    signal_path = None
+    hits = 0
+    misses = 0
+    loads = 0
+    load_errors = 0
+    invalidations = 0
+
+    @classmethod
+    def configure(cls, ttl_seconds=300, signal_path=None):
+        """
+        Parameters:
+        ttl_seconds (int): Age after which the table is read again.
+        signal_path (str): File touched by invalidate and watched by get_config, shared by the workers of a host.
+            None keeps invalidation local to the process.
+        """
+        with cls._lock:
+            cls.ttl_seconds = max(1, int(ttl_seconds))
+            cls.signal_path = signal_path
+            cls._signal_mtime = cls._read_signal()
+            cls._stale = True
+
+    @classmethod
+    def _read_signal(cls):
+        if not cls.signal_path:
+            return None
+        try:
+            return os.stat(cls.signal_path).st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def _build_key(cls, customer, product_name, prompt_level, ignore_case=False):
+        key = (str(customer or ''), str(product_name or ''), str(prompt_level or ''))
+        return tuple(value.upper() for value in key) if ignore_case else key
+
+    @classmethod
+    def load(cls, nosql_conn, logger=None):
+        """
+        Reads WAIAgentPromptsConfig and replaces the in-memory snapshot.
+
+        Returns:
+        int: The number of prompt configurations loaded.
+        """
+        with cls._lock:
+            generation = cls._generation
+        configs = {}
+        configs_ignore_case = {}
+        row_count = 0
+        for row in tm.iter_query(nosql_conn, "SELECT * FROM WAIAgentPromptsConfig"):
+            row_count += 1
+            key = (row.get('customer'), row.get('product_name'), row.get('prompt_level'))
+            configs.setdefault(cls._build_key(*key), row)
+            configs_ignore_case.setdefault(cls._build_key(*key, ignore_case=True), row)
+
+        with cls._lock:
+            cls._configs = configs
+            cls._configs_ignore_case = configs_ignore_case
+            cls._loaded_at = time.monotonic()
+            # An invalidation that arrived while the table was being read may not be in the rows.
+            cls._stale = cls._generation != generation
+            cls.loads += 1
+        if logger:
+            logger.info(f"{row_count} prompt configurations loaded into the prompt config registry.")
+        return row_count
+
+    @classmethod
+    def _needs_reload(cls):
+        with cls._lock:
+            signal_mtime = cls._read_signal()
+            if signal_mtime != cls._signal_mtime:
+                cls._signal_mtime = signal_mtime
+                cls._stale = True
+                cls._generation += 1
+            return cls._stale or cls._loaded_at is None or time.monotonic() - cls._loaded_at >= cls.ttl_seconds
+
+    @classmethod
+    def _refresh(cls, nosql_conn, logger):
+        """Reloads the snapshot; a thread that finds a reload running keeps the current snapshot when there is one."""
+        has_snapshot = cls._loaded_at is not None
+        if not cls._load_lock.acquire(blocking=not has_snapshot):
+            return
+        try:
+            if cls._needs_reload():
+                cls.load(nosql_conn, logger)
+        except Exception as e:
+            with cls._lock:
+                cls.load_errors += 1
+            if not has_snapshot:
+                raise
+            if logger:
+                logger.error(f"Failed to reload the prompt config registry, serving the previous snapshot. Error: {e}")
+        finally:
+            cls._load_lock.release()
+
+    @classmethod
+    def get_config(cls, nosql_conn, customer, product_name, prompt_level, logger=None, ignore_case=False):
+        """
+        Returns the prompt configuration of an agent.
+
+        Parameters:
+        nosql_conn (NoSQLHandle): Used to (re)load the table when the snapshot is missing or stale.
+        customer (str): The customer the prompt is configured for.
+        product_name (str): The product the prompt is configured for.
+        prompt_level (str): The agent, e.g. 'Agent1' or 'Agent3.1'.
+        ignore_case (bool): Match customer and product case-insensitively.
+
+        Returns:
+        dict: A copy of the WAIAgentPromptsConfig row.
+
+        Raises:
+        LookupError: When no prompt is configured for the key.
+        """
+        if cls._needs_reload():
+            cls._refresh(nosql_conn, logger)
+
+        key = cls._build_key(customer, product_name, prompt_level, ignore_case=ignore_case)
+        with cls._lock:
+            config = (cls._configs_ignore_case if ignore_case else cls._configs).get(key)
+            if config is None:
+                cls.misses += 1
+                raise LookupError(
+                    f"No {prompt_level} prompt configured for customer '{customer}' and product '{product_name}'."
+                )
+            cls.hits += 1
+            return dict(config)
+
+    @classmethod
+    def invalidate(cls, logger=None):
+        """Marks the snapshot stale after WAIAgentPromptsConfig was written, and signals the other workers."""
+        with cls._lock:
+            cls._stale = True
+            cls._generation += 1
+            cls.invalidations += 1
+            signal_path = cls.signal_path
+        if signal_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(signal_path)), exist_ok=True)
+                with open(signal_path, 'a'):
+                    os.utime(signal_path)
+            except OSError as e:
+                if logger:
+                    logger.warning(f"Failed to signal the prompt config invalidation to other workers: {e}")
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                "configs": len(cls._configs),
+                "ttl_seconds": cls.ttl_seconds,
+                "age_seconds": round(time.monotonic() - cls._loaded_at, 1) if cls._loaded_at is not None else None,
+                "stale": cls._stale,
+                "signal_path": cls.signal_path,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "loads": cls.loads,
+                "load_errors": cls.load_errors,
+                "invalidations": cls.invalidations,
+                "hit_rate": round(cls.hits / total, 4) if total else 0.0
+            }
+
+
+if __name__ == '__main__':
+    import json
+    from src.app.services.nosqlConnection import NoSQLConnectionManager as cm
+
+    with open('configuration/db_config.json', 'rb') as l_db_details:
+        l_db_details = json.load(l_db_details)
+    l_handler = cm.get_nosql_conn(nosql_db_details=l_db_details.get('WAI_NoSQL'),
+                                  private_key_file='../certs/oci_private.pem')
+    try:
+        print(PromptConfigRegistry.load(l_handler))
+        print(PromptConfigRegistry.get_config(l_handler, 'AEI Support', 'WinfoBots', 'Agent6', ignore_case=True))
+        print(PromptConfigRegistry.get_stats())
+    finally:
+        cm.close_nosql_conn(l_handler)
@@ -0,0 +1,258 @@
+"""
+A module for persisting chat sessions and messages outside the request path.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+from src.app.services.rateLimiter import RateLimiter as rl
+
+
+class ChatWriteBehind:
+    """
+    ChatWriteBehind queues the ChatSessions and ChatMessages rows of a chat turn and writes them from a background
+    thread, so a chat response does not wait for NoSQL.
+
+    Writes are coalesced per chat: a newer session row replaces the queued one and message rows are keyed on
+    message_id. Queued rows stay visible through get_pending until they are written, which keeps a chat's own writes
+    visible to the next turn. A chat whose write fails is retried with jittered exponential backoff and dropped after
+    max_retries. While the writer is not started (scripts, tests), rows are written synchronously by enqueue.
+    """
+    _lock = threading.Condition()
+    _pending = OrderedDict()
+    _in_flight = {}
+    _issue_chats = {}
+    _worker = None
+    _stopping = False
+    _nosql_conn = None
+    _logger = None
+    flush_interval = 0.2
+    max_retries = 5
+    initial_backoff = 0.5
+    enqueued = 0
+    coalesced = 0
+    written_rows = 0
+    retries = 0
+    dropped_chats = 0
+
+    @classmethod
+    def configure(cls, flush_interval=0.2, max_retries=5, initial_backoff=0.5):
+        """
+        Parameters:
+        flush_interval (float): Seconds the writer sleeps when there is nothing ready to write.
+        max_retries (int): Failed attempts after which the rows of a chat are dropped.
+        initial_backoff (float): Base delay of the retry backoff, in seconds.
+        """
+        with cls._lock:
+            cls.flush_interval = max(0.01, float(flush_interval))
+            cls.max_retries = max(0, int(max_retries))
+            cls.initial_backoff = max(0.0, float(initial_backoff))
+
+    @classmethod
+    def start(cls, nosql_conn, logger):
+        """Starts the writer thread that stores queued rows with nosql_conn."""
+        with cls._lock:
+            if cls._worker is not None and cls._worker.is_alive():
+                return
+            cls._nosql_conn = nosql_conn
+            cls._logger = logger
+            cls._stopping = False
+            cls._worker = threading.Thread(target=cls._run, name='chat-write-behind', daemon=True)
+            cls._worker.start()
+
+    @classmethod
+    def is_running(cls):
+        return cls._worker is not None and cls._worker.is_alive() and not cls._stopping
+
+    @classmethod
+    def stop(cls, timeout=30):
+        """
+        Writes everything still queued and stops the writer.
+
+        Returns:
+        int: The number of chats whose rows could not be written before the timeout.
+        """
+        with cls._lock:
+            worker = cls._worker
+            cls._stopping = True
+            cls._lock.notify_all()
+        if worker is not None:
+            worker.join(timeout)
+
+        with cls._lock:
+            unwritten = len(cls._pending) + len(cls._in_flight)
+            if unwritten and cls._logger:
+                cls._logger.error(f"Chat write-behind stopped with the rows of {unwritten} chats not written.")
+            cls._worker = None
+            return unwritten
+
+    @classmethod
+    def _write_rows(cls, nosql_conn, session_row, message_rows):
+        if session_row is not None and not tm.execute_update_query(nosql_conn, session_row, 'ChatSessions'):
+            raise RuntimeError(f"Session of chat {session_row.get('chat_id')} was not written.")
+        for message_row in message_rows:
+            if not tm.execute_insert_query(nosql_conn, message_row, 'ChatMessages'):
+                raise RuntimeError(
+                    f"Message {message_row.get('message_id')} of chat {message_row.get('chat_id')} was not written."
+                )
+        return True
+
+    @classmethod
+    def enqueue(cls, chat_id, session_row=None, message_rows=(), issue_id=None, nosql_conn=None):
+        """
+        Queues the rows of a chat turn.
+
+        Parameters:
+        chat_id (str): The chat the rows belong to.
+        session_row (dict): The full ChatSessions row.
+        message_rows (list): Full ChatMessages rows.
+        issue_id (str): The issue of the chat, so get_pending can find it by issue.
+        nosql_conn (NoSQLHandle): Used to write synchronously when the writer is not running.
+
+        Returns:
+        bool: True once the rows are queued, or written when the writer is not running.
+        """
+        message_rows = list(message_rows)
+        if not cls.is_running():
+            return cls._write_rows(nosql_conn, session_row, message_rows)
+
+        with cls._lock:
+            entry = cls._pending.get(chat_id)
+            if entry is None:
+                entry = {'session': None, 'messages': OrderedDict(), 'issue_id': None, 'attempts': 0,
+                         'not_before': 0.0}
+                cls._pending[chat_id] = entry
+            else:
+                cls.coalesced += 1
+            if session_row is not None:
+                entry['session'] = dict(session_row)
+            for message_row in message_rows:
+                entry['messages'][str(message_row.get('message_id'))] = dict(message_row)
+            if issue_id:
+                entry['issue_id'] = issue_id
+                cls._issue_chats[issue_id] = chat_id
+            cls.enqueued += 1
+            cls._lock.notify_all()
+        return True
+
+    @classmethod
+    def get_pending(cls, chat_id=None, issue_id=None):
+        """
+        Returns the queued rows of a chat that are not written yet, found by issue_id when it has queued rows.
+
+        Returns:
+        tuple: (session row or None, list of message rows).
+        """
+        with cls._lock:
+            chat_id = cls._issue_chats.get(issue_id, chat_id) if issue_id else chat_id
+            session_row = None
+            message_rows = OrderedDict()
+            # Rows being written are older than rows queued since.
+            for entry in (cls._in_flight.get(chat_id), cls._pending.get(chat_id)):
+                if entry is None:
+                    continue
+                session_row = entry['session'] or session_row
+                message_rows.update(entry['messages'])
+            return (dict(session_row) if session_row else None), [dict(row) for row in message_rows.values()]
+
+    @classmethod
+    def _take_ready(cls):
+        """Moves the chats that are due from _pending to _in_flight; called with the lock held."""
+        now = time.monotonic()
+        ready = [
+            chat_id for chat_id, entry in cls._pending.items()
+            if chat_id not in cls._in_flight and (cls._stopping or entry['not_before'] <= now)
+        ]
+        for chat_id in ready:
+            cls._in_flight[chat_id] = cls._pending.pop(chat_id)
+        return ready
+
+    @classmethod
+    def _finish(cls, chat_id, entry, error):
+        """Records the outcome of writing a chat; called with the lock held."""
+        del cls._in_flight[chat_id]
+        if error is None:
+            cls.written_rows += (entry['session'] is not None) + len(entry['messages'])
+        else:
+            entry['attempts'] += 1
+            if entry['attempts'] > cls.max_retries:
+                cls.dropped_chats += 1
+                if cls._logger:
+                    cls._logger.error(
+                        f"Dropping the queued rows of chat {chat_id} after {entry['attempts']} failed writes. "
+                        f"Error: {error}\nsession: {entry['session']}\nmessages: {list(entry['messages'].values())}"
+                    )
+            else:
+                cls.retries += 1
+                entry['not_before'] = time.monotonic() + rl.backoff_delay(entry['attempts'], cls.initial_backoff)
+                if cls._logger:
+                    cls._logger.warning(f"Write of chat {chat_id} failed, attempt {entry['attempts']}. Error: {error}")
+                newer = cls._pending.pop(chat_id, None)
+                if newer is not None:
+                    # Rows queued while this write ran win over the failed ones.
+                    entry['session'] = newer['session'] or entry['session']
+                    entry['messages'].update(newer['messages'])
+                    entry['issue_id'] = newer['issue_id'] or entry['issue_id']
+                cls._pending[chat_id] = entry
+                return
+
+        if entry['issue_id'] and chat_id not in cls._pending and cls._issue_chats.get(entry['issue_id']) == chat_id:
+            del cls._issue_chats[entry['issue_id']]
+
+    @classmethod
+    def _run(cls):
+        while True:
+            with cls._lock:
+                ready = cls._take_ready()
+                while not ready:
+                    if cls._stopping and not cls._pending:
+                        return
+                    cls._lock.wait(cls.flush_interval)
+                    ready = cls._take_ready()
+                entries = [(chat_id, cls._in_flight[chat_id]) for chat_id in ready]
+
+            for chat_id, entry in entries:
+                error = None
+                try:
+                    cls._write_rows(cls._nosql_conn, entry['session'], list(entry['messages'].values()))
+                except Exception as e:
+                    error = e
+                with cls._lock:
+                    cls._finish(chat_id, entry, error)
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return {
+                "running": cls.is_running(),
+                "pending_chats": len(cls._pending),
+                "in_flight_chats": len(cls._in_flight),
+                "enqueued": cls.enqueued,
+                "coalesced": cls.coalesced,
+                "written_rows": cls.written_rows,
+                "retries": cls.retries,
+                "dropped_chats": cls.dropped_chats
+            }
+
+
+if __name__ == '__main__':
+    import json
+    import logging
+    from src.app.services.nosqlConnection import NoSQLConnectionManager as cm
+
+    with open('configuration/db_config.json', 'rb') as l_db_details:
+        l_db_details = json.load(l_db_details)
+    l_handler = cm.get_nosql_conn(nosql_db_details=l_db_details.get('WAI_NoSQL'),
+                                  private_key_file='../certs/oci_private.pem')
+    logging.basicConfig(level=logging.INFO)
+    try:
+        ChatWriteBehind.start(l_handler, logging.getLogger('chatWriteBehind'))
+        ChatWriteBehind.enqueue('demo-chat', {'session_id': 'demo-session', 'chat_id': 'demo-chat'},
+                                [{'chat_id': 'demo-chat', 'message_id': '1', 'user_message': 'hi', 'response': 'hello'}])
+        print(ChatWriteBehind.get_pending('demo-chat'))
+        print(ChatWriteBehind.stop())
+        print(ChatWriteBehind.get_stats())
+    finally:
+        cm.close_nosql_conn(l_handler)
@@ -0,0 +1,164 @@
+"""
+A module for caching document contents read from the NoSQL content tables.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ContentCache:
+    """
+    ContentCache is a process-wide LRU of document content texts keyed on (table name, content_id).
+
+    The cache is bounded by the UTF-8 size of the texts it holds rather than by an entry count, since a content is
+    anything from a short paragraph to a full page. Writers of the content tables call invalidate for the rows they
+    rewrite; a fill that raced with an invalidation is dropped instead of caching the old text.
+    """
+    _lock = threading.RLock()
+    _contents = OrderedDict()
+    _generation = 0
+    enabled = True
+    max_bytes = 64 * 1024 * 1024
+    current_bytes = 0
+    hits = 0
+    misses = 0
+    stores = 0
+    skipped_stores = 0
+    evictions = 0
+    invalidations = 0
+
+    @classmethod
+    def configure(cls, max_bytes=64 * 1024 * 1024, enabled=True):
+        """
+        Configure the cache.
+
+        Parameters:
+        max_bytes (int): Maximum total size, in UTF-8 bytes, of the cached texts.
+        enabled (bool): Turns the cache on or off.
+        """
+        with cls._lock:
+            cls.enabled = enabled
+            cls.max_bytes = max(1, int(max_bytes))
+            if not enabled:
+                cls._contents.clear()
+                cls.current_bytes = 0
+            cls._evict()
+
+    @classmethod
+    def _evict(cls):
+        while cls.current_bytes > cls.max_bytes and cls._contents:
+            _, (_, size) = cls._contents.popitem(last=False)
+            cls.current_bytes -= size
+            cls.evictions += 1
+
+    @classmethod
+    def _forget(cls, key):
+        entry = cls._contents.pop(key, None)
+        if entry is not None:
+            cls.current_bytes -= entry[1]
+
+    @classmethod
+    def get_many(cls, table_name, content_ids):
+        """
+        Looks up several contents of a table.
+
+        Returns:
+        tuple: (dict of content_id to text for the hits, list of missed content_ids, generation). The generation is
+            passed back to set_many so contents invalidated in the meantime are not cached.
+        """
+        found = {}
+        missing = []
+        with cls._lock:
+            for content_id in content_ids:
+                entry = cls._contents.get((table_name, content_id)) if cls.enabled else None
+                if entry is None:
+                    missing.append(content_id)
+                    cls.misses += 1
+                else:
+                    cls._contents.move_to_end((table_name, content_id))
+                    found[content_id] = entry[0]
+                    cls.hits += 1
+            return found, missing, cls._generation
+
+    @classmethod
+    def set_many(cls, table_name, contents, generation=None):
+        """
+        Stores contents of a table.
+
+        Parameters:
+        contents (dict): content_id to content text.
+        generation (int): The generation returned by get_many before the contents were read. Nothing is stored when
+            an invalidation happened since.
+        """
+        with cls._lock:
+            if not cls.enabled:
+                return
+            if generation is not None and generation != cls._generation:
+                cls.skipped_stores += len(contents)
+                return
+            for content_id, text in contents.items():
+                if text is None:
+                    continue
+                text = str(text)
+                size = len(text.encode('utf-8'))
+                if size > cls.max_bytes:
+                    continue
+                key = (table_name, content_id)
+                cls._forget(key)
+                cls._contents[key] = (text, size)
+                cls.current_bytes += size
+                cls.stores += 1
+            cls._evict()
+
+    @classmethod
+    def invalidate(cls, table_name, content_ids):
+        """Drops the cached contents of rows that were inserted, rewritten or deleted."""
+        with cls._lock:
+            cls._generation += 1
+            for content_id in content_ids:
+                cls._forget((table_name, content_id))
+                cls.invalidations += 1
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                "enabled": cls.enabled,
+                "entries": len(cls._contents),
+                "current_bytes": cls.current_bytes,
+                "max_bytes": cls.max_bytes,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "stores": cls.stores,
+                "skipped_stores": cls.skipped_stores,
+                "evictions": cls.evictions,
+                "invalidations": cls.invalidations,
+                "hit_rate": round(cls.hits / total, 4) if total else 0.0
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._contents.clear()
+            cls.current_bytes = 0
+            cls._generation += 1
+            cls.hits = 0
+            cls.misses = 0
+            cls.stores = 0
+            cls.skipped_stores = 0
+            cls.evictions = 0
+            cls.invalidations = 0
+
+
+if __name__ == '__main__':
+    ContentCache.configure(max_bytes=40)
+    l_found, l_missing, l_generation = ContentCache.get_many('SupportDocumentsContent', [1, 2])
+    print(l_found, l_missing)
+    ContentCache.set_many('SupportDocumentsContent', {1: 'Invoice approval workflow.', 2: 'Supplier setup.'},
+                          l_generation)
+    print(ContentCache.get_many('SupportDocumentsContent', [1, 2, 3])[:2])
+    ContentCache.invalidate('SupportDocumentsContent', [1])
+    ContentCache.set_many('SupportDocumentsContent', {3: 'Stale text.'}, l_generation)
+    print(ContentCache.get_many('SupportDocumentsContent', [1, 2, 3])[:2])
+    print(ContentCache.get_stats())
@@ -3,8 +3,13 @@ from google.cloud import aiplatform
 from vertexai.language_models import TextEmbeddingInput, TextEmbeddingModel
 from google.oauth2 import service_account
 import time
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
 from src.app.services.gcsActivities import GCSManager as gcs
+from src.app.services.vertixAIActivities import VertexAIService as vai
+from src.app.services.embeddingCache import EmbeddingCache as ec
 
 
 class VertexAIConnector:
@@ -34,6 +39,52 @@ class VertexAIConnector:
 class EmbeddingManager:
     """Handles text embedding operations using Vertex AI."""
 
+    # Request limits of the text embedding models: inputs per request and total input tokens per request.
+    MAX_BATCH_SIZE = 250
+    MAX_BATCH_TOKENS = 20000
+    # Inputs longer than this are truncated by the model, so they never count for more in a request.
+    MAX_INPUT_TOKENS = 2048
+
+    _models = {}
+    _models_lock = threading.Lock()
+
+    @classmethod
+    def _get_model(cls, embedding_model, google_key_config_path, location):
+        """Returns the TextEmbeddingModel for (model, location), initialising Vertex AI only on first use."""
+        key = (embedding_model, location)
+        with cls._models_lock:
+            model = cls._models.get(key)
+            if model is None:
+                credentials, project_id, _ = VertexAIConnector.initialize_vertex_ai(
+                    google_key_config_path=google_key_config_path, location=location)
+                aiplatform.init(credentials=credentials, project=project_id, location=location)
+                model = TextEmbeddingModel.from_pretrained(embedding_model)
+                cls._models[key] = model
+        return model
+
+    @classmethod
+    def _estimate_tokens(cls, text):
+        """Conservative token estimate (about 3 characters per token) used for packing requests."""
+        return min(cls.MAX_INPUT_TOKENS, len(text) // 3 + 1)
+
+    @classmethod
+    def _make_batches(cls, indexed_texts, batch_size, max_batch_tokens):
+        """Groups (index, text) pairs into requests that respect both the input count and the token limit."""
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for index, text in indexed_texts:
+            tokens = cls._estimate_tokens(text)
+            if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_batch_tokens):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append((index, text))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
     @classmethod
     def _retry_with_backoff(cls, func, logger, retries=3, initial_delay=10, max_delay=60):
         for attempt in range(1, retries + 1):
@@ -47,19 +98,108 @@ class EmbeddingManager:
                 logger.warning(f'Retrying after {delay:.1f} seconds...', exc_info=True)
                 time.sleep(delay)
 
+    @classmethod
+    def to_vector(cls, embedding):
+        """
+        Converts an embedding to a float32 array, which oracledb binds natively to a VECTOR column.
+
+        Returns:
+        array: The embedding as array('f'), or None (bound as NULL) for a missing embedding.
+        """
+        if embedding is None or len(embedding) == 0:
+            return None
+        if isinstance(embedding, array) and embedding.typecode == 'f':
+            return embedding
+        return array('f', embedding)
+
     @classmethod
     def get_embedding(
             cls, input_data, logger, embedding_model='text-embedding-005', task='RETRIEVAL_DOCUMENT',
-            dimensions=256, google_key_config_path='../configuration/Google_Key(WinfoBots).json', location='us-central1'
+            dimensions=256, google_key_config_path='../configuration/Google_Key(WinfoBots).json', location='us-central1',
+            use_cache=True
+    ):
+        """
+        Generate embeddings for a given text.
+        Repeated texts (same normalised text, model, task and dimensions) are served from EmbeddingCache.
+
+        Returns:
+        array: The embedding as array('f'), or an empty list when it could not be generated.
+        """
+        cache_key = None
+        if use_cache and ec.enabled and input_data:
+            cache_key = ec.build_key(input_data, embedding_model, task, dimensions, backend=vai.backend_name())
+            cached_embedding = ec.get(cache_key, logger)
+            if cached_embedding is not None:
+                return cached_embedding
+
+        embedding = cls._embed(input_data, logger, embedding_model, task, dimensions, google_key_config_path, location)
+        if not embedding:
+            return embedding
+
+        embedding = cls.to_vector(embedding)
+        if cache_key:
+            ec.set(cache_key, embedding, logger)
+
+        return embedding
+
+    @classmethod
+    def get_embeddings(
+            cls, texts, logger, embedding_model='text-embedding-005', task='RETRIEVAL_DOCUMENT', dimensions=256,
+            google_key_config_path='../configuration/Google_Key(WinfoBots).json', location='us-central1',
+            use_cache=True
     ):
-        """Generate embeddings for a given text."""
-        credentials, project_id, location = VertexAIConnector.initialize_vertex_ai(
-            google_key_config_path=google_key_config_path, location=location)
-        aiplatform.init(credentials=credentials, project=project_id, location=location)
+        """
+        Generate embeddings for several query texts at once: cached texts are served from EmbeddingCache and the
+        rest are embedded together with get_embeddings_batch.
+
+        Returns:
+        list: One array('f') embedding per text, in input order; an empty list where it could not be generated.
+        """
+        embeddings = [[] for _ in texts]
+        cache_keys = [None] * len(texts)
+        missing = []
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+            if use_cache and ec.enabled:
+                cache_keys[index] = ec.build_key(
+                    text, embedding_model, task, dimensions, backend=vai.backend_name()
+                )
+                cached_embedding = ec.get(cache_keys[index], logger)
+                if cached_embedding is not None:
+                    embeddings[index] = cached_embedding
+                    continue
+            missing.append(index)
+
+        if missing:
+            new_embeddings = cls.get_embeddings_batch(
+                [texts[index] for index in missing], logger, task=task, dimensions=dimensions,
+                embedding_model=embedding_model, google_key_config_path=google_key_config_path, location=location
+            )
+            for index, embedding in zip(missing, new_embeddings):
+                if embedding:
+                    embeddings[index] = embedding
+                    if cache_keys[index]:
+                        ec.set(cache_keys[index], embedding, logger)
+
+        return embeddings
+
+    @classmethod
+    def _embed(cls, input_data, logger, embedding_model, task, dimensions, google_key_config_path, location):
+        if vai.backend is not None:
+            try:
+                return cls._retry_with_backoff(
+                    lambda: vai.backend.embed([input_data.strip()], model_name=embedding_model, task=task,
+                                              dimensions=dimensions, location=location)[0],
+                    logger
+                )
+            except Exception as e:
+                logger.error(f'Exception while Creating Embedding for text : {e}', exc_info=True)
+                return []
 
         try:
             embedding_input = TextEmbeddingInput(input_data.strip(), task)
-            model = TextEmbeddingModel.from_pretrained(embedding_model)
+            model = cls._get_model(embedding_model, google_key_config_path, location)
             dimensionality = {'output_dimensionality': dimensions}
 
             def embedding_function():
@@ -73,6 +213,69 @@ class EmbeddingManager:
 
         return embedding
 
+    @classmethod
+    def get_embeddings_batch(
+            cls, texts, logger, task='RETRIEVAL_DOCUMENT', dimensions=256, embedding_model='text-embedding-005',
+            google_key_config_path='../configuration/Google_Key(WinfoBots).json', location='us-central1',
+            batch_size=MAX_BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, max_workers=4
+    ):
+        """
+        Generate embeddings for many texts with as few requests as possible.
+
+        Texts are packed into requests of at most batch_size inputs and max_batch_tokens estimated tokens, and
+        up to max_workers requests run in parallel. A request that still fails after its retries is split into
+        single-text requests so one bad input does not fail the rest.
+
+        Returns:
+        list: One array('f') embedding per input text, in input order. Empty or failed texts get None.
+        """
+        embeddings = [None] * len(texts)
+        indexed_texts = [(index, str(text).strip()) for index, text in enumerate(texts) if text and str(text).strip()]
+        if not indexed_texts:
+            return embeddings
+
+        batches = cls._make_batches(indexed_texts, max(1, min(batch_size, cls.MAX_BATCH_SIZE)), max_batch_tokens)
+        logger.info(f"Embedding {len(indexed_texts)} texts in {len(batches)} requests.")
+        if vai.backend is None:
+            model = cls._get_model(embedding_model, google_key_config_path, location)
+        else:
+            model = None
+
+        def embed(batch_texts):
+            if model is None:
+                return vai.backend.embed(batch_texts, model_name=embedding_model, task=task, dimensions=dimensions,
+                                         location=location)
+            inputs = [TextEmbeddingInput(text, task) for text in batch_texts]
+            return [e.values for e in model.get_embeddings(inputs, output_dimensionality=dimensions)]
+
+        def run_batch(batch):
+            batch_texts = [text for _, text in batch]
+            try:
+                return batch, cls._retry_with_backoff(lambda: embed(batch_texts), logger)
+            except Exception as e:
+                logger.error(f'Embedding request for {len(batch)} texts failed: {e}')
+                if len(batch) == 1:
+                    return batch, [None]
+
+            results = []
+            for _, text in batch:
+                try:
+                    results.append(embed([text])[0])
+                except Exception as e:
+                    logger.error(f'Exception while Creating Embedding for text : {e}')
+                    results.append(None)
+            return batch, results
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for batch, results in executor.map(run_batch, batches):
+                for (index, _), embedding in zip(batch, results):
+                    embeddings[index] = cls.to_vector(embedding)
+
+        failed = sum(1 for index, _ in indexed_texts if embeddings[index] is None)
+        if failed:
+            logger.warning(f"{failed} of {len(indexed_texts)} texts could not be embedded.")
+        return embeddings
+
     @classmethod
     def create_embeddings(
             cls, processed_data, logger, embedding_model_name='text-embedding-005', task='RETRIEVAL_DOCUMENT',
@@ -81,21 +284,19 @@ class EmbeddingManager:
         """Generate embeddings for multiple texts."""
         embeddings = []
         try:
-            for each_line in processed_data:
-                query_id = each_line['query_id']
-                query = each_line['query']
-                embedding = cls.get_embedding(
-                    query,
-                    logger,
-                    embedding_model=embedding_model_name,
-                    task=task,
-                    dimensions=dimensions,
-                    google_key_config_path=google_key_config_path,
-                    location=location
-                )
+            batch_embeddings = cls.get_embeddings_batch(
+                [each_line['query'] for each_line in processed_data],
+                logger,
+                task=task,
+                dimensions=dimensions,
+                embedding_model=embedding_model_name,
+                google_key_config_path=google_key_config_path,
+                location=location
+            )
+            for each_line, embedding in zip(processed_data, batch_embeddings):
                 embeddings.append({
-                    'query_id': query_id,
-                    'embedding': embedding
+                    'query_id': each_line['query_id'],
+                    'embedding': embedding or []
                 })
         except Exception as e:
             logger.error(f'Exception while Creating Embedding for text : {e}')
@@ -196,7 +397,7 @@ class QueryManager:
 
             resp = index_endpoint.find_neighbors(
                 deployed_index_id=deployed_index_id,
-                queries=[query_embedding],
+                queries=[list(query_embedding)],
                 num_neighbors=num_neighbors
             )
 
@@ -0,0 +1,183 @@
+"""
+A module for caching query embeddings.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class EmbeddingCache:
+    """
+    EmbeddingCache is a process-wide LRU of text embeddings keyed on (model, task, dimensions, normalised text hash).
+
+    Vectors are stored as float32 arrays (4 bytes per dimension instead of a Python float object each). When a
+    db_path is configured, entries are also written to a SQLite file so they survive restarts.
+    """
+    _lock = threading.RLock()
+    _vectors = OrderedDict()
+    _db_conn = None
+    db_path = None
+    enabled = True
+    max_entries = 20000
+    hits = 0
+    disk_hits = 0
+    misses = 0
+    stores = 0
+    evictions = 0
+
+    @classmethod
+    def configure(cls, db_path=None, max_entries=20000, enabled=True):
+        """
+        Configure the cache.
+
+        Parameters:
+        db_path (str): Path to the SQLite backing file. None keeps the cache in memory only.
+        max_entries (int): Maximum number of vectors kept in memory.
+        enabled (bool): Turns the cache on or off.
+        """
+        with cls._lock:
+            cls.enabled = enabled
+            cls.max_entries = max(1, int(max_entries))
+            while len(cls._vectors) > cls.max_entries:
+                cls._vectors.popitem(last=False)
+                cls.evictions += 1
+
+            if cls._db_conn is not None:
+                cls._db_conn.close()
+                cls._db_conn = None
+            cls.db_path = db_path
+            if db_path:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                cls._db_conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+                cls._db_conn.execute("PRAGMA journal_mode=WAL")
+                cls._db_conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embedding_cache ("
+                    "cache_key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                cls._db_conn.commit()
+
+    @classmethod
+    def normalise_text(cls, text):
+        """Lower-cases the text and collapses whitespace, so trivially different questions share an entry."""
+        return ' '.join(str(text).lower().split())
+
+    @classmethod
+    def build_key(cls, text, model_name, task, dimensions, backend='vertex'):
+        """The backend is part of the key, so embeddings of a fake backend are never served as Vertex AI ones."""
+        text_hash = hashlib.sha256(cls.normalise_text(text).encode('utf-8')).hexdigest()
+        return f"{backend}|{model_name}|{task}|{dimensions}|{text_hash}"
+
+    @classmethod
+    def _remember(cls, key, vector):
+        cls._vectors[key] = vector
+        cls._vectors.move_to_end(key)
+        while len(cls._vectors) > cls.max_entries:
+            cls._vectors.popitem(last=False)
+            cls.evictions += 1
+
+    @classmethod
+    def get(cls, key, logger=None):
+        """
+        Get a cached embedding.
+
+        Returns:
+        array: A float32 copy of the embedding, or None on a miss.
+        """
+        with cls._lock:
+            vector = cls._vectors.get(key)
+            if vector is not None:
+                cls._vectors.move_to_end(key)
+                cls.hits += 1
+                return array('f', vector)
+
+            if cls._db_conn is not None:
+                try:
+                    row = cls._db_conn.execute(
+                        "SELECT vector FROM query_embedding_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        vector = array('f')
+                        vector.frombytes(row[0])
+                        cls._remember(key, vector)
+                        cls.disk_hits += 1
+                        return array('f', vector)
+                except sqlite3.Error as e:
+                    if logger:
+                        logger.warning(f"Failed to read the query embedding cache: {e}")
+
+            cls.misses += 1
+            return None
+
+    @classmethod
+    def set(cls, key, embedding, logger=None):
+        """Store an embedding (any sequence of floats) as a float32 array."""
+        if not embedding:
+            return
+        # Copied so later changes to the caller's embedding do not reach the cache.
+        vector = array('f', embedding)
+        with cls._lock:
+            cls._remember(key, vector)
+            cls.stores += 1
+            if cls._db_conn is not None:
+                try:
+                    cls._db_conn.execute(
+                        "INSERT OR REPLACE INTO query_embedding_cache (cache_key, vector, created_at) VALUES (?, ?, ?)",
+                        (key, vector.tobytes(), time.time())
+                    )
+                    cls._db_conn.commit()
+                except sqlite3.Error as e:
+                    if logger:
+                        logger.warning(f"Failed to write the query embedding cache: {e}")
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            hits = cls.hits + cls.disk_hits
+            total = hits + cls.misses
+            disk_entries = None
+            if cls._db_conn is not None:
+                disk_entries = cls._db_conn.execute("SELECT COUNT(*) FROM query_embedding_cache").fetchone()[0]
+            return {
+                "enabled": cls.enabled,
+                "memory_entries": len(cls._vectors),
+                "max_entries": cls.max_entries,
+                "memory_bytes": sum(v.itemsize * len(v) for v in cls._vectors.values()),
+                "disk_entries": disk_entries,
+                "db_path": cls.db_path,
+                "memory_hits": cls.hits,
+                "disk_hits": cls.disk_hits,
+                "misses": cls.misses,
+                "stores": cls.stores,
+                "evictions": cls.evictions,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+    @classmethod
+    def clear(cls, memory_only=False):
+        with cls._lock:
+            cls._vectors.clear()
+            if cls._db_conn is not None and not memory_only:
+                cls._db_conn.execute("DELETE FROM query_embedding_cache")
+                cls._db_conn.commit()
+            cls.hits = 0
+            cls.disk_hits = 0
+            cls.misses = 0
+            cls.stores = 0
+            cls.evictions = 0
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    EmbeddingCache.configure(db_path=os.path.join(tempfile.mkdtemp(), 'query_embedding_cache.sqlite3'))
+    l_key = EmbeddingCache.build_key('What is  WinfoBots?', 'text-embedding-005', 'RETRIEVAL_DOCUMENT', 4)
+    print(EmbeddingCache.get(l_key))
+    EmbeddingCache.set(l_key, [0.1, 0.2, 0.3, 0.4])
+    EmbeddingCache.clear(memory_only=True)
+    print(EmbeddingCache.get(EmbeddingCache.build_key('what is winfobots?', 'text-embedding-005', 'RETRIEVAL_DOCUMENT', 4)))
+    print(EmbeddingCache.get_stats())
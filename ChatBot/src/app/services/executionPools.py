@@ -0,0 +1,250 @@
+"""
+A module for running blocking database and LLM calls off the event loop.
+"""
+
+import json
+import time
+import asyncio
+import itertools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from src.app.services.dbConnect import DBConnection as db
+
+
+class WorkerPool:
+    """
+    WorkerPool is a sized thread pool that counts the calls waiting for a thread, the calls running and the time
+    calls waited in the queue.
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f'{name}-pool')
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    def _started(self, submitted_at):
+        waited = time.monotonic() - submitted_at
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.total_queue_wait += waited
+            self.max_queue_wait = max(self.max_queue_wait, waited)
+
+    def _finished(self, failed):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            self.errors += failed
+
+    def _call(self, submitted_at, func, args, kwargs):
+        self._started(submitted_at)
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self._finished(failed)
+
+    def _done(self, future):
+        # A call cancelled before a thread picked it up never reaches _started.
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    def submit(self, func, *args, **kwargs):
+        """Queues func on the pool and returns a concurrent.futures.Future."""
+        with self._lock:
+            self.queued += 1
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        try:
+            future = self._executor.submit(self._call, time.monotonic(), func, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def get_stats(self):
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "errors": self.errors,
+                "cancelled": self.cancelled,
+                "avg_queue_wait_ms": round(self.total_queue_wait / started * 1000, 2) if started else 0.0,
+                "max_queue_wait_ms": round(self.max_queue_wait * 1000, 2)
+            }
+
+
+class ExecutionPools:
+    """
+    ExecutionPools owns the thread pools the async code runs its blocking calls on, so a slow NoSQL, Oracle or
+    Vertex AI call holds a pool thread instead of the event loop:
+
+    - db: NoSQL and Oracle queries, the local caches and everything that runs on a checked out Oracle cursor.
+    - llm: Vertex AI model creation and generate calls.
+    - connect: Oracle connection checkout and release. It has its own threads because a checkout waits while the Oracle pool is
+      exhausted, and the requests holding the connections need db threads to finish and give them back.
+
+    Each pool runs max_workers calls at a time; further calls queue and are counted per pool. The context variables
+    of the caller are copied to the pool thread.
+    """
+    _lock = threading.Lock()
+    _pools = {}
+    settings = {
+        'db_workers': 32,
+        'llm_workers': 32,
+        'connect_workers': 8,
+        'iterate_batch_size': 200
+    }
+
+    @classmethod
+    def configure(cls, db_workers=32, llm_workers=32, connect_workers=8, iterate_batch_size=200):
+        """
+        Creates the pools; calls already queued on replaced pools still run.
+
+        Parameters:
+        db_workers (int): Threads for NoSQL and Oracle calls.
+        llm_workers (int): Threads for Vertex AI calls, at least the max_in_flight of the rate limiter governors.
+        connect_workers (int): Threads for Oracle connection checkout and release.
+        iterate_batch_size (int): Rows fetched per pool call by iterate.
+        """
+        with cls._lock:
+            cls.settings = {
+                'db_workers': max(1, int(db_workers)),
+                'llm_workers': max(1, int(llm_workers)),
+                'connect_workers': max(1, int(connect_workers)),
+                'iterate_batch_size': max(1, int(iterate_batch_size))
+            }
+            replaced = cls._create_pools()
+        for pool in replaced:
+            pool.shutdown(wait=False)
+
+    @classmethod
+    def _create_pools(cls):
+        """Replaces the pools with new ones sized from settings and returns the replaced pools. Needs _lock."""
+        replaced = list(cls._pools.values())
+        cls._pools = {
+            name: WorkerPool(name, cls.settings[f'{name}_workers']) for name in ('db', 'llm', 'connect')
+        }
+        return replaced
+
+    @classmethod
+    def load_config(cls, config_path):
+        """Reads the pool sizes from a JSON file; a missing file leaves the default sizes."""
+        try:
+            with open(config_path, 'r') as pools_config:
+                cls.configure(**json.load(pools_config))
+        except FileNotFoundError:
+            cls.configure()
+
+    @classmethod
+    def _get_pool(cls, name):
+        with cls._lock:
+            if not cls._pools:
+                # Scripts use the pools without configuring them.
+                cls._create_pools()
+            return cls._pools[name]
+
+    @classmethod
+    async def run(cls, pool_name, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) on a pool thread and returns its result.
+
+        Parameters:
+        pool_name (str): 'db', 'llm' or 'connect'.
+        func (callable): The blocking function.
+        """
+        context = contextvars.copy_context()
+        future = cls._get_pool(pool_name).submit(context.run, func, *args, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    @classmethod
+    async def run_db(cls, func, *args, **kwargs):
+        """Runs a blocking NoSQL or Oracle call on the db pool."""
+        return await cls.run('db', func, *args, **kwargs)
+
+    @classmethod
+    async def run_llm(cls, func, *args, **kwargs):
+        """Runs a blocking Vertex AI call on the llm pool."""
+        return await cls.run('llm', func, *args, **kwargs)
+
+    @classmethod
+    async def get_connection(cls, pool_name):
+        """Checks out a connection of the Oracle pool pool_name without blocking the event loop."""
+        return await cls.run('connect', db.get_connection, pool_name)
+
+    @classmethod
+    async def close_connection(cls, conn, pool_name):
+        """Releases a connection to the Oracle pool pool_name without blocking the event loop."""
+        return await cls.run('connect', db.close_connection, conn, pool_name)
+
+    @classmethod
+    async def iterate(cls, rows, pool_name='db'):
+        """
+        Async iterator over a blocking iterator, such as NoSQLTableManager.iter_query. Rows are fetched on the pool
+        in batches of iterate_batch_size and the iterator is closed on the pool when iteration stops early.
+        """
+        iterator = iter(rows)
+        batch_size = cls.settings['iterate_batch_size']
+        try:
+            while True:
+                batch = await cls.run(pool_name, lambda: list(itertools.islice(iterator, batch_size)))
+                for row in batch:
+                    yield row
+                if len(batch) < batch_size:
+                    break
+        finally:
+            if hasattr(iterator, 'close'):
+                await cls.run(pool_name, iterator.close)
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """Stops the pools; with wait, after the queued calls have run."""
+        with cls._lock:
+            pools = list(cls._pools.values())
+            cls._pools = {}
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            pools = dict(cls._pools)
+        return {name: pool.get_stats() for name, pool in pools.items()}
+
+
+if __name__ == '__main__':
+    async def l_demo():
+        l_results = await asyncio.gather(*(ExecutionPools.run_db(time.sleep, 0.2) for _ in range(40)))
+        print(len(l_results))
+        print([l_row async for l_row in ExecutionPools.iterate(range(450))][-1])
+        print(json.dumps(ExecutionPools.get_stats(), indent=2))
+
+    asyncio.run(l_demo())
+    ExecutionPools.shutdown()
@@ -14,6 +14,8 @@ from src.app.services.vertixAIActivities import VertexAIService as pr
 from src.app.services.vertixAIActivities import MimeTypes as mt
 from src.app.chatbot.aiAgents import SupportAgent as sa
 from src.app.services.nosqlConnection import NoSQLTableManager as tm
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+from src.app.services.executionPools import ExecutionPools as ep
 
 
 class AttachmentProcessor:
@@ -176,6 +178,7 @@ class ProcesTicketsDB:
             # Execute query with better error handling
             db_cursor.execute(executable_query, update_ticket_query)
             db_cursor.connection.commit()
+            ssc.invalidate(issue_id=jira_ticket_id)
 
             logger.info("Ticket details updated successfully!")
 
@@ -275,11 +278,9 @@ class ProcesTicketsDB:
 """
         # print(f'customer_details_query: {customer_details_query}')
         try:
-            rows = tm.execute_select_query(nosql_conn, customer_details_query)
-            # print(f"rows: {rows}")
             product_dict = {}
 
-            for each_row in rows:
+            for each_row in tm.iter_query(nosql_conn, customer_details_query):
                 customer_name = each_row.get('customer_name')
                 process_name = each_row.get('process_name')
                 process_description = each_row.get('process_details', {}).get('description', '')
@@ -313,18 +314,21 @@ class ProcesTicketsDB:
     def _get_process_flow(cls, product_name, customer_name, process_name, nosql_conn, logger):
         logger.info("Fetching the process flow from db..")
 
-        process_flow_query = f"""
+        process_flow_query = """
         SELECT 
             process_details 
         FROM CustomerProcessDetails 
-        where customer_name = '{customer_name}' 
-        and process_name = '{process_name}'
-        and product_name = '{product_name}'
+        where customer_name = $customer_name 
+        and process_name = $process_name
+        and product_name = $product_name
         """
 
         # print(f"process_flow_query: {process_flow_query}")
         try:
-            process_data = tm.execute_select_query(nosql_conn, process_flow_query)
+            process_data = tm.execute_select_query(
+                nosql_conn, process_flow_query,
+                {'customer_name': customer_name, 'process_name': process_name, 'product_name': product_name}
+            )
             process_flow = process_data[0].get('process_details').get('flow')
         except Exception as e:
             logger.error(f"Failed to get the process flow for customer_name: {customer_name}, process_name: {process_name}. Error details: {e}")
@@ -899,8 +903,8 @@ order by 1
                 project_name = each_project['jira_project_name']
                 product_name = each_project['product_name']
 
-                r_not_closed_ticket_ids, r_closed_ticket_ids = cls._get_resolved_tickets(
-                    project_name, application_db_conn, logger
+                r_not_closed_ticket_ids, r_closed_ticket_ids = await ep.run_db(
+                    cls._get_resolved_tickets, project_name, application_db_conn, logger
                 )
                 # print(f'ticket_ids: {ticket_ids}')
                 if r_closed_ticket_ids:
@@ -908,7 +912,8 @@ order by 1
                 else:
                     exclude_tickets = False
 
-                cls.get_tickets(
+                await ep.run_db(
+                    cls.get_tickets,
                     product_name, server, jira_user_name, jira_api_token, application_db_conn, logger,
                     project_name=project_name, project_key=project_key, status=status, assignee=assignee,
                     p_closed_ticket_ids=r_closed_ticket_ids,
@@ -922,10 +927,11 @@ order by 1
                 continue
             # break
 
-        cust_process_data = cls._fetch_customer_process_data(nosql_conn, logger)
+        cust_process_data = await ep.run_db(cls._fetch_customer_process_data, nosql_conn, logger)
         print(f"cust_process_data: {cust_process_data}")
 
-        cls._process_tickets(
+        await ep.run_db(
+            cls._process_tickets,
             cust_process_data,
             application_db_conn,
             nosql_conn,
@@ -0,0 +1,213 @@
+"""
+A module for the LLM backends that VertexAIService and EmbeddingManager can be pointed at.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+
+
+class LLMBackend:
+    """
+    LLMBackend is the interface a backend implements to answer prompts in place of Vertex AI.
+
+    generate returns the full response text, generate_stream is an async generator of text chunks and embed returns
+    one vector per input text. name identifies the backend in the response and embedding cache keys.
+    """
+    name = None
+
+    def generate(self, prompt, model_name=None, location=None, system_instruction=None, response_schema=None,
+                 google_search=False):
+        raise NotImplementedError
+
+    async def generate_stream(self, prompt, model_name=None, location=None, system_instruction=None,
+                              response_schema=None):
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def embed(self, texts, model_name=None, task=None, dimensions=256, location=None):
+        raise NotImplementedError
+
+
+class FakeBackendError(Exception):
+    """Error raised by FakeLLMBackend when error injection is enabled."""
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    FakeLLMBackend answers locally and deterministically, so the agent pipeline can be run and profiled without
+    Google credentials or network access.
+
+    Responses depend only on the request: plain text for text prompts and JSON that follows response_schema when a
+    schema is given. Latency is drawn from a fixed, normal or lognormal distribution and errors (generic or
+    429 RESOURCE_EXHAUSTED) are injected at the configured rates; both use a seeded random generator.
+    """
+    name = 'fake'
+
+    def __init__(self, responses=None, latency_ms=0, latency_stddev_ms=0, latency_distribution='fixed',
+                 error_rate=0.0, throttle_rate=0.0, stream_chunk_size=40, seed=None):
+        """
+        Parameters:
+        responses (dict): Optional canned responses keyed by prompt text.
+        latency_ms (float): Mean latency of a call in milliseconds.
+        latency_stddev_ms (float): Standard deviation for the normal and lognormal distributions.
+        latency_distribution (str): 'fixed', 'normal' or 'lognormal'.
+        error_rate (float): Share of calls failing with a generic error.
+        throttle_rate (float): Share of calls failing with 429 RESOURCE_EXHAUSTED.
+        stream_chunk_size (int): Characters per chunk yielded by generate_stream.
+        seed (int): Seed for latency and error injection.
+        """
+        self.responses = responses or {}
+        self.latency_ms = float(latency_ms)
+        self.latency_stddev_ms = float(latency_stddev_ms)
+        self.latency_distribution = latency_distribution
+        self.error_rate = float(error_rate)
+        self.throttle_rate = float(throttle_rate)
+        self.stream_chunk_size = max(1, int(stream_chunk_size))
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    @classmethod
+    def _digest(cls, *parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+    def _latency(self):
+        """Returns the simulated latency of one call in seconds."""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_distribution == 'normal':
+            latency = self._random.gauss(self.latency_ms, self.latency_stddev_ms)
+        elif self.latency_distribution == 'lognormal':
+            # Parameters of the underlying normal chosen so the lognormal has the configured mean and stddev.
+            variance = self.latency_stddev_ms ** 2
+            sigma = math.sqrt(math.log(1 + variance / self.latency_ms ** 2))
+            mu = math.log(self.latency_ms) - sigma ** 2 / 2
+            latency = self._random.lognormvariate(mu, sigma)
+        else:
+            latency = self.latency_ms
+        return max(0.0, latency) / 1000
+
+    def _inject_error(self):
+        self.calls += 1
+        draw = self._random.random()
+        if draw < self.throttle_rate:
+            self.errors += 1
+            raise FakeBackendError("429 RESOURCE_EXHAUSTED: injected throttle")
+        if draw < self.throttle_rate + self.error_rate:
+            self.errors += 1
+            raise FakeBackendError("500 INTERNAL: injected error")
+
+    @classmethod
+    def _schema_sample(cls, schema, digest):
+        """Builds a value that conforms to a Gemini response schema."""
+        schema_type = str(schema.get('type', 'STRING')).upper()
+        if 'enum' in schema and schema['enum']:
+            return schema['enum'][0]
+        if schema_type == 'OBJECT':
+            properties = schema.get('properties', {})
+            return {name: cls._schema_sample(prop, cls._digest(digest, name)) for name, prop in properties.items()}
+        if schema_type == 'ARRAY':
+            return [cls._schema_sample(schema.get('items', {}), cls._digest(digest, 0))]
+        if schema_type == 'INTEGER':
+            return int(digest[:6], 16) % 100
+        if schema_type == 'NUMBER':
+            return round(int(digest[:6], 16) % 10000 / 100, 2)
+        if schema_type == 'BOOLEAN':
+            return int(digest[0], 16) % 2 == 0
+        return f"fake {schema.get('description', 'value')[:40]} {digest[:8]}".strip()
+
+    def _response(self, prompt, model_name, location, system_instruction, response_schema):
+        if isinstance(prompt, str) and prompt in self.responses:
+            return self.responses[prompt]
+
+        digest = self._digest(prompt, model_name, location, system_instruction, response_schema)
+        if response_schema:
+            return json.dumps(self._schema_sample(response_schema, digest))
+        return f"fake response {digest[:12]}"
+
+    def generate(self, prompt, model_name=None, location=None, system_instruction=None, response_schema=None,
+                 google_search=False):
+        time.sleep(self._latency())
+        self._inject_error()
+        return self._response(prompt, model_name, location, system_instruction, response_schema)
+
+    async def generate_stream(self, prompt, model_name=None, location=None, system_instruction=None,
+                              response_schema=None):
+        await asyncio.sleep(self._latency())
+        self._inject_error()
+        response = self._response(prompt, model_name, location, system_instruction, response_schema)
+        for start in range(0, len(response), self.stream_chunk_size):
+            await asyncio.sleep(0)
+            yield response[start:start + self.stream_chunk_size]
+
+    def embed(self, texts, model_name=None, task=None, dimensions=256, location=None):
+        time.sleep(self._latency())
+        self._inject_error()
+        embeddings = []
+        for text in texts:
+            seed = int(self._digest(text, model_name, task, dimensions)[:16], 16)
+            generator = random.Random(seed)
+            vector = [generator.gauss(0, 1) for _ in range(dimensions)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            embeddings.append([v / norm for v in vector])
+        return embeddings
+
+
+class LLMBackendFactory:
+    """
+    LLMBackendFactory builds the backend selected in the app configuration.
+    """
+    BACKENDS = {
+        "fake": FakeLLMBackend
+    }
+
+    @classmethod
+    def create_backend(cls, backend_config):
+        """
+        Create a backend from its configuration, e.g. {"backend": "fake", "fake": {"latency_ms": 800}}.
+
+        Returns:
+        LLMBackend: The backend, or None for 'vertex' (the built-in Vertex AI path).
+        """
+        backend_name = str((backend_config or {}).get('backend', 'vertex')).lower()
+        if backend_name == 'vertex':
+            return None
+        if backend_name not in cls.BACKENDS:
+            raise ValueError(f"Unknown LLM backend '{backend_name}'.")
+        return cls.BACKENDS[backend_name](**backend_config.get(backend_name, {}))
+
+    @classmethod
+    def load_backend(cls, config_path):
+        """Reads the backend configuration file; a missing file selects Vertex AI."""
+        if not config_path or not os.path.exists(config_path):
+            return None
+        with open(config_path, 'r') as backend_config:
+            return cls.create_backend(json.load(backend_config))
+
+
+if __name__ == '__main__':
+    l_backend = LLMBackendFactory.create_backend({
+        "backend": "fake",
+        "fake": {"latency_ms": 50, "latency_stddev_ms": 20, "latency_distribution": "lognormal", "seed": 7}
+    })
+    l_schema = {
+        "type": "OBJECT",
+        "properties": {
+            "resolution": {"type": "STRING", "description": "The resolution."},
+            "assumptions": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "finished_response": {"type": "STRING", "enum": ["yes", "no"]}
+        }
+    }
+    print(l_backend.generate("what is winfobots?", model_name='gemini-2.0-flash'))
+    print(l_backend.generate("resolve the ticket", response_schema=l_schema))
+    print(len(l_backend.embed(["what is winfobots?"], dimensions=256)[0]))
+
+    async def l_stream():
+        return [chunk async for chunk in l_backend.generate_stream("resolve the ticket", response_schema=l_schema)]
+
+    print(asyncio.run(l_stream()))
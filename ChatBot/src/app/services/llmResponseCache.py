@@ -0,0 +1,310 @@
+"""
+A module for caching LLM prompt responses in memory and on disk.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LLMResponseCache:
+    """
+    LLMResponseCache is a process-wide, two tier cache of prompt responses.
+
+    Responses are keyed on a fingerprint of (backend, model, location, system instruction, response schema, prompt
+    parts). Entries live in an in-memory LRU and, when a db_path is configured, in a SQLite
+    file so they survive restarts and are shared between workers. Every entry has a time to live; run_purge_loop
+    deletes expired rows and keeps the file to max_disk_entries, dropping the oldest first.
+
+    Callers opt in per call (VertexAIService use_cache): the agents sample at temperature 1, so only the ingestion
+    prompts (document sectioning and question generation), whose answer may be reused for the same input, are cached.
+    """
+    KEY_VERSION = 1
+
+    _lock = threading.RLock()
+    _memory = OrderedDict()
+    _db_conn = None
+    db_path = None
+    enabled = True
+    max_entries = 1024
+    max_disk_entries = 100000
+    default_ttl = 7 * 24 * 60 * 60
+    purge_interval = 3600
+    memory_hits = 0
+    disk_hits = 0
+    misses = 0
+    stores = 0
+    expirations = 0
+    evictions = 0
+
+    @classmethod
+    def configure(cls, db_path=None, max_entries=1024, default_ttl=7 * 24 * 60 * 60, enabled=True,
+                  max_disk_entries=100000, purge_interval=3600):
+        """
+        Configure the cache.
+
+        Parameters:
+        db_path (str): Path to the SQLite file for the disk tier. None keeps the cache in memory only.
+        max_entries (int): Maximum number of entries kept in memory.
+        default_ttl (int): Time to live in seconds for entries stored without an explicit ttl.
+        enabled (bool): Turns the cache on or off for every caller.
+        max_disk_entries (int): Maximum number of rows kept in the SQLite file by purge_expired.
+        purge_interval (int): Seconds between two purges of run_purge_loop.
+        """
+        with cls._lock:
+            cls.enabled = enabled
+            cls.max_entries = max(1, int(max_entries))
+            cls.max_disk_entries = max(1, int(max_disk_entries))
+            cls.default_ttl = default_ttl
+            cls.purge_interval = max(1, int(purge_interval))
+            while len(cls._memory) > cls.max_entries:
+                cls._memory.popitem(last=False)
+                cls.evictions += 1
+
+            if cls._db_conn is not None:
+                cls._db_conn.close()
+                cls._db_conn = None
+            cls.db_path = db_path
+            if db_path:
+                directory = os.path.dirname(os.path.abspath(db_path))
+                os.makedirs(directory, exist_ok=True)
+                cls._db_conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+                cls._db_conn.execute("PRAGMA journal_mode=WAL")
+                cls._db_conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                    "cache_key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, expires_at REAL)"
+                )
+                cls._db_conn.execute(
+                    "CREATE INDEX IF NOT EXISTS llm_response_cache_created_at ON llm_response_cache (created_at)"
+                )
+                cls._db_conn.commit()
+
+    @classmethod
+    def _normalise(cls, value):
+        """Turns prompt parts into JSON serialisable values; binary data is replaced by its sha256 digest."""
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return {"sha256": hashlib.sha256(bytes(value)).hexdigest()}
+        if isinstance(value, dict):
+            return {str(k): cls._normalise(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls._normalise(v) for v in value]
+
+        to_dict = getattr(value, 'to_dict', None)
+        if callable(to_dict):
+            # vertexai Part: inline file data is hashed, file_data keeps only the uri and mime type.
+            part = to_dict()
+            inline_data = part.get('inline_data') if isinstance(part, dict) else None
+            if isinstance(inline_data, dict) and 'data' in inline_data:
+                data = inline_data['data']
+                data = data.encode('utf-8') if isinstance(data, str) else data
+                part = {**part, 'inline_data': {**inline_data, 'data': cls._normalise(data)}}
+            return cls._normalise(part)
+
+        return repr(value)
+
+    @classmethod
+    def build_key(cls, prompt, model_name, location, system_instruction=None, response_schema=None, backend='vertex'):
+        """
+        Build the cache key for a prompt. The backend is part of the key, so responses of a fake backend are never
+        served as Vertex AI responses or the other way round.
+
+        Returns:
+        str: sha256 hex digest of the request fingerprint.
+        """
+        fingerprint = json.dumps(
+            [
+                cls.KEY_VERSION, backend, model_name, location,
+                cls._normalise(system_instruction), cls._normalise(response_schema), cls._normalise(prompt)
+            ],
+            sort_keys=True, default=repr
+        )
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _remember(cls, key, response, expires_at):
+        cls._memory[key] = (response, expires_at)
+        cls._memory.move_to_end(key)
+        while len(cls._memory) > cls.max_entries:
+            cls._memory.popitem(last=False)
+            cls.evictions += 1
+
+    @classmethod
+    def get(cls, key, logger=None):
+        """
+        Get a cached response.
+
+        Returns:
+        str: The cached response, or None on a miss or an expired entry.
+        """
+        now = time.time()
+        with cls._lock:
+            entry = cls._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    cls._memory.move_to_end(key)
+                    cls.memory_hits += 1
+                    return response
+                del cls._memory[key]
+                cls.expirations += 1
+
+            if cls._db_conn is not None:
+                try:
+                    row = cls._db_conn.execute(
+                        "SELECT response, expires_at FROM llm_response_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        response, expires_at = row
+                        if expires_at is None or expires_at > now:
+                            cls._remember(key, response, expires_at)
+                            cls.disk_hits += 1
+                            return response
+                        cls._db_conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+                        cls._db_conn.commit()
+                        cls.expirations += 1
+                except sqlite3.Error as e:
+                    if logger:
+                        logger.warning(f"Failed to read the LLM response cache: {e}")
+
+            cls.misses += 1
+            return None
+
+    @classmethod
+    def set(cls, key, response, ttl=None, logger=None):
+        """
+        Store a response.
+
+        Parameters:
+        key (str): The key returned by build_key.
+        response (str): The response text.
+        ttl (int): Time to live in seconds, defaults to default_ttl. 0 or a negative value means no expiry.
+        """
+        ttl = cls.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl and ttl > 0 else None
+        with cls._lock:
+            cls._remember(key, response, expires_at)
+            cls.stores += 1
+            if cls._db_conn is not None:
+                try:
+                    cls._db_conn.execute(
+                        "INSERT OR REPLACE INTO llm_response_cache (cache_key, response, created_at, expires_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, response, now, expires_at)
+                    )
+                    cls._db_conn.commit()
+                except sqlite3.Error as e:
+                    if logger:
+                        logger.warning(f"Failed to write the LLM response cache: {e}")
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Removes expired entries from both tiers, then the oldest disk rows above max_disk_entries.
+
+        Returns:
+        int: The number of disk rows deleted.
+        """
+        now = time.time()
+        with cls._lock:
+            for key in [k for k, (_, expires_at) in cls._memory.items() if expires_at is not None and expires_at <= now]:
+                del cls._memory[key]
+                cls.expirations += 1
+            if cls._db_conn is None:
+                return 0
+            expired = cls._db_conn.execute(
+                "DELETE FROM llm_response_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).rowcount
+            excess = cls._db_conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0] - cls.max_disk_entries
+            evicted = 0
+            if excess > 0:
+                evicted = cls._db_conn.execute(
+                    "DELETE FROM llm_response_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM llm_response_cache ORDER BY created_at ASC LIMIT ?)", (excess,)
+                ).rowcount
+            cls._db_conn.commit()
+            cls.expirations += expired
+            cls.evictions += evicted
+            return expired + evicted
+
+    @classmethod
+    async def run_purge_loop(cls, logger):
+        """Purges the cache every purge_interval seconds until the task is cancelled."""
+        # Imported here so the cache itself does not need the Oracle driver that executionPools loads.
+        from src.app.services.executionPools import ExecutionPools as ep
+        while True:
+            await asyncio.sleep(cls.purge_interval)
+            try:
+                deleted = await ep.run_db(cls.purge_expired)
+                logger.info(f"{deleted} rows purged from the LLM response cache.")
+            except Exception as e:
+                logger.error(f"LLM response cache purge failed. Error: {e}")
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            hits = cls.memory_hits + cls.disk_hits
+            total = hits + cls.misses
+            disk_entries = None
+            if cls._db_conn is not None:
+                disk_entries = cls._db_conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+            return {
+                "enabled": cls.enabled,
+                "memory_entries": len(cls._memory),
+                "max_entries": cls.max_entries,
+                "disk_entries": disk_entries,
+                "max_disk_entries": cls.max_disk_entries,
+                "db_path": cls.db_path,
+                "memory_hits": cls.memory_hits,
+                "disk_hits": cls.disk_hits,
+                "misses": cls.misses,
+                "stores": cls.stores,
+                "expirations": cls.expirations,
+                "evictions": cls.evictions,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+    @classmethod
+    def clear(cls, memory_only=False):
+        with cls._lock:
+            cls._memory.clear()
+            if cls._db_conn is not None and not memory_only:
+                cls._db_conn.execute("DELETE FROM llm_response_cache")
+                cls._db_conn.commit()
+            cls.memory_hits = 0
+            cls.disk_hits = 0
+            cls.misses = 0
+            cls.stores = 0
+            cls.expirations = 0
+            cls.evictions = 0
+
+
+if __name__ == '__main__':
+    import tempfile
+    from src.app.services.llmBackends import FakeLLMBackend
+
+    l_db_path = os.path.join(tempfile.mkdtemp(), 'llm_response_cache.sqlite3')
+    LLMResponseCache.configure(db_path=l_db_path, max_entries=2)
+    l_backend = FakeLLMBackend()
+
+    for l_prompt in ['what is winfobots?', ['summarise', b'%PDF-1.7 file bytes'], 'what is winfobots?']:
+        l_key = LLMResponseCache.build_key(l_prompt, 'gemini-2.0-flash', 'us-central1', 'You are a helpful assistant.')
+        l_response = LLMResponseCache.get(l_key)
+        if l_response is None:
+            l_response = l_backend.generate(l_prompt, 'gemini-2.0-flash', 'us-central1')
+            LLMResponseCache.set(l_key, l_response, ttl=60)
+        print(l_response)
+
+    LLMResponseCache.clear(memory_only=True)
+    l_key = LLMResponseCache.build_key('what is winfobots?', 'gemini-2.0-flash', 'us-central1', 'You are a helpful assistant.')
+    print(LLMResponseCache.get(l_key))
+    print(f"backend calls: {l_backend.calls}")
+    print(LLMResponseCache.get_stats())
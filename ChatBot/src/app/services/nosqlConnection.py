@@ -1,8 +1,11 @@
 import time
-from borneo import NoSQLHandleConfig, NoSQLHandle, TableRequest, TableLimits, GetRequest, PutRequest, QueryRequest, DeleteRequest
+import random
+import threading
+from borneo import NoSQLHandleConfig, NoSQLHandle, TableRequest, TableLimits, GetRequest, PutRequest, PutOption, QueryRequest, PrepareRequest, DeleteRequest
 from borneo.iam import SignatureProvider
 from borneo.operations import ListTablesRequest, GetTableRequest
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 
@@ -49,6 +52,18 @@ class NoSQLConnectionManager:
 
 class NoSQLTableManager:
     """"""
+    sequence_block_size = 1000
+    sequence_refill_ratio = 0.2
+    sequence_max_attempts = 10
+    _sequence_lock = threading.Lock()
+    _sequences = {}
+    max_prepared_statements = 256
+    _statement_lock = threading.Lock()
+    _prepared_statements = OrderedDict()
+    statement_prepares = 0
+    statement_hits = 0
+    prepared_queries = 0
+    literal_queries = 0
 
     @classmethod
     def _ordered_dict_to_dict(cls, obj):
@@ -60,44 +75,306 @@ class NoSQLTableManager:
             return obj
 
     @classmethod
-    def get_next_sequence_id(cls, handle, sequence_name):
-        get_req = GetRequest().set_table_name("SequenceTable").set_key({"name": sequence_name})
-        result = handle.get(get_req)
+    def configure_sequences(cls, block_size=1000, refill_ratio=0.2):
+        """
+        Parameters:
+        block_size (int): Number of ids reserved in SequenceTable at a time.
+        refill_ratio (float): Share of the current block left when the next block is reserved in the background.
+        """
+        with cls._sequence_lock:
+            cls.sequence_block_size = max(1, int(block_size))
+            cls.sequence_refill_ratio = min(1.0, max(0.0, float(refill_ratio)))
 
-        if result.get_value() is not None:
-            current_value = result.get_value().get("value")
-            new_value = current_value + 1
+    @classmethod
+    def _reserve_sequence_block(cls, handle, sequence_name, block_size):
+        """
+        Reserves the next block_size ids of a sequence. The value of its SequenceTable row is the highest id reserved;
+        it is only moved if the row is unchanged since it was read, so two workers never get the same block.
+
+        Returns:
+        tuple: (first id, last id) of the block.
+        """
+        for attempt in range(1, cls.sequence_max_attempts + 1):
+            result = handle.get(GetRequest().set_table_name("SequenceTable").set_key({"name": sequence_name}))
+            row = result.get_value()
+            last_value = row.get("value") if row is not None else 0
+
+            put_req = PutRequest().set_table_name("SequenceTable").set_value(
+                {"name": sequence_name, "value": last_value + block_size}
+            )
+            if row is not None:
+                put_req.set_match_version(result.get_version())
+            else:
+                put_req.set_option(PutOption.IF_ABSENT)
+            if handle.put(put_req).get_version() is not None:
+                return last_value + 1, last_value + block_size
 
-            # Update the sequence
-            value = {"name": sequence_name, "value": new_value}
-            put_req = PutRequest().set_table_name("SequenceTable").set_value(value)
-            handle.put(put_req)
+            # Another worker reserved a block in between.
+            time.sleep(random.uniform(0, 0.05 * attempt))
 
-            return new_value
-        else:
-            # Initialize sequence
-            value = {"name": sequence_name, "value": 1}
-            put_req = PutRequest().set_table_name("SequenceTable").set_value(value)
-            handle.put(put_req)
+        raise RuntimeError(
+            f"Failed to reserve ids of sequence {sequence_name} after {cls.sequence_max_attempts} attempts."
+        )
 
-            return 1
+    @classmethod
+    def _refill_sequence(cls, handle, sequence_name, sequence, done, logger=None):
+        """Reserves the spare block of a sequence and wakes the threads waiting for it. Returns the error, if any."""
+        error = None
+        try:
+            block = cls._reserve_sequence_block(handle, sequence_name, cls.sequence_block_size)
+        except Exception as e:
+            block = None
+            error = e
+            if logger:
+                logger.error(f"Failed to reserve ids of sequence {sequence_name}. Error: {e}")
+        with cls._sequence_lock:
+            sequence['spare'] = block
+            sequence['refill'] = None
+        done.set()
+        return error
 
     @classmethod
-    def execute_select_query(cls, handle, select_query):
+    def get_next_sequence_id(cls, handle, sequence_name, logger=None):
+        """
+        Returns the next id of a sequence.
+
+        Ids are handed out from memory, from a block of sequence_block_size ids reserved in SequenceTable, so most
+        calls do not reach the database. Once less than sequence_refill_ratio of the block is left, the next block is
+        reserved in the background. Ids are unique across workers but not gapless: the unused ids of a block are
+        skipped when the process stops. When a background reservation fails, the ids left in the block are still
+        handed out and the block is reserved inline once they run out; only a failure of that reservation is raised.
+
+        Parameters:
+        handle (NoSQLHandle): The NoSQL connection.
+        sequence_name (str): The name of the sequence row in SequenceTable.
+        logger (logging.Logger): Logger for reservation failures, also those of the background reservation.
+        """
+        while True:
+            with cls._sequence_lock:
+                sequence = cls._sequences.setdefault(
+                    sequence_name, {'next': 1, 'last': 0, 'spare': None, 'refill': None}
+                )
+                if sequence['next'] > sequence['last'] and sequence['spare'] is not None:
+                    sequence['next'], sequence['last'] = sequence['spare']
+                    sequence['spare'] = None
+
+                if sequence['next'] <= sequence['last']:
+                    sequence_id = sequence['next']
+                    sequence['next'] += 1
+                    left = sequence['last'] - sequence_id
+                    if (sequence['spare'] is None and sequence['refill'] is None
+                            and left < cls.sequence_block_size * cls.sequence_refill_ratio):
+                        sequence['refill'] = threading.Event()
+                        threading.Thread(
+                            target=cls._refill_sequence, args=(handle, sequence_name, sequence, sequence['refill']),
+                            kwargs={'logger': logger}, name=f'sequence-refill-{sequence_name}', daemon=True
+                        ).start()
+                    return sequence_id
+
+                done = sequence['refill']
+                reserve_inline = done is None
+                if reserve_inline:
+                    # First id of the process, or the background reservation failed.
+                    done = sequence['refill'] = threading.Event()
+
+            if reserve_inline:
+                error = cls._refill_sequence(handle, sequence_name, sequence, done, logger)
+                if error is not None:
+                    raise error
+            else:
+                done.wait()
+
+    @classmethod
+    def get_rows_by_key(cls, handle, table_name, keys, max_workers=8):
+        """
+        Reads several rows by primary key with GetRequests run in parallel.
+
+        Each GetRequest goes straight to the shard of its key, where a query with an IN list on the shard key is
+        sent to every shard. At most max_workers requests are in flight at a time.
+
+        Parameters:
+        handle (NoSQLHandle): The NoSQL connection.
+        table_name (str): The table to read.
+        keys (list): Primary key dicts, e.g. [{'content_id': 1}].
+        max_workers (int): Maximum number of concurrent GetRequests.
+
+        Returns:
+        list: The row of each key as a dict, or None when it does not exist, in the order of keys.
+        """
+        def get_row(key):
+            request = GetRequest().set_table_name(table_name).set_key(key)
+            return cls._ordered_dict_to_dict(handle.get(request).get_value())
+
+        if not keys:
+            return []
+        if len(keys) == 1:
+            return [get_row(keys[0])]
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(keys)))) as executor:
+            return list(executor.map(get_row, keys))
+
+    @classmethod
+    def _declare_type(cls, value):
+        if isinstance(value, bool):
+            return 'BOOLEAN'
+        if isinstance(value, int):
+            return 'LONG'
+        if isinstance(value, float):
+            return 'DOUBLE'
+        if isinstance(value, str):
+            return 'STRING'
+        return 'JSON'
+
+    @classmethod
+    def _get_prepared_statement(cls, handle, select_query, bind_vars):
+        """
+        Returns a copy of the prepared statement of select_query, preparing and caching it on first use. The statement
+        is prefixed with a DECLARE of the bind variables, typed from their values.
+        """
+        declare = ' '.join(f"${name} {cls._declare_type(value)};" for name, value in sorted(bind_vars.items()))
+        statement = f"DECLARE {declare} {select_query}" if declare else select_query
+
+        with cls._statement_lock:
+            prepared = cls._prepared_statements.get(statement)
+            if prepared is not None:
+                cls._prepared_statements.move_to_end(statement)
+                cls.statement_hits += 1
+        if prepared is None:
+            prepared = handle.prepare(PrepareRequest().set_statement(statement)).get_prepared_statement()
+            with cls._statement_lock:
+                cls._prepared_statements[statement] = prepared
+                cls.statement_prepares += 1
+                while len(cls._prepared_statements) > cls.max_prepared_statements:
+                    cls._prepared_statements.popitem(last=False)
+
+        # The cached statement is shared by threads, the variables are bound on a copy.
+        bound = prepared.copy_statement()
+        for name, value in bind_vars.items():
+            bound.set_variable(f"${name}", value)
+        return statement, bound
+
+    @classmethod
+    def _build_query_request(cls, handle, select_query, bind_vars, prepared, max_read_kb):
+        """Returns (cache key of the prepared statement or None, QueryRequest) for a query."""
+        statement = None
+        if bind_vars or prepared:
+            statement, bound = cls._get_prepared_statement(handle, select_query, bind_vars or {})
+            request = QueryRequest().set_prepared_statement(bound)
+            with cls._statement_lock:
+                cls.prepared_queries += 1
+        else:
+            request = QueryRequest().set_statement(select_query)
+            with cls._statement_lock:
+                cls.literal_queries += 1
+        return statement, request.set_max_read_kb(max_read_kb)
+
+    @classmethod
+    def iter_query_pages(cls, handle, select_query, bind_vars=None, prepared=False, max_read_kb=2048,
+                         continuation_key=None):
+        """
+        Runs a query and yields its results one round trip at a time.
+
+        Parameters:
+        select_query, bind_vars, prepared: As for execute_select_query.
+        max_read_kb (int): Read units a batch may consume, which bounds the size of each batch.
+        continuation_key (bytearray): A key yielded by an earlier run of the same query, to resume after its batch.
+
+        Yields:
+        tuple: (rows of the batch, continuation key of the batch, None after the last one).
+        """
+        statement = None
+        request = None
         try:
-            request = QueryRequest().set_statement(select_query).set_max_read_kb(2048)
-            # result = handle.query(request)
-            # query_data = result.get_results()
+            statement, request = cls._build_query_request(handle, select_query, bind_vars, prepared, max_read_kb)
+            if continuation_key is not None:
+                request.set_continuation_key(continuation_key)
+            while True:
+                result = handle.query(request)
+                done = request.is_done()
+                yield result.get_results(), None if done else result.get_continuation_key()
+                if done:
+                    break
+        except Exception:
+            if statement is not None:
+                # A statement prepared against an older table definition fails until it is prepared again.
+                with cls._statement_lock:
+                    cls._prepared_statements.pop(statement, None)
+            raise
+        finally:
+            if request is not None:
+                request.close()
 
-            rows = []
-            for row in handle.query_iterable(request):
-                rows.append(cls._ordered_dict_to_dict(row))
+    @classmethod
+    def iter_query(cls, handle, select_query, bind_vars=None, prepared=False, limit=None, offset=0,
+                   max_read_kb=2048, continuation_key=None):
+        """
+        Runs a query and yields its rows one at a time, holding only the current batch in memory. Rows are yielded
+        as the driver returns them, without the dict copy execute_select_query makes.
+
+        Parameters:
+        select_query, bind_vars, prepared: As for execute_select_query.
+        limit (int): Stop after this many rows; the rest of the query is not read.
+        offset (int): Rows skipped before the first one yielded.
+        max_read_kb, continuation_key: As for iter_query_pages.
+        """
+        if limit is not None and limit <= 0:
+            return
+        pages = cls.iter_query_pages(
+            handle, select_query, bind_vars=bind_vars, prepared=prepared, max_read_kb=max_read_kb,
+            continuation_key=continuation_key
+        )
+        skipped = 0
+        yielded = 0
+        try:
+            for rows, _ in pages:
+                for row in rows:
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    yield row
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+        finally:
+            pages.close()
 
-            return rows
+    @classmethod
+    def execute_select_query(cls, handle, select_query, bind_vars=None, prepared=False):
+        """
+        Runs a query and returns all its rows. Scans of whole tables should use iter_query instead.
+
+        Parameters:
+        select_query (str): The statement. With bind_vars it references each variable as $name, e.g.
+            "SELECT * FROM ChatMessages WHERE chat_id = $chat_id".
+        bind_vars (dict): Variable name (without $) to value. The statement is then prepared once per process and
+            reused from a cache, with the values bound for each call.
+        prepared (bool): Prepare and cache a statement that has no variables.
+
+        Returns:
+        list: The rows as dicts.
+        """
+        try:
+            return [
+                cls._ordered_dict_to_dict(row)
+                for row in cls.iter_query(handle, select_query, bind_vars=bind_vars, prepared=prepared)
+            ]
         except Exception as e:
-            cust_exp = f"Error executing query '{select_query}' \n Error: {e}"
+            cust_exp = f"Error executing query '{select_query}' with {bind_vars} \n Error: {e}"
             raise cust_exp
 
+    @classmethod
+    def get_statement_stats(cls):
+        with cls._statement_lock:
+            total = cls.statement_hits + cls.statement_prepares
+            return {
+                "prepared_statements": len(cls._prepared_statements),
+                "max_prepared_statements": cls.max_prepared_statements,
+                "prepares": cls.statement_prepares,
+                "prepare_hits": cls.statement_hits,
+                "prepared_queries": cls.prepared_queries,
+                "literal_queries": cls.literal_queries,
+                "prepare_hit_rate": round(cls.statement_hits / total, 4) if total else 0.0
+            }
+
     @classmethod
     def execute_insert_query(cls, handle, inserting_data, table_name):
         insertion_request = PutRequest().set_table_name(table_name).set_value(inserting_data)
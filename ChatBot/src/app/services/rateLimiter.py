@@ -0,0 +1,271 @@
+"""
+A module for client side rate limiting of LLM calls.
+"""
+
+import time
+import random
+import asyncio
+import threading
+
+
+class Governor:
+    """
+    Governor combines a token bucket with a max in-flight limit for one (model, location).
+
+    The refill rate follows AIMD: it grows by increase_step after every successful call and is multiplied by
+    decrease_factor when the server throttles (429 / RESOURCE_EXHAUSTED). It can be used from threads (acquire) and
+    from asyncio (acquire_async); release wakes both kinds of waiters.
+    """
+    # Longest a thread waits for an in-flight slot before it checks again.
+    SLOT_POLL_INTERVAL = 0.05
+
+    def __init__(self, rate=10.0, burst=10, max_in_flight=16, min_rate=0.5, max_rate=50.0, increase_step=0.5,
+                 decrease_factor=0.5):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase_step = float(increase_step)
+        self.decrease_factor = float(decrease_factor)
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        # (loop, asyncio.Event) of the coroutines waiting for an in-flight slot.
+        self._async_waiters = []
+
+        self.acquisitions = 0
+        self.throttle_events = 0
+        self.errors = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self, waiter=None):
+        """
+        Takes a token and a slot if both are available and returns 0, otherwise returns the seconds to wait. When
+        every slot is taken and a waiter is given, the waiter is registered for the next release and None is returned.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if self._in_flight >= self.max_in_flight:
+                if waiter is not None:
+                    self._async_waiters.append(waiter)
+                    return None
+                return self.SLOT_POLL_INTERVAL
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+            self._in_flight += 1
+            return 0.0
+
+    def _record_wait(self, waited):
+        with self._condition:
+            self.acquisitions += 1
+            self.total_queue_wait += waited
+            self.max_queue_wait = max(self.max_queue_wait, waited)
+
+    def acquire(self):
+        """Blocks the calling thread until a call may be made. Every acquire must be paired with a release."""
+        started = time.monotonic()
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                break
+            with self._condition:
+                self._condition.wait(wait)
+        self._record_wait(time.monotonic() - started)
+
+    async def acquire_async(self):
+        """
+        Awaitable acquire. A coroutine waiting for a slot awaits an event set by the next release, one waiting for a
+        token sleeps until the token is due, so the event loop is neither blocked nor polled.
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = (loop, asyncio.Event())
+            wait = self._try_acquire(waiter)
+            if wait is None:
+                try:
+                    await waiter[1].wait()
+                finally:
+                    self._discard_waiter(waiter)
+            elif wait:
+                await asyncio.sleep(wait)
+            else:
+                break
+        self._record_wait(time.monotonic() - started)
+
+    def _discard_waiter(self, waiter):
+        with self._condition:
+            if waiter in self._async_waiters:
+                self._async_waiters.remove(waiter)
+
+    def release(self, throttled=False, failed=False):
+        """
+        Frees the in-flight slot and adjusts the rate.
+
+        Parameters:
+        throttled (bool): The call was rejected with 429 / RESOURCE_EXHAUSTED, the rate is decreased.
+        failed (bool): The call failed for another reason, the rate is left unchanged.
+        """
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            if throttled:
+                self.throttle_events += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                # Drop the burst so the lowered rate takes effect straight away.
+                self._tokens = min(self._tokens, 0.0)
+            elif failed:
+                self.errors += 1
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        # release is called from pool threads as well as from the event loop.
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop of the waiter is closed.
+                pass
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                "rate": round(self.rate, 3),
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "acquisitions": self.acquisitions,
+                "throttle_events": self.throttle_events,
+                "errors": self.errors,
+                "total_queue_wait": round(self.total_queue_wait, 3),
+                "avg_queue_wait": round(self.total_queue_wait / self.acquisitions, 4) if self.acquisitions else 0.0,
+                "max_queue_wait": round(self.max_queue_wait, 3)
+            }
+
+
+class RateLimiter:
+    """
+    RateLimiter is the process-wide registry of governors, one per (model, location), shared by every caller.
+    """
+    _lock = threading.Lock()
+    _governors = {}
+    settings = {
+        "rate": 10.0,
+        "burst": 10,
+        "max_in_flight": 16,
+        "min_rate": 0.5,
+        "max_rate": 50.0,
+        "increase_step": 0.5,
+        "decrease_factor": 0.5
+    }
+    retries = 0
+
+    THROTTLE_MARKERS = ('429', 'RESOURCE_EXHAUSTED', 'Resource exhausted', 'Quota exceeded', 'Too Many Requests')
+    # Errors of the calling code, which fail the same way on every attempt.
+    PROGRAMMING_ERRORS = (TypeError, AttributeError, NameError, KeyError, IndexError, AssertionError,
+                          NotImplementedError)
+
+    @classmethod
+    def configure(cls, **settings):
+        """
+        Update the governor settings (rate, burst, max_in_flight, min_rate, max_rate, increase_step,
+        decrease_factor). Governors created earlier are discarded.
+        """
+        unknown = set(settings) - set(cls.settings)
+        if unknown:
+            raise ValueError(f"Unknown rate limiter settings: {', '.join(sorted(unknown))}")
+        with cls._lock:
+            cls.settings = {**cls.settings, **settings}
+            cls._governors.clear()
+
+    @classmethod
+    def get_governor(cls, model_name, location):
+        key = (model_name, location)
+        with cls._lock:
+            governor = cls._governors.get(key)
+            if governor is None:
+                governor = Governor(**cls.settings)
+                cls._governors[key] = governor
+        return governor
+
+    @classmethod
+    def is_throttle_error(cls, error):
+        """True for 429 / RESOURCE_EXHAUSTED errors from Vertex AI or the genai client."""
+        if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+            return True
+        if getattr(error, 'code', None) == 429 or getattr(error, 'status_code', None) == 429:
+            return True
+        message = str(error)
+        return any(marker in message for marker in cls.THROTTLE_MARKERS)
+
+    @classmethod
+    def is_retryable_error(cls, error):
+        """
+        False for errors a retry cannot fix: programming errors and 4xx responses other than 408 and 429 (invalid
+        argument, permission denied, not found...). Throttling, timeouts, 5xx and connection errors are retryable.
+        """
+        if cls.is_throttle_error(error):
+            return True
+        if isinstance(error, cls.PROGRAMMING_ERRORS):
+            return False
+        for attribute in ('code', 'status_code'):
+            status = getattr(error, attribute, None)
+            if isinstance(status, int) and 400 <= status < 500 and status != 408:
+                return False
+        return True
+
+    @classmethod
+    def backoff_delay(cls, attempt, initial_delay, max_delay=60):
+        """Exponential backoff with jitter: a random delay between half and all of initial_delay * 2^(attempt-1)."""
+        delay = min(max_delay, initial_delay * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @classmethod
+    def record_retry(cls):
+        with cls._lock:
+            cls.retries += 1
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            governors = dict(cls._governors)
+            retries = cls.retries
+        return {
+            "retries": retries,
+            "governors": {f"{model}@{location}": g.get_stats() for (model, location), g in governors.items()}
+        }
+
+
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+
+    RateLimiter.configure(rate=20, burst=5, max_in_flight=4)
+    l_governor = RateLimiter.get_governor('gemini-2.0-flash', 'us-central1')
+
+    def call(i):
+        l_governor.acquire()
+        time.sleep(0.02)
+        l_governor.release(throttled=(i == 10))
+
+    async def call_async():
+        await l_governor.acquire_async()
+        await asyncio.sleep(0.02)
+        l_governor.release()
+
+    async def run_async():
+        await asyncio.gather(*(call_async() for _ in range(20)))
+
+    with ThreadPoolExecutor(max_workers=8) as l_executor:
+        list(l_executor.map(call, range(30)))
+    asyncio.run(run_async())
+    print(RateLimiter.get_stats())
+    print([round(RateLimiter.backoff_delay(a, 10), 2) for a in range(1, 5)])
@@ -0,0 +1,247 @@
+"""
+A module for caching the state of active support chats.
+"""
+
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+
+
+class SessionStateCache:
+    """
+    SessionStateCache keeps, per chat_id, the state a support turn reads before retrieval: the ticket details, the
+    chat session with its last max_messages messages, the chat summary and the process flow of the ticket's process.
+
+    Entries expire ttl_seconds after they were first stored; storing the next turn of a chat keeps that expiry, so an
+    active chat is read from the database again at least every ttl_seconds. The chat summary is also written by
+    scripts/create_summary.py from another process, so callers read it again once it is older than
+    summary_ttl_seconds. The cache is bounded by the JSON size of the states it holds, evicting the least recently
+    used chats.
+
+    Writers of the underlying rows call invalidate: the Jira loader per issue, the initial ticket summary per chat and
+    the process details manager per customer. Each of those keys has its own version, so a store is dropped only when
+    its own chat, issue or customer was invalidated since the state was read. The cache is per process, like the other
+    caches; writes made by other processes are picked up through the two time to lives.
+    """
+    _lock = threading.RLock()
+    _states = OrderedDict()
+    # Versions of the invalidated chats, issues and customers; _generation covers invalidate_all and versions pruned
+    # from _versions.
+    _versions = OrderedDict()
+    _generation = 0
+    max_versions = 10000
+    enabled = True
+    max_bytes = 16 * 1024 * 1024
+    ttl_seconds = 1800
+    summary_ttl_seconds = 60
+    max_messages = 3
+    current_bytes = 0
+    hits = 0
+    misses = 0
+    expirations = 0
+    stores = 0
+    skipped_stores = 0
+    evictions = 0
+    invalidations = 0
+
+    @classmethod
+    def configure(cls, max_bytes=16 * 1024 * 1024, ttl_seconds=1800, max_messages=3, enabled=True,
+                  summary_ttl_seconds=60):
+        """
+        Configure the cache.
+
+        Parameters:
+        max_bytes (int): Maximum total size, in bytes of JSON, of the cached states.
+        ttl_seconds (int): Age after which a state is read from the database again.
+        summary_ttl_seconds (int): Age after which the chat summary of a cached state is read again.
+        max_messages (int): Number of latest messages kept per chat; the support agents use the last 3.
+        enabled (bool): Turns the cache on or off.
+        """
+        with cls._lock:
+            cls.enabled = enabled
+            cls.max_bytes = max(1, int(max_bytes))
+            cls.ttl_seconds = max(1, int(ttl_seconds))
+            cls.summary_ttl_seconds = max(0, int(summary_ttl_seconds))
+            cls.max_messages = max(1, int(max_messages))
+            if not enabled:
+                cls._states.clear()
+                cls.current_bytes = 0
+            cls._evict()
+
+    @classmethod
+    def _evict(cls):
+        while cls.current_bytes > cls.max_bytes and cls._states:
+            _, entry = cls._states.popitem(last=False)
+            cls.current_bytes -= entry['size']
+            cls.evictions += 1
+
+    @classmethod
+    def _forget(cls, chat_id):
+        entry = cls._states.pop(chat_id, None)
+        if entry is not None:
+            cls.current_bytes -= entry['size']
+        return entry is not None
+
+    @classmethod
+    def _version(cls, chat_id, issue_id, customer_name):
+        """The version a state of the chat is stored under; called with the lock held."""
+        return (
+            cls._generation,
+            cls._versions.get(('chat', chat_id), 0),
+            cls._versions.get(('issue', issue_id), 0),
+            cls._versions.get(('customer', customer_name), 0)
+        )
+
+    @classmethod
+    def _bump(cls, key):
+        """Moves the version of one chat, issue or customer on; called with the lock held."""
+        cls._versions[key] = cls._versions.pop(key, 0) + 1
+        if len(cls._versions) > cls.max_versions:
+            # A pruned key would read as version 0 again, so every version taken before is made stale.
+            cls._versions.popitem(last=False)
+            cls._generation += 1
+
+    @classmethod
+    def get(cls, chat_id, issue_id, customer_name):
+        """
+        Looks up the state of a chat; a state cached for another issue or customer is a miss.
+
+        Returns:
+        tuple: (copy of the state or None, version). The version is passed back to set so a state whose chat, issue
+            or customer was invalidated in the meantime is not cached.
+        """
+        with cls._lock:
+            version = cls._version(chat_id, issue_id, customer_name)
+            entry = cls._states.get(chat_id) if cls.enabled else None
+            if entry is not None and time.monotonic() >= entry['expires_at']:
+                cls._forget(chat_id)
+                cls.expirations += 1
+                entry = None
+            if entry is None or entry['issue_id'] != issue_id or entry['customer_name'] != customer_name:
+                cls.misses += 1
+                return None, version
+            cls._states.move_to_end(chat_id)
+            cls.hits += 1
+            return copy.deepcopy(entry['state']), version
+
+    @classmethod
+    def set(cls, chat_id, issue_id, customer_name, state, generation=None):
+        """
+        Stores the state of a chat.
+
+        Parameters:
+        state (dict): The chat state. Only the last max_messages messages of state['prev_chat'] are kept.
+        generation (tuple): The version returned by get before the state was read. Nothing is stored when the chat,
+            issue or customer was invalidated since.
+        """
+        state = copy.deepcopy(state)
+        prev_chat = state.get('prev_chat') or {}
+        if prev_chat.get('messages'):
+            prev_chat['messages'] = prev_chat['messages'][-cls.max_messages:]
+        size = len(json.dumps(state, default=str).encode('utf-8'))
+
+        with cls._lock:
+            if not cls.enabled or size > cls.max_bytes:
+                return
+            if generation is not None and generation != cls._version(chat_id, issue_id, customer_name):
+                cls.skipped_stores += 1
+                return
+            previous = cls._states.get(chat_id)
+            if previous is not None and previous['issue_id'] == issue_id and previous['customer_name'] == customer_name:
+                expires_at = previous['expires_at']
+            else:
+                expires_at = time.monotonic() + cls.ttl_seconds
+            cls._forget(chat_id)
+            cls._states[chat_id] = {
+                'issue_id': issue_id,
+                'customer_name': customer_name,
+                'state': state,
+                'size': size,
+                'expires_at': expires_at
+            }
+            cls.current_bytes += size
+            cls.stores += 1
+            cls._evict()
+
+    @classmethod
+    def invalidate(cls, chat_id=None, issue_id=None, customer_name=None):
+        """Drops the states of a chat, of the chats of an issue, or of the chats of a customer."""
+        with cls._lock:
+            for key in (('chat', chat_id), ('issue', issue_id), ('customer', customer_name)):
+                if key[1] is not None:
+                    cls._bump(key)
+            stale = [
+                cached_chat_id for cached_chat_id, entry in cls._states.items()
+                if cached_chat_id == chat_id
+                or (issue_id is not None and entry['issue_id'] == issue_id)
+                or (customer_name is not None and entry['customer_name'] == customer_name)
+            ]
+            for cached_chat_id in stale:
+                cls._forget(cached_chat_id)
+                cls.invalidations += 1
+
+    @classmethod
+    def invalidate_all(cls):
+        """Drops every cached state, for writes that cannot be attributed to a chat, issue or customer."""
+        with cls._lock:
+            cls._generation += 1
+            cls.invalidations += len(cls._states)
+            cls._states.clear()
+            cls.current_bytes = 0
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                "enabled": cls.enabled,
+                "entries": len(cls._states),
+                "current_bytes": cls.current_bytes,
+                "max_bytes": cls.max_bytes,
+                "ttl_seconds": cls.ttl_seconds,
+                "summary_ttl_seconds": cls.summary_ttl_seconds,
+                "max_messages": cls.max_messages,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "expirations": cls.expirations,
+                "stores": cls.stores,
+                "skipped_stores": cls.skipped_stores,
+                "evictions": cls.evictions,
+                "invalidations": cls.invalidations,
+                "hit_rate": round(cls.hits / total, 4) if total else 0.0
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._states.clear()
+            cls._versions.clear()
+            cls.current_bytes = 0
+            cls._generation += 1
+            cls.hits = 0
+            cls.misses = 0
+            cls.expirations = 0
+            cls.stores = 0
+            cls.skipped_stores = 0
+            cls.evictions = 0
+            cls.invalidations = 0
+
+
+if __name__ == '__main__':
+    l_state, l_generation = SessionStateCache.get('chat-1', 'AEI-101', 'AEI')
+    print(l_state)
+    SessionStateCache.set('chat-1', 'AEI-101', 'AEI', {
+        'ticket': {'ticket_status': 'Open', 'process_name': 'Procure to Pay'},
+        'prev_chat': {'chat_id': 'chat-1', 'messages': [{'message_id': str(i)} for i in range(1, 6)]},
+        'prv_chats_cnt': 5,
+        'chat_summary': '',
+        'chat_summary_read_at': time.monotonic(),
+        'process_name': 'Procure to Pay',
+        'process_flow': ''
+    }, l_generation)
+    print(SessionStateCache.get('chat-1', 'AEI-101', 'AEI')[0])
+    SessionStateCache.invalidate(issue_id='AEI-101')
+    print(SessionStateCache.get('chat-1', 'AEI-101', 'AEI')[0])
+    print(SessionStateCache.get_stats())
@@ -0,0 +1,513 @@
+"""
+A module for an in-process approximate nearest neighbour index over the support content embedding tables.
+"""
+
+import json
+import math
+import time
+import asyncio
+import threading
+
+import numpy as np
+
+from src.app.services.dbConnect import DBConnection as db
+from src.app.services.executionPools import ExecutionPools as ep
+
+
+class VectorPartition:
+    """
+    VectorPartition holds the normalised float32 embeddings of one (product_name, customer_name, process_name).
+
+    Small partitions are scanned exactly. Partitions larger than flat_threshold get an IVF index: the vectors are
+    clustered with spherical k-means and a search only scores the rows of the nprobe clusters closest to the query.
+    Partitions are never changed in place; extend returns a new partition so searches can run while a refresh builds.
+    """
+    MAX_LISTS = 1024
+    TRAIN_POINTS_PER_LIST = 32
+    TRAIN_ITERATIONS = 10
+    # Rows scored per matrix product while assigning vectors to clusters, bounds the temporary memory.
+    ASSIGN_CHUNK_ROWS = 8192
+
+    def __init__(self, query_ids, content_ids, vectors, flat_threshold=4096, retrain_growth=0.5, seed=0):
+        self.query_ids = query_ids
+        self.content_ids = content_ids
+        self.vectors = vectors
+        self.flat_threshold = flat_threshold
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self.centroids = None
+        self.assignment = None
+        self.list_members = None
+        self.list_offsets = None
+        self.trained_size = 0
+
+    def __len__(self):
+        return len(self.query_ids)
+
+    @property
+    def is_ivf(self):
+        return self.centroids is not None
+
+    @property
+    def memory_bytes(self):
+        size = self.vectors.nbytes + self.query_ids.nbytes
+        if self.is_ivf:
+            size += self.centroids.nbytes + self.assignment.nbytes + self.list_members.nbytes
+        return size
+
+    @classmethod
+    def _nearest_centroid(cls, vectors, centroids):
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), cls.ASSIGN_CHUNK_ROWS):
+            chunk = vectors[start:start + cls.ASSIGN_CHUNK_ROWS]
+            assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignment
+
+    def _build_lists(self):
+        self.list_members = np.argsort(self.assignment, kind='stable').astype(np.int32)
+        counts = np.bincount(self.assignment, minlength=len(self.centroids))
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _train(self):
+        """Clusters the vectors with spherical k-means (cosine similarity) on a sample and builds the lists."""
+        rows = len(self.vectors)
+        list_count = min(self.MAX_LISTS, max(1, int(math.sqrt(rows))))
+        generator = np.random.default_rng(self.seed)
+        sample_size = min(rows, list_count * self.TRAIN_POINTS_PER_LIST)
+        sample = self.vectors[generator.choice(rows, sample_size, replace=False)]
+        centroids = sample[generator.choice(sample_size, list_count, replace=False)].copy()
+
+        for _ in range(self.TRAIN_ITERATIONS):
+            assignment = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.bincount(assignment, minlength=list_count) > 0
+            # Empty clusters keep their previous centroid.
+            centroids[filled] = sums[filled]
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+
+        self.centroids = centroids
+        self.assignment = self._nearest_centroid(self.vectors, centroids)
+        self._build_lists()
+        self.trained_size = rows
+
+    def build(self):
+        """Trains the IVF index when the partition is large enough for one. Returns the partition."""
+        if len(self) > self.flat_threshold:
+            self._train()
+        return self
+
+    def extend(self, query_ids, content_ids, vectors):
+        """
+        Returns a new partition with the rows appended. New rows are added to the existing clusters until the
+        partition has grown by retrain_growth since the last training, then the clusters are trained again.
+        """
+        partition = VectorPartition(
+            np.concatenate((self.query_ids, query_ids)),
+            np.concatenate((self.content_ids, content_ids)),
+            np.vstack((self.vectors, vectors)),
+            flat_threshold=self.flat_threshold,
+            retrain_growth=self.retrain_growth,
+            seed=self.seed
+        )
+        if self.is_ivf and len(partition) <= self.trained_size * (1 + self.retrain_growth):
+            partition.centroids = self.centroids
+            partition.trained_size = self.trained_size
+            partition.assignment = np.concatenate(
+                (self.assignment, self._nearest_centroid(vectors, self.centroids))
+            )
+            partition._build_lists()
+            return partition
+        return partition.build()
+
+    def search(self, query, num_neighbours, nprobe=8):
+        """
+        Parameters:
+        query (ndarray): The normalised float32 query vector.
+        num_neighbours (int): Number of rows to return.
+        nprobe (int): Number of IVF clusters scored; ignored for exact partitions.
+
+        Returns:
+        tuple: (similarities, content_ids) of the nearest rows, most similar first.
+        """
+        if self.is_ivf:
+            probes = min(nprobe, len(self.centroids))
+            nearest_lists = np.argpartition(self.centroids @ query, -probes)[-probes:]
+            candidates = np.concatenate(
+                [self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in nearest_lists]
+            )
+        else:
+            candidates = np.arange(len(self))
+
+        if not len(candidates):
+            return np.empty(0, dtype=np.float32), self.content_ids[:0]
+
+        similarities = self.vectors[candidates] @ query
+        if len(candidates) > num_neighbours:
+            top = np.argpartition(similarities, -num_neighbours)[-num_neighbours:]
+            candidates, similarities = candidates[top], similarities[top]
+        order = np.argsort(-similarities, kind='stable')
+        return similarities[order], self.content_ids[candidates[order]]
+
+
+class EmbeddingTableIndex:
+    """
+    EmbeddingTableIndex mirrors one embedding table as VectorPartitions keyed on
+    (upper(product_name), upper(customer_name)) and then process_name.
+
+    Rows are loaded in query_id order from a low watermark: the highest query_id below which every row has an
+    embedding. Rows inserted first and embedded later (store_question_embedding_db) are therefore picked up on a
+    later refresh, and rows that were already loaded are skipped by query_id.
+    """
+
+    def __init__(self, table_name, has_customer=True):
+        self.table_name = table_name
+        self.has_customer = has_customer
+        self.partitions = {}
+        self.watermark = 0
+        self.loaded_ids = set()
+        self.rows = 0
+        self.ready = False
+        self.last_refresh = None
+        self.last_refresh_seconds = None
+        self.last_refresh_rows = 0
+        self.refresh_errors = 0
+
+    def _select_query(self):
+        customer_column = "upper(customer_name)" if self.has_customer else "null"
+        return (
+            f"select query_id, content_id, upper(product_name), {customer_column}, process_name, embedding "
+            f"from {self.table_name} where embedding is not null and query_id > :watermark order by query_id"
+        )
+
+    @classmethod
+    def _to_vector(cls, embedding):
+        """Converts a fetched VECTOR value (array, LOB or JSON text) to float32."""
+        if hasattr(embedding, 'read'):
+            embedding = embedding.read()
+        if isinstance(embedding, (str, bytes)):
+            embedding = json.loads(embedding)
+        return np.asarray(embedding, dtype=np.float32)
+
+    def load(self, db_cursor, settings, full=False):
+        """
+        Loads the rows above the watermark (all rows when full) and swaps in the updated partitions.
+
+        Returns:
+        int: Number of rows added.
+        """
+        started = time.perf_counter()
+        watermark = 0 if full else self.watermark
+        loaded_ids = set() if full else set(self.loaded_ids)
+        partitions = {} if full else self.partitions
+
+        db_cursor.arraysize = settings['fetch_batch_size']
+        db_cursor.execute(self._select_query(), {'watermark': watermark})
+        new_rows = {}
+        highest_id = watermark
+        while True:
+            batch = db_cursor.fetchmany()
+            if not batch:
+                break
+            for query_id, content_id, product_name, customer_name, process_name, embedding in batch:
+                highest_id = max(highest_id, query_id)
+                if query_id in loaded_ids:
+                    continue
+                rows = new_rows.setdefault((product_name, customer_name, process_name), ([], [], []))
+                rows[0].append(query_id)
+                rows[1].append(content_id)
+                rows[2].append(self._to_vector(embedding))
+
+        db_cursor.execute(f"select min(query_id) from {self.table_name} where embedding is null")
+        first_missing = db_cursor.fetchone()[0]
+        if first_missing is not None:
+            highest_id = min(highest_id, first_missing - 1)
+
+        partitions = {key: dict(processes) for key, processes in partitions.items()}
+        added = 0
+        for (product_name, customer_name, process_name), (query_ids, content_ids, vectors) in new_rows.items():
+            query_ids = np.asarray(query_ids, dtype=np.int64)
+            content_ids = np.asarray(content_ids, dtype=object)
+            vectors = np.vstack(vectors)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+            processes = partitions.setdefault((product_name, customer_name), {})
+            partition = processes.get(process_name)
+            if partition is None:
+                partition = VectorPartition(
+                    query_ids, content_ids, vectors,
+                    flat_threshold=settings['flat_threshold'],
+                    retrain_growth=settings['retrain_growth']
+                ).build()
+            else:
+                partition = partition.extend(query_ids, content_ids, vectors)
+            processes[process_name] = partition
+            loaded_ids.update(query_ids.tolist())
+            added += len(query_ids)
+
+        # Ids at or below the watermark are never fetched again and need not be remembered.
+        new_watermark = max(watermark, highest_id)
+        self.loaded_ids = {query_id for query_id in loaded_ids if query_id > new_watermark}
+        self.partitions = partitions
+        self.watermark = new_watermark
+        self.rows = sum(len(p) for processes in partitions.values() for p in processes.values())
+        self.ready = True
+        self.last_refresh = time.time()
+        self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+        self.last_refresh_rows = added
+        return added
+
+    def search(self, product_name, customer_name, process_name, query, num_neighbours, nprobe):
+        """
+        Returns the distinct content_ids of the num_neighbours nearest rows, nearest first. Like the Oracle query,
+        a process_name matches rows of that process and rows without one; no process_name matches every process.
+        """
+        processes = self.partitions.get(
+            (str(product_name).upper(), str(customer_name).upper() if self.has_customer else None), {}
+        )
+        if process_name:
+            selected = [processes[p] for p in (process_name, None) if p in processes]
+        else:
+            selected = list(processes.values())
+        if not selected:
+            return []
+
+        results = [partition.search(query, num_neighbours, nprobe) for partition in selected]
+        similarities = np.concatenate([r[0] for r in results])
+        content_ids = np.concatenate([r[1] for r in results])
+        order = np.argsort(-similarities, kind='stable')[:num_neighbours]
+
+        nearest_ids = []
+        for content_id in content_ids[order]:
+            if content_id not in nearest_ids:
+                nearest_ids.append(content_id)
+        return nearest_ids
+
+    def get_stats(self):
+        partitions = [p for processes in self.partitions.values() for p in processes.values()]
+        return {
+            "ready": self.ready,
+            "rows": self.rows,
+            "partitions": len(partitions),
+            "ivf_partitions": sum(1 for p in partitions if p.is_ivf),
+            "memory_bytes": sum(p.memory_bytes for p in partitions),
+            "watermark": self.watermark,
+            "last_refresh": self.last_refresh,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "last_refresh_rows": self.last_refresh_rows,
+            "refresh_errors": self.refresh_errors
+        }
+
+
+class VectorIndex:
+    """
+    VectorIndex is the process-wide in-memory mirror of support_content_embedding and general_content_embedding.
+
+    SupportAgent.ContentRetriever asks it first and falls back to the Oracle vector_distance query when the index
+    is disabled, not loaded yet or fails. Distances are cosine, like the Oracle default for vector_distance.
+    """
+    _lock = threading.Lock()
+    _indexes = {
+        "support": EmbeddingTableIndex('support_content_embedding', has_customer=True),
+        "general": EmbeddingTableIndex('general_content_embedding', has_customer=False)
+    }
+    settings = {
+        "enabled": False,
+        "refresh_seconds": 300,
+        "flat_threshold": 4096,
+        "nprobe": 8,
+        "retrain_growth": 0.5,
+        "fetch_batch_size": 2000
+    }
+    searches = 0
+    search_seconds = 0.0
+    fallbacks = 0
+
+    @classmethod
+    def configure(cls, **settings):
+        """Update the settings (enabled, refresh_seconds, flat_threshold, nprobe, retrain_growth, fetch_batch_size)."""
+        unknown = set(settings) - set(cls.settings)
+        if unknown:
+            raise ValueError(f"Unknown vector index settings: {', '.join(sorted(unknown))}")
+        with cls._lock:
+            cls.settings = {**cls.settings, **settings}
+
+    @classmethod
+    def load_config(cls, config_path):
+        """Reads the index configuration file; a missing file leaves the index disabled."""
+        try:
+            with open(config_path, 'r') as index_config:
+                cls.configure(**json.load(index_config))
+        except FileNotFoundError:
+            cls.configure(enabled=False)
+
+    @classmethod
+    def is_enabled(cls):
+        return bool(cls.settings['enabled'])
+
+    @classmethod
+    def refresh(cls, db_conn, logger, full=False):
+        """
+        Loads new rows of both tables into the index.
+
+        Parameters:
+        db_conn (Connection): An Oracle connection.
+        logger (Logger): The logger instance.
+        full (bool): Rebuild from scratch instead of loading rows above the watermark.
+        """
+        if not cls.is_enabled():
+            return
+        # One refresh at a time; searches keep using the previous partitions until the new ones are swapped in.
+        with cls._lock:
+            for name, index in cls._indexes.items():
+                try:
+                    with db_conn.cursor() as db_cursor:
+                        added = index.load(db_cursor, cls.settings, full=full)
+                    logger.info(
+                        f"Vector index '{name}' loaded {added} rows in {index.last_refresh_seconds}s, "
+                        f"{index.rows} rows in total, watermark {index.watermark}."
+                    )
+                except Exception as e:
+                    index.refresh_errors += 1
+                    logger.error(f"Vector index '{name}' refresh failed. Error: {e}")
+
+    @classmethod
+    def refresh_from_pool(cls, pool_name, logger, full=False):
+        db_conn = None
+        try:
+            db_conn = db.get_connection(pool_name)
+            cls.refresh(db_conn, logger, full=full)
+        except Exception as e:
+            logger.error(f"Vector index refresh failed. Error: {e}")
+        finally:
+            if db_conn:
+                db.close_connection(db_conn, pool_name)
+
+    @classmethod
+    async def run_refresh_loop(cls, pool_name, logger):
+        """Refreshes the index every refresh_seconds until the task is cancelled."""
+        while True:
+            await asyncio.sleep(cls.settings['refresh_seconds'])
+            await ep.run_db(cls.refresh_from_pool, pool_name, logger)
+
+    @classmethod
+    def _search(cls, name, product_name, customer_name, process_name, query_embeddings, num_neighbours, logger):
+        index = cls._indexes[name]
+        if not cls.is_enabled() or not index.ready:
+            return None
+        started = time.perf_counter()
+        try:
+            results = []
+            for query_embedding in query_embeddings:
+                if query_embedding is None or len(query_embedding) == 0:
+                    results.append([])
+                    continue
+                query = np.array(query_embedding, dtype=np.float32)
+                query /= np.linalg.norm(query) + 1e-12
+                results.append(index.search(
+                    product_name, customer_name, process_name, query, int(num_neighbours), cls.settings['nprobe']
+                ))
+        except Exception as e:
+            cls.fallbacks += 1
+            logger.error(f"Vector index '{name}' search failed, falling back to the database. Error: {e}")
+            return None
+        elapsed = time.perf_counter() - started
+        cls.searches += len(results)
+        cls.search_seconds += elapsed
+        logger.info(
+            f"Vector index '{name}' returned {sum(len(r) for r in results)} content ids for {len(results)} queries "
+            f"in {elapsed * 1e6:.0f}us."
+        )
+        return results
+
+    @classmethod
+    def search_support_many(cls, product_name, process_name, customer_name, query_embeddings, num_neighbours,
+                            logger):
+        """
+        Nearest support_content_embedding content ids of a customer for each query embedding.
+
+        Returns:
+        list: One list of content ids per query, or None when the caller has to query the database instead.
+        """
+        return cls._search(
+            'support', product_name, customer_name, process_name, query_embeddings, num_neighbours, logger
+        )
+
+    @classmethod
+    def search_general_many(cls, product_name, process_name, query_embeddings, num_neighbours, logger):
+        """Nearest general_content_embedding content ids per query. Returns None when the database has to be queried."""
+        return cls._search('general', product_name, None, process_name, query_embeddings, num_neighbours, logger)
+
+    @classmethod
+    def search_support(cls, product_name, process_name, customer_name, query_embedding, num_neighbours, logger):
+        """
+        Nearest support_content_embedding content ids for a customer.
+
+        Returns:
+        list: The content ids, or None when the caller has to query the database instead.
+        """
+        results = cls.search_support_many(
+            product_name, process_name, customer_name, [query_embedding], num_neighbours, logger
+        )
+        return None if results is None else results[0]
+
+    @classmethod
+    def search_general(cls, product_name, process_name, query_embedding, num_neighbours, logger):
+        """Nearest general_content_embedding content ids. Returns None when the database has to be queried."""
+        results = cls.search_general_many(product_name, process_name, [query_embedding], num_neighbours, logger)
+        return None if results is None else results[0]
+
+    @classmethod
+    def get_stats(cls):
+        return {
+            "enabled": cls.is_enabled(),
+            "settings": dict(cls.settings),
+            "searches": cls.searches,
+            "avg_search_us": round(cls.search_seconds / cls.searches * 1e6, 1) if cls.searches else 0.0,
+            "fallbacks": cls.fallbacks,
+            "indexes": {name: index.get_stats() for name, index in cls._indexes.items()}
+        }
+
+
+if __name__ == '__main__':
+    import logging
+
+    class DemoCursor:
+        """Serves rows like an Oracle cursor over an embedding table."""
+        arraysize = 100
+
+        def __init__(self, rows):
+            self.rows = rows
+            self.result = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def execute(self, query, params=None):
+            if 'min(query_id)' in query:
+                self.result = [(None,)]
+            else:
+                self.result = [r for r in self.rows if r[0] > params['watermark']]
+
+        def fetchmany(self):
+            batch, self.result = self.result[:self.arraysize], self.result[self.arraysize:]
+            return batch
+
+        def fetchone(self):
+            return self.result[0]
+
+    l_generator = np.random.default_rng(1)
+    l_rows = [
+        (i, i // 4, 'WINFOTEST', 'ACME', 'P2P' if i % 2 else None, l_generator.normal(size=64).tolist())
+        for i in range(1, 20001)
+    ]
+    l_logger = logging.getLogger('vector_index')
+    VectorIndex.configure(enabled=True, flat_threshold=2048)
+    l_index = VectorIndex._indexes['support']
+    l_index.load(DemoCursor(l_rows[:15000]), VectorIndex.settings, full=True)
+    l_index.load(DemoCursor(l_rows), VectorIndex.settings)
+    print(VectorIndex.search_support('WinfoTest', 'P2P', 'acme', l_rows[42][5], 10, l_logger))
+    print(VectorIndex.get_stats())
@@ -2,9 +2,18 @@ import vertexai
 from google.oauth2 import service_account
 import json
 import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 from google import genai
 from google.genai.types import Tool, GenerateContentConfig, GoogleSearch
 from vertexai.generative_models import GenerativeModel, SafetySetting
+from google.cloud.aiplatform import initializer as aiplatform_initializer
+from google.cloud.aiplatform_v1beta1.services import prediction_service
+from src.app.services.llmResponseCache import LLMResponseCache as rc
+from src.app.services.rateLimiter import RateLimiter as rl
+from src.app.services.executionPools import ExecutionPools as ep
 import os
 
 
@@ -41,7 +50,145 @@ class MimeTypes:
         return mime_types.get(file_extension, "application/octet-stream")
 
 
+class ModelRegistry:
+    """
+    Process-wide, thread-safe LRU cache of authenticated GenerativeModel instances.
+
+    Models are keyed by (key path, model name, location, system instruction hash, response schema hash) and
+    service account credentials are loaded only once per key file.
+
+    A GenerativeModel creates its prediction clients on first use from the global vertexai config, which the next
+    vertexai.init for another key file replaces. The sync client is therefore created while the model is built,
+    and the async client by bind_async_client with the credentials of the model's own key file.
+    """
+    _lock = threading.RLock()
+    _models = OrderedDict()
+    _credentials = {}
+    _api_keys = {}
+    max_models = 64
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    @classmethod
+    def configure(cls, max_models=64):
+        """Sets the maximum number of models kept in the registry, evicting the oldest ones if needed."""
+        with cls._lock:
+            cls.max_models = max(1, int(max_models))
+            while len(cls._models) > cls.max_models:
+                cls._models.popitem(last=False)
+                cls.evictions += 1
+
+    @classmethod
+    def _fingerprint(cls, value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build_key(cls, google_key_config_path, model_name, location, system_instruction, response_schema):
+        return (
+            os.path.abspath(google_key_config_path),
+            model_name,
+            location,
+            cls._fingerprint(system_instruction),
+            cls._fingerprint(response_schema)
+        )
+
+    @classmethod
+    def get_credentials(cls, google_key_config_path):
+        """Returns (credentials, project_id) for the key file, reading it from disk only on first use."""
+        key_path = os.path.abspath(google_key_config_path)
+        with cls._lock:
+            cached = cls._credentials.get(key_path)
+            if cached is None:
+                with open(key_path) as c:
+                    credentials_info = json.load(c)
+
+                credentials = service_account.Credentials.from_service_account_info(credentials_info)
+                cached = (credentials, credentials_info["project_id"])
+                cls._credentials[key_path] = cached
+
+        return cached
+
+    @classmethod
+    def get_api_key(cls, google_key_config_path):
+        """Returns the 'api_key' entry of the key file (None when absent), reading it from disk only on first use."""
+        key_path = os.path.abspath(google_key_config_path)
+        with cls._lock:
+            if key_path not in cls._api_keys:
+                with open(key_path) as c:
+                    cls._api_keys[key_path] = json.load(c).get('api_key')
+
+        return cls._api_keys[key_path]
+
+    @classmethod
+    def bind_async_client(cls, model, google_key_config_path, location):
+        """
+        Creates the async prediction client of a model with the credentials of its key file, once per model. Call it
+        on the event loop thread: the gRPC asyncio channel of the client binds to the running loop.
+        """
+        if getattr(model, '_prediction_async_client_value', None) is None:
+            credentials, _ = cls.get_credentials(google_key_config_path)
+            model._prediction_async_client_value = aiplatform_initializer.global_config.create_client(
+                client_class=prediction_service.PredictionServiceAsyncClient,
+                credentials=credentials,
+                location_override=location,
+                prediction_client=True
+            )
+        return model
+
+    @classmethod
+    def get_model(cls, key, model_builder):
+        """Returns the cached model for the key, building and storing it with model_builder on a miss."""
+        with cls._lock:
+            model = cls._models.get(key)
+            if model is not None:
+                cls._models.move_to_end(key)
+                cls.hits += 1
+                return model
+
+            cls.misses += 1
+            model = model_builder()
+            if model is not None:
+                cls._models[key] = model
+                if len(cls._models) > cls.max_models:
+                    cls._models.popitem(last=False)
+                    cls.evictions += 1
+
+        return model
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                "models": len(cls._models),
+                "max_models": cls.max_models,
+                "credential_files": len(cls._credentials),
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+                "hit_rate": round(cls.hits / total, 4) if total else 0.0
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._models.clear()
+            cls._credentials.clear()
+            cls._api_keys.clear()
+            cls.hits = 0
+            cls.misses = 0
+            cls.evictions = 0
+
+
 class VertexAIService:
+    # llmBackends.LLMBackend answering prompts and embeddings instead of Vertex AI when set.
+    backend = None
+
     def __init__(self, logger, model_name="gemini-1.5-flash-002", location="us-central1"):
         self.logger = logger
         self.model_name = model_name
@@ -57,10 +204,13 @@ class VertexAIService:
             system_instruction="You are a helpful assistant.",
             response_schema=None
     ):
-        logger.info(f"Authenticating using Service Account")
-        try:
-            with open(google_key_config_path) as c:
-                credentials_info = json.load(c)
+        key = ModelRegistry.build_key(
+            google_key_config_path, model_name, location, system_instruction, response_schema
+        )
+
+        def build_model():
+            logger.info(f"Authenticating using Service Account")
+            credentials, project_id = ModelRegistry.get_credentials(google_key_config_path)
 
             safety_settings = [
                 SafetySetting(
@@ -99,58 +249,113 @@ class VertexAIService:
 
             # print(f"Response Schema: {generation_config}")
 
-            credentials = service_account.Credentials.from_service_account_info(credentials_info)
-            project_id = credentials_info["project_id"]
             vertexai.init(project=project_id, location=location, credentials=credentials)
-            model = GenerativeModel(
+            l_model = GenerativeModel(
                 model_name=model_name,
                 system_instruction=system_instruction,
                 generation_config=generation_config,
                 safety_settings=safety_settings
                 # ,stream=True
             )
+            # Runs under the ModelRegistry lock, before another key file can replace the vertexai config.
+            l_model._prediction_client
             logger.info("Model authenticated successfully..")
+            return l_model
+
+        try:
+            model = ModelRegistry.get_model(key, build_model)
             return model
         except Exception as e:
             logger.error(f'Error while Authenticating using Service Account - {e}')
             return None
 
     @classmethod
-    def _retry_with_backoff(cls, func, logger, retries=3, initial_delay=10):
+    def use_backend(cls, backend):
+        """Routes prompts and embeddings to an llmBackends.LLMBackend, or back to Vertex AI when backend is None."""
+        cls.backend = backend
+
+    @classmethod
+    def backend_name(cls):
+        """Name of the backend answering prompts, part of the response and embedding cache keys."""
+        return 'vertex' if cls.backend is None else cls.backend.name
+
+    @classmethod
+    def get_api_key(cls, google_key_config_path):
+        """Returns the api_key of the key file for google search calls; None when another backend answers them."""
+        if cls.backend is not None:
+            return None
+        return ModelRegistry.get_api_key(google_key_config_path)
+
+    @classmethod
+    def _cache_key(cls, prompt, model_name, location, system_instruction, response_schema, use_cache):
+        if not use_cache or not rc.enabled:
+            return None
+        try:
+            return rc.build_key(
+                prompt, model_name, location, system_instruction, response_schema, backend=cls.backend_name()
+            )
+        except Exception:
+            return None
+
+    @classmethod
+    def _retry_with_backoff(cls, func, logger, retries=3, initial_delay=10, governor=None):
+        """
+        Calls func() until it succeeds, sleeping with jittered exponential backoff between attempts. Errors a retry
+        cannot fix (rl.is_retryable_error) are raised at once. When a governor is given every attempt waits for a
+        rate limiter slot and reports 429s back to it.
+        """
         for attempt in range(1, retries+1):
+            if governor:
+                governor.acquire()
             try:
-                return func()
+                result = func()
             except Exception as l_e:
-                logger.warning(f'Attempt {attempt}/{retries} failed.', exc_info=True)
-                if attempt == retries:
+                throttled = rl.is_throttle_error(l_e)
+                if governor:
+                    governor.release(throttled=throttled, failed=not throttled)
+                logger.warning(f'Attempt {attempt}/{retries} failed{" (throttled)" if throttled else ""}.', exc_info=True)
+                if attempt == retries or not rl.is_retryable_error(l_e):
                     raise l_e
-                delay = initial_delay * attempt
-                logger.warning(f'Retrying after {delay:.1f} seconds...', exc_info=True)
+                delay = rl.backoff_delay(attempt, initial_delay)
+                rl.record_retry()
+                logger.warning(f'Retrying after {delay:.1f} seconds...')
                 time.sleep(delay)
-                return None
+            else:
+                if governor:
+                    governor.release()
+                return result
         return None
 
     @classmethod
     def get_prompt_response(cls, prompt, logger, model_name='gemini-2.0-flash', location='us-central1',
                             response_schema=None, google_search=False, api_key=None,
                             google_key_config_path='../configuration/Google_Key(WinfoBots).json',
-                            system_instruction="You are a helpful assistant.", thinking=False):
+                            system_instruction="You are a helpful assistant.", thinking=False, use_cache=False,
+                            cache_ttl=None):
 
         logger.info(f"get prompt response function called.")
 
-        if google_search and model_name.__contains__('gemini-2.0') and api_key:
+        if google_search and model_name.__contains__('gemini-2.0') and (api_key or cls.backend is not None):
             try:
+                if cls.backend is not None:
+                    return cls._retry_with_backoff(
+                        lambda: cls.backend.generate(prompt, model_name=model_name, location=location,
+                                                     google_search=True),
+                        logger, governor=rl.get_governor(model_name, 'google_search'))
+
                 client = genai.Client(http_options={'api_version': 'v1alpha'}, api_key=api_key) # type: ignore[attr-defined]
                 google_search_tool = Tool(google_search=GoogleSearch())
 
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=GenerateContentConfig(
-                        tools=[google_search_tool],
-                        response_modalities=["TEXT"],
+                response = cls._retry_with_backoff(
+                    lambda: client.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=GenerateContentConfig(
+                            tools=[google_search_tool],
+                            response_modalities=["TEXT"],
+                        ),
                     ),
-                )
+                    logger, governor=rl.get_governor(model_name, 'google_search'))
 
                 company_market_info = "".join(part.text for part in response.candidates[0].content.parts)
                 return company_market_info
@@ -164,21 +369,234 @@ class VertexAIService:
             #     thinking_budget_tokens=0 # Disables thinking
             # )
         else:
+            cache_key = cls._cache_key(prompt, model_name, location, system_instruction, response_schema, use_cache)
+            if cache_key:
+                cached_response = rc.get(cache_key, logger)
+                if cached_response is not None:
+                    logger.info(f"Prompt response served from cache.")
+                    return cached_response
+
+            try:
+                if cls.backend is not None:
+                    response_text = cls._retry_with_backoff(
+                        lambda: cls.backend.generate(
+                            prompt, model_name=model_name, location=location,
+                            system_instruction=system_instruction, response_schema=response_schema),
+                        logger, governor=rl.get_governor(model_name, location))
+                else:
+                    model = cls._authenticate_model(
+                        logger, model_name=model_name,
+                        location=location, google_key_config_path=google_key_config_path,
+                        system_instruction=system_instruction, response_schema=response_schema
+                    )
+                    if model is None:
+                        logger.error(f"Model {model_name} is not available in {location}.")
+                        return ''
+
+                    response = cls._retry_with_backoff(
+                        lambda: model.generate_content(prompt), logger,
+                        governor=rl.get_governor(model_name, location))
+                    response_text = response.text
+
+                if cache_key and response_text:
+                    rc.set(cache_key, response_text, ttl=cache_ttl, logger=logger)
+                return response_text
+            except Exception as e:
+                logger.error(f'Failed to get the prompt response: {e}')
+                logger.error(f"prompt: {prompt}")
+                return ''
+
+
+    @classmethod
+    async def _retry_with_backoff_async(cls, func, logger, retries=3, initial_delay=10, governor=None):
+        """Awaitable twin of _retry_with_backoff; cancellation is never retried."""
+        for attempt in range(1, retries + 1):
+            if governor:
+                await governor.acquire_async()
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                if governor:
+                    governor.release(failed=True)
+                logger.warning(f'Attempt {attempt}/{retries} cancelled.')
+                raise
+            except Exception as l_e:
+                throttled = rl.is_throttle_error(l_e)
+                if governor:
+                    governor.release(throttled=throttled, failed=not throttled)
+                logger.warning(f'Attempt {attempt}/{retries} failed{" (throttled)" if throttled else ""}.', exc_info=True)
+                if attempt == retries or not rl.is_retryable_error(l_e):
+                    raise l_e
+                delay = rl.backoff_delay(attempt, initial_delay)
+                rl.record_retry()
+                logger.warning(f'Retrying after {delay:.1f} seconds...')
+                await asyncio.sleep(delay)
+            else:
+                if governor:
+                    governor.release()
+                return result
+        return None
+
+    @classmethod
+    async def get_prompt_response_async(cls, prompt, logger, model_name='gemini-2.0-flash', location='us-central1',
+                                        response_schema=None, google_search=False, api_key=None,
+                                        google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                        system_instruction="You are a helpful assistant.", thinking=False,
+                                        use_cache=False, cache_ttl=None):
+        """
+        Awaitable twin of get_prompt_response. The Gemini call is made with generate_content_async (or the genai
+        async client for google search) so the event loop is never blocked, and backoff uses asyncio.sleep.
+        asyncio.CancelledError is propagated to the caller.
+        """
+        logger.info(f"get prompt response async function called.")
+
+        if google_search and model_name.__contains__('gemini-2.0') and (api_key or cls.backend is not None):
+            try:
+                if cls.backend is not None:
+                    return await cls._retry_with_backoff_async(
+                        lambda: ep.run_llm(cls.backend.generate, prompt, model_name=model_name, location=location,
+                                           google_search=True),
+                        logger, governor=rl.get_governor(model_name, 'google_search'))
+
+                client = genai.Client(http_options={'api_version': 'v1alpha'}, api_key=api_key) # type: ignore[attr-defined]
+                google_search_tool = Tool(google_search=GoogleSearch())
+
+                response = await cls._retry_with_backoff_async(
+                    lambda: client.aio.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=GenerateContentConfig(
+                            tools=[google_search_tool],
+                            response_modalities=["TEXT"],
+                        ),
+                    ),
+                    logger, governor=rl.get_governor(model_name, 'google_search'))
+
+                company_market_info = "".join(part.text for part in response.candidates[0].content.parts)
+                return company_market_info
+            except asyncio.CancelledError:
+                logger.warning(f"Google search prompt response cancelled.")
+                raise
+            except Exception as e:
+                logger.error(f'Failed to get the prompt response from google search: {e}')
+                logger.error(f"prompt: {prompt}")
+                return ''
+        else:
+            cache_key = cls._cache_key(prompt, model_name, location, system_instruction, response_schema, use_cache)
+            if cache_key:
+                # The disk tier is a SQLite read, keep it off the event loop.
+                cached_response = await ep.run_db(rc.get, cache_key, logger)
+                if cached_response is not None:
+                    logger.info(f"Prompt response served from cache.")
+                    return cached_response
+
             try:
-                model = cls._retry_with_backoff(
-                    lambda: cls._authenticate_model(
+                if cls.backend is not None:
+                    response_text = await cls._retry_with_backoff_async(
+                        lambda: ep.run_llm(
+                            cls.backend.generate, prompt, model_name=model_name, location=location,
+                            system_instruction=system_instruction, response_schema=response_schema),
+                        logger, governor=rl.get_governor(model_name, location))
+                else:
+                    # Model lookup is a registry hit after the first call; a miss reads the key file, so keep it
+                    # off the event loop.
+                    model = await ep.run_llm(
+                        cls._authenticate_model,
                         logger, model_name=model_name,
                         location=location, google_key_config_path=google_key_config_path,
-                        system_instruction=system_instruction, response_schema=response_schema),
-                    logger)
+                        system_instruction=system_instruction, response_schema=response_schema
+                    )
+                    if model is None:
+                        logger.error(f"Model {model_name} is not available in {location}.")
+                        return ''
+                    ModelRegistry.bind_async_client(model, google_key_config_path, location)
 
-                response = cls._retry_with_backoff(lambda: model.generate_content(prompt), logger)
-                return response.text
+                    response = await cls._retry_with_backoff_async(
+                        lambda: model.generate_content_async(prompt), logger,
+                        governor=rl.get_governor(model_name, location))
+                    response_text = response.text
+
+                if cache_key and response_text:
+                    await ep.run_db(rc.set, cache_key, response_text, cache_ttl, logger)
+                return response_text
+            except asyncio.CancelledError:
+                logger.warning(f"Prompt response cancelled for model {model_name}.")
+                raise
             except Exception as e:
                 logger.error(f'Failed to get the prompt response: {e}')
                 logger.error(f"prompt: {prompt}")
                 return ''
 
+    @classmethod
+    async def stream_prompt_response_async(cls, prompt, logger, model_name='gemini-2.0-flash', location='us-central1',
+                                           response_schema=None,
+                                           google_key_config_path='../configuration/Google_Key(WinfoBots).json',
+                                           system_instruction="You are a helpful assistant.", retries=3,
+                                           initial_delay=10):
+        """
+        Async generator yielding the response text chunks as Gemini produces them (generate_content with
+        stream=True). A failed call is retried with backoff only while nothing has been yielded yet; after the
+        first chunk an error ends the stream and the caller works with the text received so far.
+        """
+        logger.info(f"stream prompt response function called.")
+
+        if cls.backend is not None:
+            model = None
+        else:
+            model = await ep.run_llm(
+                cls._authenticate_model,
+                logger, model_name=model_name,
+                location=location, google_key_config_path=google_key_config_path,
+                system_instruction=system_instruction, response_schema=response_schema
+            )
+            if model is None:
+                logger.error(f"Model {model_name} is not available in {location}.")
+                return
+            ModelRegistry.bind_async_client(model, google_key_config_path, location)
+
+        governor = rl.get_governor(model_name, location)
+        chunks_sent = 0
+        for attempt in range(1, retries + 1):
+            # The slot is held for the whole stream and released in finally, also when the consumer stops early.
+            await governor.acquire_async()
+            release_state = {"failed": True}
+            try:
+                if model is None:
+                    async for text in cls.backend.generate_stream(
+                            prompt, model_name=model_name, location=location,
+                            system_instruction=system_instruction, response_schema=response_schema):
+                        if text:
+                            chunks_sent += 1
+                            yield text
+                else:
+                    responses = await model.generate_content_async(prompt, stream=True)
+                    async for response in responses:
+                        try:
+                            text = response.text
+                        except Exception:
+                            # Chunks carrying only finish/safety metadata have no text part.
+                            continue
+                        if text:
+                            chunks_sent += 1
+                            yield text
+                release_state = {}
+                return
+            except asyncio.CancelledError:
+                logger.warning(f"Streaming prompt response cancelled for model {model_name}.")
+                raise
+            except Exception as e:
+                throttled = rl.is_throttle_error(e)
+                release_state = {"throttled": throttled, "failed": not throttled}
+                if chunks_sent or attempt == retries or not rl.is_retryable_error(e):
+                    logger.error(f'Failed to stream the prompt response after {chunks_sent} chunks: {e}')
+                    logger.error(f"prompt: {prompt}")
+                    return
+                delay = rl.backoff_delay(attempt, initial_delay)
+                rl.record_retry()
+                logger.warning(f'Stream attempt {attempt}/{retries} failed. Retrying after {delay:.1f} seconds...')
+            finally:
+                governor.release(**release_state)
+            await asyncio.sleep(delay)
 
 if __name__ == '__main__':
     from src.app.utils.loggerConfig import LoggerManager as lg
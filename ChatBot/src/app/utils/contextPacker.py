@@ -0,0 +1,176 @@
+"""
+A module for fitting retrieved contents into an agent prompt token budget.
+"""
+
+import re
+import hashlib
+import threading
+
+from src.app.utils.dataChunk import TextChunkProcessor as tcp
+
+
+class ContextPacker:
+    """
+    ContextPacker ranks retrieved contents, drops exact and near duplicate texts and keeps the best ones that fit in
+    the token budget of an agent. Budgets come from the context_token_budget column of WAIAgentPromptsConfig, with
+    DEFAULT_BUDGETS used for agents that are not configured there.
+    """
+    DEFAULT_BUDGETS = {
+        "SalesAgent3": 16000,
+        "SalesAgent4": 24000,
+        "Agent3.1": 16000,
+        "Agent4": 24000,
+        "Agent7": 24000
+    }
+    DEFAULT_BUDGET = 16000
+    # A content that does not fit is cut down only when at least this many tokens are left.
+    MIN_PARTIAL_TOKENS = 200
+    SHINGLE_SIZE = 5
+    NEAR_DUPLICATE_THRESHOLD = 0.9
+
+    _tokenizer = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, budgets=None, default_budget=None):
+        """Overrides the fallback budgets, e.g. configure({'SalesAgent3': 8000})."""
+        if budgets:
+            cls.DEFAULT_BUDGETS = {**cls.DEFAULT_BUDGETS, **budgets}
+        if default_budget:
+            cls.DEFAULT_BUDGET = default_budget
+
+    @classmethod
+    def get_budget(cls, agent_name, configured_budget=None):
+        """Returns the configured budget of the agent, falling back to its default."""
+        try:
+            if configured_budget and int(configured_budget) > 0:
+                return int(configured_budget)
+        except (TypeError, ValueError):
+            pass
+        return cls.DEFAULT_BUDGETS.get(agent_name, cls.DEFAULT_BUDGET)
+
+    @classmethod
+    def _get_tokenizer(cls, logger):
+        if cls._tokenizer is None:
+            with cls._lock:
+                if cls._tokenizer is None:
+                    cls._tokenizer = tcp.get_tokenizer(logger)
+        return cls._tokenizer
+
+    @classmethod
+    def _shingles(cls, text):
+        words = re.sub(r'\s+', ' ', text.lower()).strip().split(' ')
+        if len(words) < cls.SHINGLE_SIZE:
+            return {' '.join(words)}
+        return {' '.join(words[i:i + cls.SHINGLE_SIZE]) for i in range(len(words) - cls.SHINGLE_SIZE + 1)}
+
+    @classmethod
+    def _dedupe(cls, items):
+        """Returns the items without exact or near duplicates (word shingle Jaccard similarity), keeping the first."""
+        unique_items = []
+        seen_digests = set()
+        seen_shingles = []
+        for item in items:
+            text = str(item)
+            digest = hashlib.sha1(re.sub(r'\s+', ' ', text.lower()).strip().encode('utf-8')).hexdigest()
+            if digest in seen_digests:
+                continue
+
+            shingles = cls._shingles(text)
+            is_duplicate = False
+            for other in seen_shingles:
+                union = len(shingles | other)
+                if union and len(shingles & other) / union >= cls.NEAR_DUPLICATE_THRESHOLD:
+                    is_duplicate = True
+                    break
+            if is_duplicate:
+                continue
+
+            seen_digests.add(digest)
+            seen_shingles.append(shingles)
+            unique_items.append(item)
+        return unique_items
+
+    @classmethod
+    def pack_items(cls, items, token_budget, logger, agent_name='', scores=None):
+        """
+        Fit retrieved items into a token budget.
+
+        Parameters:
+        items (list): Contents as strings or dicts (e.g. question/answer pairs), nearest first.
+        token_budget (int): Maximum number of tokens for all kept items.
+        logger (Logger): The logger instance.
+        agent_name (str): Used in the log line only.
+        scores (list): Optional relevance score per item (higher is better); items are ranked by it, otherwise
+            the retrieval order is kept.
+
+        Returns:
+        tuple: (kept items, stats dict with input/kept/duplicate counts and input/packed/dropped tokens).
+        """
+        items = [item for item in (items or []) if item]
+        if scores is not None and len(scores) == len(items):
+            ranked = sorted(zip(scores, range(len(items))), key=lambda s: (-s[0], s[1]))
+            items = [items[index] for _, index in ranked]
+
+        try:
+            tokenizer = cls._get_tokenizer(logger)
+        except Exception as e:
+            logger.error(f"Context for {agent_name} is not packed, tokenizer is not available. Error: {e}")
+            return items, {}
+
+        input_tokens = sum(len(tokenizer.encode(str(item))) for item in items)
+        unique_items = cls._dedupe(items)
+
+        kept_items = []
+        packed_tokens = 0
+        for item in unique_items:
+            tokens = tokenizer.encode(str(item))
+            remaining = token_budget - packed_tokens
+            if len(tokens) <= remaining:
+                kept_items.append(item)
+                packed_tokens += len(tokens)
+            elif isinstance(item, str) and remaining >= cls.MIN_PARTIAL_TOKENS:
+                kept_items.append(tokenizer.decode(tokens[:remaining]))
+                packed_tokens += remaining
+
+        stats = {
+            "input_items": len(items),
+            "kept_items": len(kept_items),
+            "duplicate_items": len(items) - len(unique_items),
+            "input_tokens": input_tokens,
+            "packed_tokens": packed_tokens,
+            "dropped_tokens": max(0, input_tokens - packed_tokens),
+            "token_budget": token_budget
+        }
+        logger.info(
+            f"Context packed for {agent_name}: kept {stats['kept_items']}/{stats['input_items']} items "
+            f"({stats['duplicate_items']} duplicates), {packed_tokens} of {input_tokens} tokens, "
+            f"dropped {stats['dropped_tokens']} tokens (budget {token_budget})."
+        )
+        return kept_items, stats
+
+    @classmethod
+    def pack(cls, contents, token_budget, logger, agent_name='', separator='\n\n', scores=None):
+        """
+        Fit retrieved text contents into a token budget and join them.
+
+        Returns:
+        tuple: (packed text, stats dict). See pack_items.
+        """
+        kept_items, stats = cls.pack_items(contents, token_budget, logger, agent_name=agent_name, scores=scores)
+        return separator.join(kept_items), stats
+
+
+if __name__ == '__main__':
+    from src.app.utils.loggerConfig import LoggerManager as lg
+
+    l_logger = lg.configure_logger('../../../logs/context_packer')
+    l_contents = [
+        "WinfoBots automates Oracle EBS and Fusion testing with reusable scripts.",
+        "WinfoBots automates Oracle EBS and Fusion testing with reusable scripts. ",
+        "Invoices are validated before they are posted to the general ledger. " * 40,
+        "Purchase orders are approved by the buyer before they are sent to suppliers. " * 40
+    ]
+    l_text, l_stats = ContextPacker.pack(l_contents, 600, l_logger, agent_name='demo')
+    print(l_stats)
+    lg.shutdown_logger(l_logger)
@@ -0,0 +1,120 @@
+"""
+A module for framing streamed agent responses.
+"""
+
+import json
+import re
+
+
+class StreamEvents:
+    """
+    StreamEvents formats agent stream events as Server-Sent Events or newline delimited JSON.
+    """
+    MEDIA_TYPES = {
+        "sse": "text/event-stream",
+        "ndjson": "application/x-ndjson"
+    }
+
+    @classmethod
+    def media_type(cls, stream_format):
+        """
+        Get the response media type for the stream format.
+
+        Parameters:
+        stream_format (str): 'sse' or 'ndjson'.
+
+        Returns:
+        str: The media type.
+        """
+        return cls.MEDIA_TYPES.get(str(stream_format).lower(), cls.MEDIA_TYPES["sse"])
+
+    @classmethod
+    def format_event(cls, event, payload, stream_format="sse"):
+        """
+        Frame a single event.
+
+        Parameters:
+        event (str): The event name (start, token, end, error).
+        payload (dict): The event data.
+        stream_format (str): 'sse' or 'ndjson'.
+
+        Returns:
+        str: The framed event.
+        """
+        if str(stream_format).lower() == "ndjson":
+            return json.dumps({"event": event, **payload}) + "\n"
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+class JsonFieldStreamer:
+    """
+    JsonFieldStreamer incrementally extracts the value of a string field from a JSON object that is being
+    streamed by the model, so the field can be forwarded token by token before the object is complete.
+    """
+
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+    def __init__(self, field_name):
+        self.field_name = field_name
+        self.buffer = ''
+        self._field_pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field_name))
+        self._position = None
+        self.completed = False
+
+    def feed(self, chunk):
+        """
+        Add a streamed chunk.
+
+        Parameters:
+        chunk (str): The next piece of model output.
+
+        Returns:
+        str: The newly decoded characters of the field value (may be empty).
+        """
+        self.buffer += chunk
+        if self.completed:
+            return ''
+
+        if self._position is None:
+            field_match = self._field_pattern.search(self.buffer)
+            if not field_match:
+                return ''
+            self._position = field_match.end()
+
+        decoded = []
+        index = self._position
+        while index < len(self.buffer):
+            char = self.buffer[index]
+            if char == '\\':
+                # Wait for the rest of the escape sequence before decoding it.
+                if index + 1 >= len(self.buffer):
+                    break
+                escaped = self.buffer[index + 1]
+                if escaped == 'u':
+                    if index + 6 > len(self.buffer):
+                        break
+                    try:
+                        decoded.append(chr(int(self.buffer[index + 2:index + 6], 16)))
+                    except ValueError:
+                        pass
+                    index += 6
+                    continue
+                decoded.append(self.ESCAPES.get(escaped, escaped))
+                index += 2
+                continue
+            if char == '"':
+                self.completed = True
+                index += 1
+                break
+            decoded.append(char)
+            index += 1
+
+        self._position = index
+        return ''.join(decoded)
+
+
+if __name__ == '__main__':
+    streamer = JsonFieldStreamer('resolution')
+    for l_chunk in ['{"assump', 'tions": [], "resolution": "Restart ', 'the \\"bot\\"\\n', 'now", "x": 1}']:
+        print(repr(streamer.feed(l_chunk)))
+    print(StreamEvents.format_event('token', {'data': 'hello'}))
@@ -14,6 +14,7 @@ class PromptConfig(BaseModel):
     prompt_created_by: str
     prompt_last_updated_by: Optional[str] = None
     nearest_neighbours: Optional[int] = None
+    context_token_budget: Optional[int] = None
     comments: Optional[str] = None
     product_name: str
     operation_flag: Literal[
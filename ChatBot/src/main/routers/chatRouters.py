@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 import traceback
 
-from src.app.services.dbConnect import DBConnection as db
+from src.app.services.executionPools import ExecutionPools as ep
 from src.main.dependencies import get_nosql_conn_dependency, get_ai_db_pool_dependency, get_log_dir_path
 from src.app.utils.loggerConfig import LoggerManager as lg
 from src.main.models.chatModels import ChatResponse, MessageFeedback
@@ -33,7 +33,7 @@ async def get_chat_id(
     logger = lg.configure_logger(f"{log_dir_path}/GetChatID")
     logger.info(f"Fetching the existing chat ID..")
     try:
-        chat_id = co.get_chat_id(issue_id, nosql_conn)
+        chat_id = await ep.run_db(co.get_chat_id, issue_id, nosql_conn)
     except Exception as e:
         logger.warning(f"Failed to get the existing chat ID. Error: {e}")
         chat_id = 0
@@ -56,11 +56,13 @@ async def max_message_id(
     logger.info(f"Processing Max QueryId chatbot request...")
     ai_db_conn = None
     try:
-        ai_db_conn = db.get_connection(ai_db_pool_name)
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
         session_id = data.get('session_id')
         chat_id = data.get('chat_id')
         issue_id = data.get('issue_id')
-        r_max_message_id = co.get_max_message_id(session_id, chat_id, nosql_conn, logger, issue_id=issue_id)
+        r_max_message_id = await ep.run_db(
+            co.get_max_message_id, session_id, chat_id, nosql_conn, logger, issue_id=issue_id
+        )
         return {
             "data_type": "text",
             "max_message_id": r_max_message_id,
@@ -71,7 +73,7 @@ async def max_message_id(
         return {"data_type": "text", "max_query_id": 0, "chat_id": None}
     finally:
         if ai_db_conn:
-            db.close_connection(ai_db_conn, ai_db_pool_name)
+            await ep.close_connection(ai_db_conn, ai_db_pool_name)
             logger.info("DB connection released.")
         logger.info("Closing chatbot logger.")
         lg.shutdown_logger(logger)
@@ -93,7 +95,7 @@ async def agent_chat_response(
         data = data.model_dump()
         chat_id = data.get('chat_id')
         message_id = data.get('message_id')
-        chat_resp = co.get_chat_response(chat_id, message_id, nosql_conn, logger)
+        chat_resp = await ep.run_db(co.get_chat_response, chat_id, message_id, nosql_conn, logger)
         return {
             "data_type": "text",
             "data": chat_resp,
@@ -123,12 +125,12 @@ async def get_chat_history(
     logger.info(f"Processing Chat Response chatbot request...")
     ai_db_conn = None
     try:
-        ai_db_conn = db.get_connection(ai_db_pool_name)
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
         session_id = data.get('session_id')
         chat_id = data.get('chat_id')
         issue_id = data.get('issue_id')
-        all_prv_chats, prv_chats_cnt = co.get_chat_history(
-            chat_id, nosql_conn, logger, issue_id=issue_id
+        all_prv_chats, prv_chats_cnt = await ep.run_db(
+            co.get_chat_history, chat_id, nosql_conn, logger, issue_id=issue_id
         )
 
         if prv_chats_cnt == 0:
@@ -144,7 +146,7 @@ async def get_chat_history(
         return {"messages": []}
     finally:
         if ai_db_conn:
-            db.close_connection(ai_db_conn, ai_db_pool_name)
+            await ep.close_connection(ai_db_conn, ai_db_pool_name)
             logger.info("DB connection released.")
         logger.info("Closing chatbot logger.")
         lg.shutdown_logger(logger)
@@ -161,7 +163,7 @@ async def insert_message_feedback(
         log_dir_path=Depends(get_log_dir_path)
 ):
     logger = lg.configure_logger(f"{log_dir_path}/MessageFeedback")
-    msg_insert_flg = co.update_message_feedback(request.model_dump(), nosql_conn, logger)
+    msg_insert_flg = await ep.run_db(co.update_message_feedback, request.model_dump(), nosql_conn, logger)
     lg.shutdown_logger(logger)
 
     return msg_insert_flg
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends
 from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 import json
 
 
@@ -7,6 +9,7 @@ from src.main.dependencies import get_nosql_conn_dependency, get_log_dir_path
 from src.app.metadata.configDataManager import PromptConfigManager as pcm
 from src.app.metadata.configDataManager import CustomerProcessDetailsConfigManager as cpdm
 from src.app.utils.loggerConfig import LoggerManager as lg
+from src.app.services.executionPools import ExecutionPools as ep
 from src.main.models.configModels import PromptConfigList, ProcessDetailsConfigList
 
 router = APIRouter()
@@ -27,6 +30,21 @@ def limit_body_size(max_size: int):
 
     return dependency
 
+async def stream_json_rows(rows, logger):
+    """
+    Streams rows as one JSON array, encoding a row at a time, and shuts the logger down at the end. The rows are
+    fetched on the db pool.
+    """
+    try:
+        yield '['
+        index = 0
+        async for row in ep.iterate(rows):
+            yield (',' if index else '') + json.dumps(jsonable_encoder(row))
+            index += 1
+        yield ']'
+    finally:
+        lg.shutdown_logger(logger)
+
 
 @router.post(
     "/PromptManager",
@@ -56,10 +74,9 @@ async def prompt_config_manager(
 )
 async def get_configured_prompts(nosql_conn=Depends(get_nosql_conn_dependency), log_dir_path=Depends(get_log_dir_path)):
     logger = lg.configure_logger(f"{log_dir_path}/GetPromptsData")
-    prompts_res = await pcm.get_prompts_data(nosql_conn, logger)
-    lg.shutdown_logger(logger)
-
-    return prompts_res
+    return StreamingResponse(
+        stream_json_rows(pcm.iter_prompts_data(nosql_conn, logger), logger), media_type="application/json"
+    )
 
 @router.post(
     "/CustomerProcessDetailsManager",
@@ -90,8 +107,7 @@ async def prompt_config_manager(
 )
 async def get_configured_process_data(nosql_conn=Depends(get_nosql_conn_dependency), log_dir_path=Depends(get_log_dir_path)):
     logger = lg.configure_logger(f"{log_dir_path}/GetCustomerProcessData")
-    process_res = await cpdm.get_process_details_data(nosql_conn, logger)
-    lg.shutdown_logger(logger)
-
-    return process_res
+    return StreamingResponse(
+        stream_json_rows(cpdm.iter_process_details_data(nosql_conn, logger), logger), media_type="application/json"
+    )
 
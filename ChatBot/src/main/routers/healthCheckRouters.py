@@ -4,8 +4,17 @@ import json
 
 from src.main.dependencies import get_ai_db_pool_dependency, get_log_dir_path, get_db_config_path, get_nosql_oci_private_key
 from src.app.utils.loggerConfig import LoggerManager as lg
-from src.app.services.dbConnect import DBConnection as db
 from src.app.services.nosqlConnection import NoSQLConnectionManager as ncm
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+from src.app.services.llmResponseCache import LLMResponseCache as rc
+from src.app.services.rateLimiter import RateLimiter as rl
+from src.app.services.embeddingCache import EmbeddingCache as ec
+from src.app.services.vectorIndex import VectorIndex as vix
+from src.app.services.contentCache import ContentCache as cc
+from src.app.metadata.promptConfigRegistry import PromptConfigRegistry as pcr
+from src.app.services.chatWriteBehind import ChatWriteBehind as cwb
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+from src.app.services.executionPools import ExecutionPools as ep
 
 router = APIRouter()
 
@@ -19,6 +28,96 @@ router = APIRouter()
 async def health_check():
     return {"status": "Success"}
 
+@router.get(
+    "/CacheStats",
+    summary="LLM Response Cache Statistics",
+    description="Returns entry counts and hit rate of the LLM response cache.",
+    operation_id="cache_stats"
+)
+async def cache_stats():
+    return {"status": "Success", "data": rc.get_stats()}
+
+@router.get(
+    "/RateLimiterStats",
+    summary="LLM Rate Limiter Statistics",
+    description="Returns the current rate, in-flight calls, queue wait times and throttle events per model and location.",
+    operation_id="rate_limiter_stats"
+)
+async def rate_limiter_stats():
+    return {"status": "Success", "data": rl.get_stats()}
+
+@router.get(
+    "/EmbeddingCacheStats",
+    summary="Query Embedding Cache Statistics",
+    description="Returns entry counts, memory use and hit rate of the query embedding cache.",
+    operation_id="embedding_cache_stats"
+)
+async def embedding_cache_stats():
+    return {"status": "Success", "data": ec.get_stats()}
+
+@router.get(
+    "/VectorIndexStats",
+    summary="Vector Index Statistics",
+    description="Returns rows, partitions, memory use, refresh watermark and search latency of the in-process vector index.",
+    operation_id="vector_index_stats"
+)
+async def vector_index_stats():
+    return {"status": "Success", "data": vix.get_stats()}
+
+@router.get(
+    "/ContentCacheStats",
+    summary="Content Cache Statistics",
+    description="Returns entry counts, size in bytes, hit rate and invalidations of the document content cache.",
+    operation_id="content_cache_stats"
+)
+async def content_cache_stats():
+    return {"status": "Success", "data": cc.get_stats()}
+
+@router.get(
+    "/PromptConfigStats",
+    summary="Prompt Config Registry Statistics",
+    description="Returns the number of cached prompt configurations, their age and the lookup hit rate.",
+    operation_id="prompt_config_stats"
+)
+async def prompt_config_stats():
+    return {"status": "Success", "data": pcr.get_stats()}
+
+@router.get(
+    "/ChatWriteBehindStats",
+    summary="Chat Write-Behind Statistics",
+    description="Returns the chats waiting to be stored and the written, retried and dropped chat writes.",
+    operation_id="chat_write_behind_stats"
+)
+async def chat_write_behind_stats():
+    return {"status": "Success", "data": cwb.get_stats()}
+
+@router.get(
+    "/SessionStateCacheStats",
+    summary="Support Chat Session State Cache Statistics",
+    description="Returns the cached support chat states, their size and the lookup hit rate.",
+    operation_id="session_state_cache_stats"
+)
+async def session_state_cache_stats():
+    return {"status": "Success", "data": ssc.get_stats()}
+
+@router.get(
+    "/NoSQLStatementStats",
+    summary="NoSQL Prepared Statement Statistics",
+    description="Returns the number of cached prepared NoSQL statements, prepares, prepare hits and query counts.",
+    operation_id="nosql_statement_stats"
+)
+async def nosql_statement_stats():
+    return {"status": "Success", "data": tm.get_statement_stats()}
+
+@router.get(
+    "/ExecutionPoolStats",
+    summary="Execution Pool Statistics",
+    description="Returns the size, running calls, queue depth and queue wait times of the db, llm and connect thread pools.",
+    operation_id="execution_pool_stats"
+)
+async def execution_pool_stats():
+    return {"status": "Success", "data": ep.get_stats()}
+
 @router.get(
     "/TestConnections",
     summary="Test Database and Logger Connections",
@@ -37,24 +136,26 @@ async def test_connections(
     l_nosql_conn = None
     try:
         logger.info("Testing database connection...")
-        ai_db_conn = db.get_connection(ai_db_pool_name)
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
 
         with open(db_config_path, 'rb') as db_details:
             db_details = json.load(db_details)
 
         l_nosql_db_details = db_details.get('WAI_NoSQL')
-        l_nosql_conn = ncm.get_nosql_conn(nosql_db_details=l_nosql_db_details, private_key_file=nosql_oci_private_key)
+        l_nosql_conn = await ep.run_db(
+            ncm.get_nosql_conn, nosql_db_details=l_nosql_db_details, private_key_file=nosql_oci_private_key
+        )
         return {"message": "Logger and database connections are working fine."}
     except Exception as e:
         logger.error(f"Connection test failed: {e}")
         return {"error": str(e)}
     finally:
         if ai_db_conn:
-            db.close_connection(ai_db_conn, ai_db_pool_name)
+            await ep.close_connection(ai_db_conn, ai_db_pool_name)
             logger.info("Application DB connection released.")
 
         if l_nosql_conn:
-            ncm.close_nosql_conn(l_nosql_conn)
+            await ep.run_db(ncm.close_nosql_conn, l_nosql_conn)
             logger.info("NoSQL DB connection released.")
 
         logger.info("Closing connection test logger.")
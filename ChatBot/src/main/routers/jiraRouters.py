@@ -7,7 +7,7 @@ from src.main.dependencies import (
     get_log_dir_path,
     get_jira_config_path
 )
-from src.app.services.dbConnect import DBConnection as db
+from src.app.services.executionPools import ExecutionPools as ep
 from src.app.utils.loggerConfig import LoggerManager as lg
 from src.app.services.jiraActivities import JiraActivities as ja
 
@@ -23,7 +23,7 @@ async def load_issue(
     jira_config_path
 ):
     logger = lg.configure_logger(f"{log_dir_path}/WAISupportAgentIssueLoader")
-    ai_db_conn = db.get_connection(ai_db_pool_name)
+    ai_db_conn = await ep.get_connection(ai_db_pool_name)
     await ja.jira_support_agents(
         ai_db_conn,
         nosql_conn,
@@ -34,7 +34,7 @@ async def load_issue(
 
     if ai_db_conn:
         try:
-            db.close_connection(ai_db_conn, ai_db_pool_name)
+            await ep.close_connection(ai_db_conn, ai_db_pool_name)
             logger.info("DB connection released.")
         except Exception as e:
             logger.error(f"Error releasing DB connection: {e}")
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
+from typing import Literal
 import traceback
 
 
 from src.main.models.salesModels import SalesChatRequest
 from src.app.chatbot.chatBot import SalesChatBot as scb
-from src.app.services.dbConnect import DBConnection as db
+from src.app.services.executionPools import ExecutionPools as ep
 from src.app.utils.loggerConfig import LoggerManager as lg
+from src.app.utils.streamUtils import StreamEvents as se
 from src.main.dependencies import (
     get_ai_db_pool_dependency,
+    get_nosql_conn_dependency,
     get_google_key_config_path_dependency,
     get_log_dir_path
 )
@@ -26,7 +30,7 @@ async def process_sales_request(
     logger = lg.configure_logger(f"{log_dir_path}/WAI{query_level}Agent")
     try:
         logger.info(f"Processing {query_level} chatbot request...")
-        ai_db_conn = db.get_connection(ai_db_pool_name)
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
         data["query_level"] = query_level
         bot_res, chat_id, query_id = await scb.sales_chatbot(
             data,
@@ -48,7 +52,7 @@ async def process_sales_request(
     finally:
         if ai_db_conn:
             try:
-                db.close_connection(ai_db_conn, ai_db_pool_name)
+                await ep.close_connection(ai_db_conn, ai_db_pool_name)
                 logger.info("DB connection released.")
             except Exception as e:
                 logger.error(f"Error releasing DB connection: {e}")
@@ -100,3 +104,68 @@ async def sales_chatbot_basic(
         google_key_config_path=google_key_config_path,
         log_dir_path=log_dir_path
     )
+
+
+async def stream_sales_request(
+    data: dict,
+    ai_db_pool_name: str,
+    nosql_conn,
+    google_key_config_path: str,
+    log_dir_path: str,
+    stream_format: str
+):
+    ai_db_conn = None
+    logger = lg.configure_logger(f"{log_dir_path}/WAIBasicAgent")
+    try:
+        logger.info(f"Processing Basic chatbot streaming request...")
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
+        data["query_level"] = "Basic"
+        async for event, payload in scb.sales_chatbot_stream(
+            data,
+            ai_db_conn,
+            nosql_conn,
+            logger,
+            model_name="gemini-2.5-flash-preview-05-20",
+            nearest_neighbours=30,
+            google_key_config_path=google_key_config_path
+        ):
+            yield se.format_event(event, payload, stream_format)
+    except Exception as e:
+        logger.error(f"Exception in chatbot stream process: {e}\n{traceback.format_exc()}")
+        yield se.format_event("error", {"data": "Error processing request."}, stream_format)
+    finally:
+        if ai_db_conn:
+            try:
+                await ep.close_connection(ai_db_conn, ai_db_pool_name)
+                logger.info("DB connection released.")
+            except Exception as e:
+                logger.error(f"Error releasing DB connection: {e}")
+        logger.info("Closing chatbot logger.")
+        lg.shutdown_logger(logger)
+
+@router.post(
+    "/Basic/Stream",
+    summary="Start Basic Pre-Sales Chat (Streaming)",
+    description="Streams a basic pre-sales chatbot response as it is generated, as Server-Sent Events or NDJSON.",
+    operation_id="sales_chatbot_basic_stream"
+)
+async def sales_chatbot_basic_stream(
+    request: SalesChatRequest,
+    stream_format: Literal["sse", "ndjson"] = "sse",
+    ai_db_pool_name=Depends(get_ai_db_pool_dependency),
+    nosql_conn=Depends(get_nosql_conn_dependency),
+    google_key_config_path=Depends(get_google_key_config_path_dependency),
+    log_dir_path=Depends(get_log_dir_path)
+):
+    """Streams basic chatbot responses."""
+    return StreamingResponse(
+        stream_sales_request(
+            request.model_dump(),
+            ai_db_pool_name=ai_db_pool_name,
+            nosql_conn=nosql_conn,
+            google_key_config_path=google_key_config_path,
+            log_dir_path=log_dir_path,
+            stream_format=stream_format
+        ),
+        media_type=se.media_type(stream_format)
+    )
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from typing import Literal
 import traceback
 
 
 from src.main.models.supportModels import SupportChatRequest
 from src.app.chatbot.chatBot import SupportChatBot as suppa
-from src.app.services.dbConnect import DBConnection as db
+from src.app.services.executionPools import ExecutionPools as ep
 from src.app.utils.loggerConfig import LoggerManager as lg
+from src.app.utils.streamUtils import StreamEvents as se
 from src.main.dependencies import (
     get_ai_db_pool_dependency,
     get_nosql_conn_dependency,
@@ -27,7 +30,7 @@ async def process_support_agent(
     logger = lg.configure_logger(f"{log_dir_path}/WAISupportAgent")
     try:
         logger.info(f"Processing WAI Support Agent request...")
-        ai_db_conn = db.get_connection(ai_db_pool_name)
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
         bot_res, chat_id, message_id = await suppa.support_agent(
         data,
         ai_db_conn,
@@ -49,7 +52,7 @@ async def process_support_agent(
     finally:
         if ai_db_conn:
             try:
-                db.close_connection(ai_db_conn, ai_db_pool_name)
+                await ep.close_connection(ai_db_conn, ai_db_pool_name)
                 logger.info("DB connection released.")
             except Exception as e:
                 logger.error(f"Error releasing DB connection: {e}")
@@ -79,3 +82,69 @@ async def support_chatbot(
         google_key_config_path=google_key_config_path,
         log_dir_path=log_dir_path
     )
+
+
+async def stream_support_agent(
+        data: dict,
+        ai_db_pool_name,
+        nosql_conn,
+        google_key_config_path,
+        log_dir_path,
+        stream_format
+):
+    ai_db_conn = None
+    logger = lg.configure_logger(f"{log_dir_path}/WAISupportAgent")
+    try:
+        logger.info(f"Processing WAI Support Agent streaming request...")
+        ai_db_conn = await ep.get_connection(ai_db_pool_name)
+        async for event, payload in suppa.support_agent_stream(
+                data,
+                ai_db_conn,
+                nosql_conn,
+                logger,
+                model_name='gemini-2.5-flash-preview-05-20',
+                nearest_neighbours=30,
+                google_key_config_path=google_key_config_path
+        ):
+            yield se.format_event(event, payload, stream_format)
+    except Exception as e:
+        logger.error(f"Exception in chatbot stream process: {e}\n{traceback.format_exc()}")
+        yield se.format_event("error", {"data": "Error processing request."}, stream_format)
+    finally:
+        if ai_db_conn:
+            try:
+                await ep.close_connection(ai_db_conn, ai_db_pool_name)
+                logger.info("DB connection released.")
+            except Exception as e:
+                logger.error(f"Error releasing DB connection: {e}")
+
+        logger.info("Closing chatbot logger.")
+        lg.shutdown_logger(logger)
+
+
+@router.post(
+    "/SupportAgent/Stream",
+    summary="Support Chatbot Interaction (Streaming)",
+    description="Streams the support chatbot resolution as it is generated, as Server-Sent Events or NDJSON.",
+    operation_id="support_chatbot_stream"
+)
+async def support_chatbot_stream(
+    request: SupportChatRequest,
+    stream_format: Literal["sse", "ndjson"] = "sse",
+    ai_db_pool_name=Depends(get_ai_db_pool_dependency),
+    nosql_conn=Depends(get_nosql_conn_dependency),
+    google_key_config_path=Depends(get_google_key_config_path_dependency),
+    log_dir_path=Depends(get_log_dir_path)
+):
+    """Streams support chatbot responses."""
+    return StreamingResponse(
+        stream_support_agent(
+            request.model_dump(),
+            ai_db_pool_name=ai_db_pool_name,
+            nosql_conn=nosql_conn,
+            google_key_config_path=google_key_config_path,
+            log_dir_path=log_dir_path,
+            stream_format=stream_format
+        ),
+        media_type=se.media_type(stream_format)
+    )
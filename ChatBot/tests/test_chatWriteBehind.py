@@ -0,0 +1,109 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip('borneo')
+
+from src.app.services.chatWriteBehind import ChatWriteBehind as cwb
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+
+
+class FakeTable:
+    """Records the rows written through NoSQLTableManager and fails the first `failures` writes."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sessions = []
+        self.messages = []
+        self.lock = threading.Lock()
+
+    def _write(self, rows, row):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                return False
+            rows.append(dict(row))
+            return True
+
+    def update(self, handle, row, table_name):
+        return self._write(self.sessions, row)
+
+    def insert(self, handle, row, table_name):
+        return self._write(self.messages, row)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fake = FakeTable()
+    monkeypatch.setattr(tm, 'execute_update_query', fake.update)
+    monkeypatch.setattr(tm, 'execute_insert_query', fake.insert)
+    monkeypatch.setattr(cwb, '_pending', OrderedDict())
+    monkeypatch.setattr(cwb, '_in_flight', {})
+    monkeypatch.setattr(cwb, '_issue_chats', {})
+    for counter in ('enqueued', 'coalesced', 'written_rows', 'retries', 'dropped_chats'):
+        monkeypatch.setattr(cwb, counter, 0)
+    cwb.configure(flush_interval=0.01, max_retries=5, initial_backoff=0.0)
+    yield fake
+    cwb.stop(timeout=5)
+    cwb.configure()
+
+
+def session(chat_id, turn):
+    return {'chat_id': chat_id, 'session_id': 'session-1', 'turn': turn}
+
+
+def message(chat_id, message_id):
+    return {'chat_id': chat_id, 'message_id': message_id, 'user_message': f'message {message_id}'}
+
+
+def test_rows_are_written_synchronously_when_the_writer_is_not_running(table):
+    assert cwb.enqueue('chat-1', session('chat-1', 1), [message('chat-1', '1')])
+
+    assert table.sessions == [session('chat-1', 1)]
+    assert table.messages == [message('chat-1', '1')]
+
+
+def test_queued_rows_are_coalesced_and_visible_until_written(table):
+    cwb.start(None, logging.getLogger('chatWriteBehind'))
+    with cwb._lock:
+        # Holding the lock keeps the writer from taking the rows.
+        cwb.enqueue('chat-1', session('chat-1', 1), [message('chat-1', '1')], issue_id='AEI-101')
+        cwb.enqueue('chat-1', session('chat-1', 2), [message('chat-1', '2')], issue_id='AEI-101')
+        session_row, message_rows = cwb.get_pending(issue_id='AEI-101')
+
+    assert session_row == session('chat-1', 2)
+    assert [row['message_id'] for row in message_rows] == ['1', '2']
+
+    assert cwb.stop(timeout=5) == 0
+    assert table.sessions == [session('chat-1', 2)]
+    assert [row['message_id'] for row in table.messages] == ['1', '2']
+    assert cwb.get_pending(issue_id='AEI-101') == (None, [])
+    assert cwb.get_stats()['coalesced'] == 1
+
+
+def test_failed_write_is_retried(table):
+    table.failures = 2
+    cwb.start(None, logging.getLogger('chatWriteBehind'))
+    cwb.enqueue('chat-1', session('chat-1', 1), [message('chat-1', '1')])
+
+    assert cwb.stop(timeout=5) == 0
+    assert table.sessions == [session('chat-1', 1)]
+    assert table.messages == [message('chat-1', '1')]
+    stats = cwb.get_stats()
+    assert stats['retries'] == 2
+    assert stats['dropped_chats'] == 0
+
+
+def test_chat_is_dropped_after_max_retries(table):
+    table.failures = 100
+    cwb.configure(flush_interval=0.01, max_retries=2, initial_backoff=0.0)
+    cwb.start(None, logging.getLogger('chatWriteBehind'))
+    cwb.enqueue('chat-1', session('chat-1', 1), [message('chat-1', '1')])
+
+    assert cwb.stop(timeout=5) == 0
+    assert table.sessions == []
+    stats = cwb.get_stats()
+    assert stats['retries'] == 2
+    assert stats['dropped_chats'] == 1
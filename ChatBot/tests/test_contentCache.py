@@ -0,0 +1,44 @@
+import pytest
+
+from src.app.services.contentCache import ContentCache as cc
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    cc.configure()
+    cc.clear()
+    yield
+    cc.configure()
+    cc.clear()
+
+
+def test_get_many_returns_hits_and_misses():
+    cc.set_many('support_content', {1: 'one', 2: 'two'})
+
+    found, missing, _ = cc.get_many('support_content', [1, 2, 3])
+    assert found == {1: 'one', 2: 'two'}
+    assert missing == [3]
+
+
+def test_fill_that_raced_with_an_invalidation_is_dropped():
+    _, missing, generation = cc.get_many('support_content', [1])
+    cc.invalidate('support_content', [1])
+    cc.set_many('support_content', {content_id: 'old text' for content_id in missing}, generation)
+
+    assert cc.get_many('support_content', [1])[0] == {}
+    assert cc.get_stats()['skipped_stores'] == 1
+
+
+def test_invalidate_drops_only_the_given_rows():
+    cc.set_many('support_content', {1: 'one', 2: 'two'})
+    cc.invalidate('support_content', [1])
+
+    assert cc.get_many('support_content', [1, 2])[0] == {2: 'two'}
+
+
+def test_cache_is_bounded_by_text_size():
+    cc.configure(max_bytes=10)
+    cc.set_many('support_content', {1: 'aaaaa', 2: 'bbbbb', 3: 'ccccc'})
+
+    assert cc.get_many('support_content', [1, 2, 3])[0] == {2: 'bbbbb', 3: 'ccccc'}
+    assert cc.get_stats()['current_bytes'] == 10
@@ -0,0 +1,46 @@
+import pytest
+
+from src.app.services import llmResponseCache
+from src.app.services.llmResponseCache import LLMResponseCache as rc
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    rc.configure(db_path=str(tmp_path / 'llm_response_cache.sqlite3'), max_entries=1, max_disk_entries=2)
+    rc.clear()
+    yield rc
+    rc.configure()
+    rc.clear()
+
+
+def test_key_depends_on_backend_and_system_instruction():
+    key = rc.build_key('prompt', 'gemini-2.0-flash', 'us-central1', system_instruction='a')
+
+    assert key == rc.build_key('prompt', 'gemini-2.0-flash', 'us-central1', system_instruction='a')
+    assert key != rc.build_key('prompt', 'gemini-2.0-flash', 'us-central1', system_instruction='b')
+    assert key != rc.build_key('prompt', 'gemini-2.0-flash', 'us-central1', system_instruction='a', backend='fake')
+
+
+def test_purge_keeps_the_newest_disk_rows(disk_cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llmResponseCache.time, 'time', lambda: now[0])
+    for key in ('k1', 'k2', 'k3'):
+        rc.set(key, f'response {key}', ttl=0)
+        now[0] += 1
+
+    assert rc.purge_expired() == 1
+    assert rc.get_stats()['disk_entries'] == 2
+    assert rc.get('k1') is None
+    assert rc.get('k3') == 'response k3'
+
+
+def test_purge_removes_expired_disk_rows(disk_cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llmResponseCache.time, 'time', lambda: now[0])
+    rc.set('short', 'response', ttl=10)
+    rc.set('long', 'response', ttl=100)
+    now[0] += 50
+
+    assert rc.purge_expired() == 1
+    assert rc.get('short') is None
+    assert rc.get('long') == 'response'
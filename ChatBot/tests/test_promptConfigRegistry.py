@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip('borneo')
+
+from src.app.metadata.promptConfigRegistry import PromptConfigRegistry as pcr
+from src.app.services.nosqlConnection import NoSQLTableManager as tm
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    table = [
+        {'customer': 'AEI', 'product_name': 'Oracle EBS', 'prompt_level': 'Agent1', 'system_instruction': 'v1'}
+    ]
+    monkeypatch.setattr(tm, 'iter_query', lambda nosql_conn, query: iter([dict(row) for row in table]))
+    for attribute, value in (('_configs', {}), ('_configs_ignore_case', {}), ('_loaded_at', None),
+                             ('_stale', True), ('_generation', 0)):
+        monkeypatch.setattr(pcr, attribute, value)
+    pcr.configure(ttl_seconds=300)
+    return table
+
+
+def test_lookup_loads_the_table_once(rows, monkeypatch):
+    config = pcr.get_config(None, 'AEI', 'Oracle EBS', 'Agent1')
+    assert config['system_instruction'] == 'v1'
+
+    monkeypatch.setattr(tm, 'iter_query', lambda nosql_conn, query: pytest.fail('table read again'))
+    assert pcr.get_config(None, 'aei', 'oracle ebs', 'Agent1', ignore_case=True)['system_instruction'] == 'v1'
+
+
+def test_missing_prompt_raises_lookup_error(rows):
+    with pytest.raises(LookupError):
+        pcr.get_config(None, 'AEI', 'Oracle EBS', 'Agent9')
+
+
+def test_invalidate_reloads_the_table(rows):
+    pcr.get_config(None, 'AEI', 'Oracle EBS', 'Agent1')
+
+    rows[0]['system_instruction'] = 'v2'
+    pcr.invalidate()
+
+    assert pcr.get_config(None, 'AEI', 'Oracle EBS', 'Agent1')['system_instruction'] == 'v2'
+
+
+def test_invalidation_during_a_load_keeps_the_snapshot_stale(rows, monkeypatch):
+    def iter_query(nosql_conn, query):
+        # A writer invalidates while the table is being read.
+        pcr.invalidate()
+        return iter([dict(row) for row in rows])
+
+    monkeypatch.setattr(tm, 'iter_query', iter_query)
+    pcr.load(None)
+
+    assert pcr.get_stats()['stale'] is True
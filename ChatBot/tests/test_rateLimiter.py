@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.app.services.rateLimiter import Governor, RateLimiter as rl
+
+
+def test_async_waiter_is_woken_by_a_release_from_another_thread():
+    governor = Governor(rate=1000, burst=1000, max_in_flight=1)
+
+    async def scenario():
+        await governor.acquire_async()
+        threading.Timer(0.05, governor.release).start()
+        await asyncio.wait_for(governor.acquire_async(), timeout=2)
+        governor.release()
+
+    asyncio.run(scenario())
+    assert governor.get_stats()['in_flight'] == 0
+    assert governor.get_stats()['acquisitions'] == 2
+
+
+def test_cancelled_waiter_is_forgotten():
+    governor = Governor(rate=1000, burst=1000, max_in_flight=1)
+
+    async def scenario():
+        await governor.acquire_async()
+        waiter = asyncio.create_task(governor.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        governor.release()
+
+    asyncio.run(scenario())
+    assert governor._async_waiters == []
+    assert governor.get_stats()['in_flight'] == 0
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f'{code} error')
+        self.code = code
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (ApiError(429), True),
+    (ApiError(503), True),
+    (ApiError(408), True),
+    (ConnectionError('reset by peer'), True),
+    (ApiError(400), False),
+    (ApiError(403), False),
+    (AttributeError("'NoneType' object has no attribute 'generate_content'"), False),
+    (TypeError('bad argument'), False)
+])
+def test_only_errors_a_retry_can_fix_are_retryable(error, retryable):
+    assert rl.is_retryable_error(error) is retryable
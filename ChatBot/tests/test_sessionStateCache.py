@@ -0,0 +1,124 @@
+import pytest
+
+from src.app.services import sessionStateCache
+from src.app.services.sessionStateCache import SessionStateCache as ssc
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    ssc.configure()
+    ssc.clear()
+    yield
+    ssc.configure()
+    ssc.clear()
+
+
+def make_state(messages=5):
+    return {
+        'ticket': {'ticket_status': 'Open', 'process_name': 'Procure to Pay'},
+        'prev_chat': {'chat_id': 'chat-1', 'messages': [{'message_id': str(i)} for i in range(1, messages + 1)]},
+        'prv_chats_cnt': messages,
+        'chat_summary': 'summary',
+        'chat_summary_read_at': 0.0,
+        'process_name': 'Procure to Pay',
+        'process_flow': 'flow'
+    }
+
+
+def test_set_then_get_returns_a_copy_with_the_latest_messages():
+    _, version = ssc.get('chat-1', 'AEI-101', 'AEI')
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state(), version)
+
+    state, _ = ssc.get('chat-1', 'AEI-101', 'AEI')
+    assert [m['message_id'] for m in state['prev_chat']['messages']] == ['3', '4', '5']
+    state['process_flow'] = 'changed'
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0]['process_flow'] == 'flow'
+
+
+def test_state_of_another_issue_or_customer_is_a_miss():
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state())
+
+    assert ssc.get('chat-1', 'AEI-102', 'AEI')[0] is None
+    assert ssc.get('chat-1', 'AEI-101', 'OTHER')[0] is None
+
+
+def test_store_is_dropped_when_its_chat_was_invalidated_during_the_read():
+    _, version = ssc.get('chat-1', 'AEI-101', 'AEI')
+    ssc.invalidate(chat_id='chat-1')
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state(), version)
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+    assert ssc.get_stats()['skipped_stores'] == 1
+
+
+@pytest.mark.parametrize('invalidation', [
+    {'chat_id': 'chat-2'},
+    {'issue_id': 'AEI-202'},
+    {'customer_name': 'OTHER'}
+])
+def test_store_survives_invalidations_of_other_chats(invalidation):
+    _, version = ssc.get('chat-1', 'AEI-101', 'AEI')
+    ssc.invalidate(**invalidation)
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state(), version)
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is not None
+    assert ssc.get_stats()['skipped_stores'] == 0
+
+
+@pytest.mark.parametrize('invalidation', [
+    {'issue_id': 'AEI-101'},
+    {'customer_name': 'AEI'}
+])
+def test_invalidate_by_issue_or_customer_drops_the_cached_state(invalidation):
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state())
+    ssc.set('chat-2', 'AEI-202', 'OTHER', make_state())
+    ssc.invalidate(**invalidation)
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+    assert ssc.get('chat-2', 'AEI-202', 'OTHER')[0] is not None
+
+
+def test_invalidate_all_drops_every_state_and_in_flight_store():
+    _, version = ssc.get('chat-1', 'AEI-101', 'AEI')
+    ssc.set('chat-2', 'AEI-202', 'AEI', make_state())
+    ssc.invalidate_all()
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state(), version)
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+    assert ssc.get('chat-2', 'AEI-202', 'AEI')[0] is None
+
+
+def test_pruning_versions_makes_older_versions_stale(monkeypatch):
+    monkeypatch.setattr(ssc, 'max_versions', 2)
+    _, version = ssc.get('chat-1', 'AEI-101', 'AEI')
+    ssc.invalidate(chat_id='chat-1')
+    ssc.invalidate(chat_id='chat-2')
+    ssc.invalidate(chat_id='chat-3')
+
+    # The version of chat-1 was pruned, it must not read as never invalidated.
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state(), version)
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+
+
+def test_next_turn_keeps_the_expiry_of_the_first_store(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sessionStateCache.time, 'monotonic', lambda: now[0])
+    ssc.configure(ttl_seconds=60)
+
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state())
+    now[0] += 50
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state())
+    now[0] += 20
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+    assert ssc.get_stats()['expirations'] == 1
+
+
+def test_cache_is_bounded_by_size():
+    ssc.set('chat-1', 'AEI-101', 'AEI', make_state())
+    ssc.configure(max_bytes=ssc.get_stats()['current_bytes'] + 1)
+    ssc.set('chat-2', 'AEI-202', 'AEI', make_state())
+
+    assert ssc.get('chat-1', 'AEI-101', 'AEI')[0] is None
+    assert ssc.get('chat-2', 'AEI-202', 'AEI')[0] is not None
+    assert ssc.get_stats()['evictions'] == 1